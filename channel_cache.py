@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+YouTube Channel Resolution Cache
+================================
+Channel URLs (@handle, /c/, /user/, /channel/UC...) resolved once and reused,
+so repeat channels cost zero YouTube API calls:
+- channel ID, channel name and uploads playlist ID per normalized URL key
+- Local JSON file (small: one entry per channel ever processed)
+- Optional Supabase mirror (youtube_channel_handles table) shared across instances
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+
+def channel_cache_key(channel_url: str) -> Optional[str]:
+    """
+    Normalized lookup key for a channel URL:
+    'id:UC...', 'handle:name', 'c:name' or 'user:name' (case-insensitive parts lowercased)
+    """
+    match = re.search(r'youtube\.com/channel/(UC[\w-]+)', channel_url)
+    if match:
+        return f"id:{match.group(1)}"  # channel IDs are case-sensitive
+    for prefix, pattern in (("handle", r'@([\w.-]+)'), ("c", r'/c/([\w-]+)'), ("user", r'/user/([\w-]+)')):
+        match = re.search(pattern, channel_url)
+        if match:
+            return f"{prefix}:{match.group(1).lower()}"
+    return None
+
+
+class ChannelResolutionCache:
+    """Persistent channel URL key -> {channel_id, channel_name, uploads_playlist_id}"""
+
+    def __init__(self, path: str = "channel_cache.json", ttl_days: float = 180, mirror=None):
+        """
+        Args:
+            path: JSON file holding the local entries
+            ttl_days: Entries older than this are resolved again (handles can be renamed)
+            mirror: Optional object with get_channel_resolution(key) /
+                    store_channel_resolution(key, channel_id, channel_name, uploads_playlist_id)
+                    (e.g. SupabaseClient)
+        """
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.mirror = mirror
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # resolution runs in worker threads
+        self._entries: Dict[str, dict] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Channel cache unreadable, starting empty: {e}")
+
+    def get(self, key: str) -> Optional[dict]:
+        """Fresh entry or None (checks the mirror on a local miss)"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.time() - entry.get('resolved_at', 0) <= self.ttl_seconds:
+            self.hits += 1
+            return entry
+
+        if self.mirror:
+            try:
+                entry = self.mirror.get_channel_resolution(key)
+            except Exception as e:
+                print(f"⚠️ Channel cache mirror lookup failed: {e}")
+                entry = None
+            if entry and entry.get('channel_id'):
+                self._store_local(key, entry['channel_id'], entry.get('channel_name'),
+                                  entry.get('uploads_playlist_id'))
+                self.hits += 1
+                return self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, channel_id: str, channel_name: Optional[str] = None,
+            uploads_playlist_id: Optional[str] = None):
+        if not key or not channel_id:
+            return
+        self._store_local(key, channel_id, channel_name, uploads_playlist_id)
+        if self.mirror:
+            try:
+                self.mirror.store_channel_resolution(key, channel_id, channel_name, uploads_playlist_id)
+            except Exception as e:
+                print(f"⚠️ Channel cache mirror store failed: {e}")
+
+    def _store_local(self, key: str, channel_id: str, channel_name: Optional[str],
+                     uploads_playlist_id: Optional[str]):
+        with self._lock:
+            self._entries[key] = {
+                'channel_id': channel_id,
+                'channel_name': channel_name,
+                'uploads_playlist_id': uploads_playlist_id,
+                'resolved_at': time.time()
+            }
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"⚠️ Channel cache store failed: {e}")
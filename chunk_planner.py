@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+LLM Chunk Planner
+=================
+Sizes transcript chunks for LLM rewrites by estimated tokens instead of a
+fixed character count:
+- Each chunk's rewrite must fit the model's output limit (the usual cause of
+  truncated rewrites) and prompt + chunk + rewrite must fit its context
+- Each call should finish within a latency target at the model's measured
+  output speed
+- Within those bounds chunks are as large as possible (fewest round trips)
+  and evenly sized, so no request is much slower than the rest
+- Characters per token and tokens/second are calibrated from the API's
+  reported usage (no tokenizer dependency)
+"""
+
+import math
+from typing import Callable, Dict, Iterable, List, Optional
+
+from llm_client import _env_number
+
+# model -> context window / output tokens we can rely on (no max_tokens is sent)
+MODEL_LIMITS = {
+    "deepseek-chat": {"context": 65536, "output": 4096},
+    "deepseek-reasoner": {"context": 65536, "output": 4096},
+    "gpt-4o": {"context": 128000, "output": 16384},
+    "gpt-4-turbo": {"context": 128000, "output": 4096},
+    "claude-3.5-sonnet": {"context": 200000, "output": 8192},
+    "gemini-pro-1.5": {"context": 1000000, "output": 8192},
+    "llama-3.1-70b-instruct": {"context": 131072, "output": 4096},
+}
+DEFAULT_LIMITS = {"context": 32768, "output": 4096}
+
+
+def model_limits(model: str) -> Dict[str, int]:
+    """Limits for a model id, with or without an OpenRouter 'vendor/' prefix"""
+    name = model.split("/", 1)[-1].split(":", 1)[0]
+    return MODEL_LIMITS.get(name, DEFAULT_LIMITS)
+
+
+class ChunkPlanner:
+    """Token-aware chunk sizing with per-model calibration"""
+
+    def __init__(self, latency_target: Optional[float] = None, output_ratio: Optional[float] = None,
+                 min_chars: Optional[int] = None):
+        """
+        Args:
+            latency_target: Seconds one rewrite request should take at most (LLM_LATENCY_TARGET)
+            output_ratio: Rewrite length / chunk length in tokens (LLM_OUTPUT_RATIO)
+            min_chars: Never plan chunks smaller than this (LLM_CHUNK_MIN_CHARS)
+        """
+        self.latency_target = latency_target or _env_number("LLM_LATENCY_TARGET", 120, float)
+        self.output_ratio = output_ratio or _env_number("LLM_OUTPUT_RATIO", 1.2, float)
+        self.min_chars = min_chars or _env_number("LLM_CHUNK_MIN_CHARS", 2000)
+        self.output_safety = 0.8  # headroom under the output limit
+        self.default_chars_per_token = 4.0
+        self.default_tokens_per_sec = _env_number("LLM_PRIOR_TOKENS_PER_SEC", 25, float)
+        self._chars_per_token: Dict[str, float] = {}
+        self._tokens_per_sec: Dict[str, float] = {}
+
+    # =============================================================================
+    # CALIBRATION
+    # =============================================================================
+
+    def record(self, model: str, usage: dict, prompt_chars: int, seconds: float):
+        """Feed one completed request (AsyncLLMClient on_usage hook)"""
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+        if prompt_tokens > 50 and prompt_chars:
+            self._chars_per_token[model] = self._ema(
+                self._chars_per_token.get(model), prompt_chars / prompt_tokens
+            )
+        if completion_tokens > 50 and seconds > 0:
+            self._tokens_per_sec[model] = self._ema(
+                self._tokens_per_sec.get(model), completion_tokens / seconds
+            )
+
+    @staticmethod
+    def _ema(previous: Optional[float], value: float, alpha: float = 0.3) -> float:
+        return value if previous is None else previous + alpha * (value - previous)
+
+    def chars_per_token(self, model: str) -> float:
+        return self._chars_per_token.get(model, self.default_chars_per_token)
+
+    def tokens_per_sec(self, model: str) -> float:
+        return self._tokens_per_sec.get(model, self.default_tokens_per_sec)
+
+    def estimate_tokens(self, text: str, model: str) -> int:
+        return math.ceil(len(text) / self.chars_per_token(model))
+
+    # =============================================================================
+    # PLANNING
+    # =============================================================================
+
+    def max_chunk_chars(self, model: str, prompt: Optional[str] = None) -> int:
+        """Largest chunk (in characters) that keeps one request within every limit"""
+        limits = model_limits(model)
+        prompt_tokens = self.estimate_tokens(prompt, model) if prompt else 1000
+
+        by_output = limits["output"] * self.output_safety / self.output_ratio
+        by_context = (limits["context"] * self.output_safety - prompt_tokens) / (1 + self.output_ratio)
+        by_latency = self.latency_target * self.tokens_per_sec(model) / self.output_ratio
+
+        input_tokens = min(by_output, by_context, by_latency)
+        return max(self.min_chars, int(input_tokens * self.chars_per_token(model)))
+
+    def plan(self, text: str, models: Iterable[str], split_fn: Callable[[str, int], List[str]],
+             prompt: Optional[str] = None, max_chars: Optional[int] = None) -> List[str]:
+        """
+        Split text for rewriting by any of the given models.
+
+        Args:
+            models: Models the chunks may be routed to (the tightest one decides)
+            split_fn: Sentence-aware splitter (text, max_chars) -> chunks
+            max_chars: Optional hard cap (e.g. DEEPSEEK_CHUNK_SIZE)
+        """
+        text = text.strip()
+        limit = min(self.max_chunk_chars(model, prompt) for model in models)
+        if max_chars:
+            limit = min(limit, max_chars)
+        if len(text) <= limit:
+            return [text] if text else []
+
+        # Same request count, evenly sized: smallest target that still yields
+        # `count` chunks (sentence boundaries need a little slack)
+        count = math.ceil(len(text) / limit)
+        target = math.ceil(len(text) / count)
+        while True:
+            target = min(limit, int(target * 1.03) + 1)
+            chunks = split_fn(text, target)
+            if len(chunks) <= count or target >= limit:
+                return chunks
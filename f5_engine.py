@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+F5-TTS Engine Helpers
+=====================
+Inference helpers around the F5-TTS API object used by the bot:
+- Reference conditioning cache keyed by reference file hash
+  (clipped reference audio, resampled tensor, mel features, transcript)
+- Chunk synthesis that reuses the cached conditioning instead of
+  re-loading / re-transcribing the reference on every infer() call
+- Batched synthesis packing several chunks into one padded forward pass
+- Memory policy deciding when to flush the CUDA cache / run gc
+- Per-chunk audio checkpoints so retries only synthesize missing chunks
+- Streaming WAV writer that appends chunks with boundary cross-fades
+"""
+
+import gc
+import hashlib
+import os
+import shutil
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+import torch
+import torchaudio
+
+# F5-TTS internals used to drive the model directly. Older F5-TTS builds may
+# not expose all of them; in that case we fall back to F5TTS.infer() with the
+# cached reference text (still skips re-transcription).
+try:
+    from f5_tts.infer.utils_infer import (
+        preprocess_ref_audio_text,
+        chunk_text,
+        hop_length,
+        target_sample_rate,
+    )
+    from f5_tts.model.utils import convert_char_to_pinyin
+    F5_INTERNALS_AVAILABLE = True
+except ImportError:
+    preprocess_ref_audio_text = None
+    chunk_text = None
+    hop_length = 256
+    target_sample_rate = 24000
+    convert_char_to_pinyin = None
+    F5_INTERNALS_AVAILABLE = False
+
+SAMPLE_RATE = target_sample_rate
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of a string"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file, read in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# =============================================================================
+# REFERENCE CONDITIONING CACHE
+# =============================================================================
+
+class ReferenceConditioning:
+    """Preprocessed reference clip ready to condition F5-TTS sampling"""
+
+    def __init__(self, ref_hash: str, ref_file: str, ref_text: str,
+                 audio: Optional[torch.Tensor], mel: Optional[torch.Tensor],
+                 rms: float, target_rms: float):
+        self.ref_hash = ref_hash
+        self.ref_file = ref_file      # Clipped/cleaned clip written by F5-TTS
+        self.ref_text = ref_text      # Transcript of the clipped clip
+        self.audio = audio            # (1, samples) at SAMPLE_RATE, on model device
+        self.mel = mel                # (1, frames, n_mels), on model device
+        self.rms = rms
+        self.target_rms = target_rms
+
+    @property
+    def duration(self) -> float:
+        """Reference clip length in seconds"""
+        if self.audio is None:
+            return 0.0
+        return self.audio.shape[-1] / SAMPLE_RATE
+
+    @property
+    def mel_frames(self) -> int:
+        if self.audio is None:
+            return 0
+        return self.audio.shape[-1] // hop_length
+
+
+class ReferenceCache:
+    """
+    Small LRU of reference conditionings keyed by (file hash, target_rms).
+    The same reference is reused across every chunk and every queued script
+    until the reference file changes.
+    """
+
+    def __init__(self, max_entries: int = 2):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, ReferenceConditioning]" = OrderedDict()
+
+    def get(self, f5_model, ref_file: str, target_rms: float = 0.1,
+            ref_hash: Optional[str] = None) -> ReferenceConditioning:
+        """
+        Return cached conditioning for ref_file, building it on first use.
+        ref_hash: file_hash(ref_file) when the caller already has it (skips re-reading the file)
+        """
+        key = (ref_hash or file_hash(ref_file), target_rms)
+        cached = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            return cached
+
+        print(f"🔄 Preparing reference conditioning: {ref_file}")
+        conditioning = self._build(f5_model, ref_file, key[0], target_rms)
+        self._entries[key] = conditioning
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        print(f"✅ Reference cached ({conditioning.duration:.1f}s): {conditioning.ref_text[:60]}...")
+        return conditioning
+
+    def clear(self):
+        """Drop all cached conditionings (frees their VRAM)"""
+        self._entries.clear()
+
+    @staticmethod
+    def _check_ref_text(ref_file: str, ref_text: str):
+        """Generation needs the reference transcript: a silent clip yields none"""
+        if not ref_text or not ref_text.strip():
+            raise ValueError(f"No speech recognized in reference audio {ref_file} - "
+                             f"use a clip with clear speech")
+
+    @staticmethod
+    def _build(f5_model, ref_file: str, ref_hash: str, target_rms: float) -> ReferenceConditioning:
+        if not F5_INTERNALS_AVAILABLE:
+            # Legacy path: let F5-TTS transcribe once, then reuse the text
+            ref_text = f5_model.transcribe(ref_file)
+            ReferenceCache._check_ref_text(ref_file, ref_text)
+            return ReferenceConditioning(ref_hash, ref_file, ref_text, None, None, 0.0, target_rms)
+
+        # Clip + silence-trim + transcribe exactly once per reference
+        clip_file, ref_text = preprocess_ref_audio_text(ref_file, "")
+        ReferenceCache._check_ref_text(ref_file, ref_text)
+        if len(ref_text[-1].encode('utf-8')) == 1:
+            ref_text = ref_text + " "
+
+        audio, sr = torchaudio.load(clip_file)
+        if audio.shape[0] > 1:
+            audio = torch.mean(audio, dim=0, keepdim=True)
+        rms = torch.sqrt(torch.mean(torch.square(audio))).item()
+        if rms < target_rms:
+            audio = audio * target_rms / rms
+        if sr != SAMPLE_RATE:
+            audio = torchaudio.transforms.Resample(sr, SAMPLE_RATE)(audio)
+        audio = audio.to(f5_model.device)
+
+        with torch.inference_mode():
+            mel = f5_model.ema_model.mel_spec(audio).permute(0, 2, 1)
+
+        return ReferenceConditioning(ref_hash, clip_file, ref_text, audio, mel, rms, target_rms)
+
+
+# =============================================================================
+# MEMORY POLICY
+# =============================================================================
+
+class MemoryPolicy:
+    """
+    Decides when the TTS loop should call torch.cuda.empty_cache() / gc.collect().
+
+    Modes:
+        aggressive - flush + gc after every chunk (old behaviour, lowest VRAM)
+        balanced   - flush only when free VRAM drops below 20%, gc every 10 chunks
+        throughput - flush only when free VRAM drops below 5%, no gc inside a script
+    """
+
+    MODES = {
+        # mode: (min free VRAM fraction before flushing, gc every N chunks or 0)
+        "aggressive": (1.0, 1),
+        "balanced": (0.20, 10),
+        "throughput": (0.05, 0),
+    }
+
+    def __init__(self, mode: str = "balanced"):
+        self.mode = mode if mode in self.MODES else "balanced"
+        self.flush_count = 0
+
+    def set_mode(self, mode: str) -> bool:
+        if mode not in self.MODES:
+            return False
+        self.mode = mode
+        return True
+
+    @staticmethod
+    def free_vram_fraction() -> float:
+        """Free / total memory on the current CUDA device (1.0 without CUDA)"""
+        if not torch.cuda.is_available():
+            return 1.0
+        try:
+            free, total = torch.cuda.mem_get_info()
+            return free / total if total else 1.0
+        except Exception:
+            return 0.0  # Unknown: behave as if memory is tight
+
+    def release(self):
+        """Unconditionally return cached blocks to the driver"""
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+            self.flush_count += 1
+
+    def after_chunk(self, chunk_index: int) -> bool:
+        """Called after each synthesized chunk. Returns True if the cache was flushed."""
+        min_free, gc_every = self.MODES[self.mode]
+        if gc_every and (chunk_index + 1) % gc_every == 0:
+            gc.collect()
+        if not torch.cuda.is_available():
+            return False
+        if min_free >= 1.0 or self.free_vram_fraction() < min_free:
+            self.release()
+            return True
+        return False
+
+    def after_job(self):
+        """Called once a whole script is done: always clean up"""
+        gc.collect()
+        self.release()
+
+
+# =============================================================================
+# SYNTHESIS
+# =============================================================================
+
+def cross_fade_concat(waves: List[np.ndarray], cross_fade_duration: float = 0.15) -> np.ndarray:
+    """Concatenate waves with a linear cross-fade (same as F5-TTS infer)"""
+    if not waves:
+        return np.zeros(0, dtype=np.float32)
+    if cross_fade_duration <= 0:
+        return np.concatenate(waves)
+
+    final_wave = waves[0]
+    for next_wave in waves[1:]:
+        fade_samples = min(int(cross_fade_duration * SAMPLE_RATE), len(final_wave), len(next_wave))
+        if fade_samples <= 0:
+            final_wave = np.concatenate([final_wave, next_wave])
+            continue
+        fade_out = np.linspace(1, 0, fade_samples)
+        fade_in = np.linspace(0, 1, fade_samples)
+        overlap = final_wave[-fade_samples:] * fade_out + next_wave[:fade_samples] * fade_in
+        final_wave = np.concatenate([final_wave[:-fade_samples], overlap, next_wave[fade_samples:]])
+    return final_wave
+
+
+def split_for_reference(conditioning: ReferenceConditioning, gen_text: str, speed: float) -> List[str]:
+    """Split gen_text into pieces that fit the model's ~22s window alongside the reference"""
+    ref_seconds = conditioning.duration
+    max_chars = int(len(conditioning.ref_text.encode('utf-8')) / ref_seconds * (22 - ref_seconds) * speed)
+    return chunk_text(gen_text, max_chars=max_chars)
+
+
+def _estimate_frames(conditioning: ReferenceConditioning, gen_text: str, speed: float) -> int:
+    """Total mel frames (reference + generated) F5-TTS will sample for gen_text"""
+    local_speed = 0.3 if len(gen_text.encode('utf-8')) < 10 else speed
+    ref_text_len = len(conditioning.ref_text.encode('utf-8'))
+    gen_text_len = len(gen_text.encode('utf-8'))
+    ref_frames = conditioning.mel_frames
+    return ref_frames + int(ref_frames / ref_text_len * gen_text_len / local_speed)
+
+
+def _sample_batch(f5_model, conditioning: ReferenceConditioning, gen_texts: List[str],
+                  speed: float, nfe_step: int, cfg_strength: float,
+                  sway_sampling_coef: float) -> List[np.ndarray]:
+    """
+    Run one padded F5-TTS forward pass for several texts against the cached
+    reference mel. Returns one waveform per text, in input order.
+    """
+    ref_frames = conditioning.mel_frames
+    durations = [_estimate_frames(conditioning, t, speed) for t in gen_texts]
+    text_list = convert_char_to_pinyin([conditioning.ref_text + t for t in gen_texts])
+    cond = conditioning.mel.expand(len(gen_texts), -1, -1)
+
+    with torch.inference_mode():
+        generated, _ = f5_model.ema_model.sample(
+            cond=cond,
+            text=text_list,
+            duration=torch.tensor(durations, device=cond.device, dtype=torch.long),
+            steps=nfe_step,
+            cfg_strength=cfg_strength,
+            sway_sampling_coef=sway_sampling_coef,
+        )
+        del _
+        generated = generated.to(torch.float32)
+
+        waves = []
+        for i, total_frames in enumerate(durations):
+            mel = generated[i:i + 1, ref_frames:total_frames, :].permute(0, 2, 1)
+            if f5_model.mel_spec_type == "vocos":
+                wave = f5_model.vocoder.decode(mel)
+            else:
+                wave = f5_model.vocoder(mel)
+            if conditioning.rms < conditioning.target_rms:
+                wave = wave * conditioning.rms / conditioning.target_rms
+            waves.append(wave.squeeze().cpu().numpy())
+        del generated
+        return waves
+
+
+def _infer_legacy(f5_model, conditioning: ReferenceConditioning, gen_text: str, speed: float,
+                  nfe_step: int, cfg_strength: float, sway_sampling_coef: float,
+                  cross_fade_duration: float) -> np.ndarray:
+    """F5TTS.infer() fallback with the cached reference text"""
+    wav, _, _ = f5_model.infer(
+        ref_file=conditioning.ref_file,
+        ref_text=conditioning.ref_text,
+        gen_text=gen_text,
+        cross_fade_duration=cross_fade_duration,
+        speed=speed,
+        nfe_step=nfe_step,
+        cfg_strength=cfg_strength,
+        sway_sampling_coef=sway_sampling_coef,
+        target_rms=conditioning.target_rms,
+    )
+    return wav
+
+
+def synthesize_chunk(f5_model, conditioning: ReferenceConditioning, gen_text: str,
+                     speed: float = 1.0, nfe_step: int = 32, cfg_strength: float = 2.0,
+                     sway_sampling_coef: float = -1, cross_fade_duration: float = 0.15) -> np.ndarray:
+    """
+    Synthesize one text chunk using a cached reference conditioning.
+    Equivalent to F5TTS.infer() minus the per-call reference preprocessing.
+
+    Returns:
+        1-D float numpy waveform at SAMPLE_RATE
+    """
+    if not F5_INTERNALS_AVAILABLE or conditioning.mel is None:
+        return _infer_legacy(f5_model, conditioning, gen_text, speed, nfe_step,
+                             cfg_strength, sway_sampling_coef, cross_fade_duration)
+
+    waves = [
+        _sample_batch(f5_model, conditioning, [piece], speed, nfe_step, cfg_strength, sway_sampling_coef)[0]
+        for piece in split_for_reference(conditioning, gen_text, speed)
+    ]
+    return cross_fade_concat(waves, cross_fade_duration)
+
+
+def iter_synthesized_chunks(f5_model, conditioning: ReferenceConditioning, chunks: List[str],
+                            batch_size: int = 1, max_batch_frames: Optional[int] = None,
+                            speed: float = 1.0, nfe_step: int = 32, cfg_strength: float = 2.0,
+                            sway_sampling_coef: float = -1,
+                            cross_fade_duration: float = 0.15) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Synthesize many text chunks, packing up to batch_size model pieces into a
+    single padded forward pass.
+
+    Pieces are packed in script order so chunks complete (and are yielded)
+    in order. A batch is also closed early once batch_size * longest piece
+    would exceed max_batch_frames, which bounds VRAM for long pieces.
+
+    Yields:
+        (chunk_index, waveform) for every chunk, in order
+    """
+    if batch_size <= 1 or not F5_INTERNALS_AVAILABLE or conditioning.mel is None:
+        for i, chunk in enumerate(chunks):
+            yield i, synthesize_chunk(f5_model, conditioning, chunk, speed, nfe_step,
+                                      cfg_strength, sway_sampling_coef, cross_fade_duration)
+        return
+
+    # Flatten chunks into model-sized pieces: (chunk_index, text, frames)
+    pieces = []
+    for i, chunk in enumerate(chunks):
+        for piece in split_for_reference(conditioning, chunk, speed):
+            pieces.append((i, piece, _estimate_frames(conditioning, piece, speed)))
+
+    pending = {i: [] for i in range(len(chunks))}
+    remaining = {i: 0 for i in range(len(chunks))}
+    for chunk_index, _, _ in pieces:
+        remaining[chunk_index] += 1
+    next_chunk = 0
+
+    start = 0
+    while start < len(pieces):
+        end = start + 1
+        longest = pieces[start][2]
+        while end < len(pieces) and end - start < batch_size:
+            longest_if_added = max(longest, pieces[end][2])
+            if max_batch_frames and longest_if_added * (end - start + 1) > max_batch_frames:
+                break
+            longest = longest_if_added
+            end += 1
+
+        batch = pieces[start:end]
+        waves = _sample_batch(f5_model, conditioning, [text for _, text, _ in batch],
+                              speed, nfe_step, cfg_strength, sway_sampling_coef)
+        for (chunk_index, _, _), wave in zip(batch, waves):
+            pending[chunk_index].append(wave)
+            remaining[chunk_index] -= 1
+        start = end
+
+        # Emit every chunk whose pieces are all done, keeping script order
+        while next_chunk < len(chunks) and remaining[next_chunk] == 0:
+            yield next_chunk, cross_fade_concat(pending.pop(next_chunk), cross_fade_duration)
+            next_chunk += 1
+
+
+# =============================================================================
+# CHUNK CHECKPOINTS
+# =============================================================================
+
+class ChunkCheckpoints:
+    """
+    Per-chunk audio checkpoints for one synthesis job.
+
+    Waves are stored as .npy under <root>/<job key>/, where the job key hashes
+    (script, reference, speed, nfe_step, cfg_strength). Each file name also
+    carries a hash of the chunk text, so a changed chunk size never reuses a
+    stale wave. A retry after an OOM, exception or /stop only synthesizes the
+    chunks that are missing.
+    """
+
+    def __init__(self, root: str, script_text: str, ref_hash: str,
+                 speed: float, nfe_step: int, cfg_strength: float):
+        key = f"{text_hash(script_text)}|{ref_hash}|{speed}|{nfe_step}|{cfg_strength}"
+        self.job_key = text_hash(key)[:24]
+        self.dir = os.path.join(root, self.job_key)
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, index: int, chunk: str) -> str:
+        return os.path.join(self.dir, f"{index:05d}_{text_hash(chunk)[:12]}.npy")
+
+    def has(self, index: int, chunk: str) -> bool:
+        return os.path.exists(self._path(index, chunk))
+
+    def load(self, index: int, chunk: str) -> np.ndarray:
+        return np.load(self._path(index, chunk))
+
+    def save(self, index: int, chunk: str, wave):
+        if torch.is_tensor(wave):
+            wave = wave.detach().cpu().numpy()
+        path = self._path(index, chunk)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, np.asarray(wave, dtype=np.float32))
+        os.replace(tmp_path, path)  # never leave a half-written checkpoint
+
+    def count(self, chunks: List[str]) -> int:
+        return sum(1 for i, chunk in enumerate(chunks) if self.has(i, chunk))
+
+    def clear(self):
+        """Drop this job's checkpoints (call once the final output is saved)"""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    @staticmethod
+    def purge(root: str, older_than_days: float = 3) -> int:
+        """Delete abandoned job checkpoint dirs. Returns number removed."""
+        if not os.path.isdir(root):
+            return 0
+        cutoff = time.time() - older_than_days * 86400
+        removed = 0
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+def iter_checkpointed_chunks(checkpoints: ChunkCheckpoints, chunks: List[str],
+                             synthesize) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (chunk_index, wave) for every chunk in order, loading checkpointed
+    chunks from disk and synthesizing only the missing ones.
+
+    Args:
+        checkpoints: Checkpoint store for this job
+        chunks: All text chunks of the script
+        synthesize: Called with the missing chunk texts; must return an
+                    iterator of (local_index, wave) in order
+                    (e.g. a partial of iter_synthesized_chunks)
+    """
+    missing = [i for i, chunk in enumerate(chunks) if not checkpoints.has(i, chunk)]
+    missing_set = set(missing)
+    generated = synthesize([chunks[i] for i in missing]) if missing else iter(())
+    try:
+        for i, chunk in enumerate(chunks):
+            if i in missing_set:
+                _, wave = next(generated)
+                checkpoints.save(i, chunk, wave)
+            else:
+                wave = checkpoints.load(i, chunk)
+            yield i, wave
+    finally:
+        if hasattr(generated, "close"):
+            generated.close()
+
+
+# =============================================================================
+# STREAMING OUTPUT
+# =============================================================================
+
+class StreamingWavWriter:
+    """
+    Append synthesized chunks to a WAV file as they are produced.
+
+    Only the cross-fade tail of the previous chunk is kept in memory; it is
+    blended with the head of the next chunk on append(), so the result matches
+    cross_fade_concat() over the whole script while peak memory stays at one
+    chunk. The header is synced after every chunk, so a crash mid-script
+    still leaves a playable partial file.
+    """
+
+    def __init__(self, path: str, sample_rate: int = SAMPLE_RATE,
+                 cross_fade_duration: float = 0.15, subtype: str = "PCM_16"):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.fade_samples = max(0, int(cross_fade_duration * sample_rate))
+        self.chunks_written = 0
+        self.samples_written = 0
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._file = sf.SoundFile(path, mode="w", samplerate=sample_rate, channels=1, subtype=subtype)
+
+    def append(self, wave):
+        """Write one chunk, holding back its tail for the next cross-fade"""
+        if torch.is_tensor(wave):
+            wave = wave.detach().cpu().numpy()
+        wave = np.asarray(wave, dtype=np.float32).reshape(-1)
+
+        if len(self._tail) and len(wave):
+            fade = min(len(self._tail), len(wave))
+            overlap = (self._tail[-fade:] * np.linspace(1, 0, fade, dtype=np.float32)
+                       + wave[:fade] * np.linspace(0, 1, fade, dtype=np.float32))
+            self._write(self._tail[:-fade])
+            wave = np.concatenate([overlap, wave[fade:]])
+        elif len(self._tail):
+            wave = self._tail
+
+        keep = min(self.fade_samples, len(wave))
+        self._write(wave[:len(wave) - keep])
+        self._tail = wave[len(wave) - keep:].copy()
+        self.chunks_written += 1
+        self._file.flush()
+
+    def _write(self, data: np.ndarray):
+        if len(data):
+            self._file.write(data)
+            self.samples_written += len(data)
+
+    @property
+    def duration(self) -> float:
+        return (self.samples_written + len(self._tail)) / self.sample_rate
+
+    def close(self):
+        """Flush the held-back tail and finalize the header"""
+        if self._file.closed:
+            return
+        self._write(self._tail)
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
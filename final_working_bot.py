@@ -4,6 +4,7 @@ import json
 import asyncio
 import logging
 import requests
+import httpx
 import torch
 from pathlib import Path
 import telegram
@@ -20,8 +21,22 @@ from dotenv import load_dotenv
 
 # New imports for YouTube Channel Automation
 from supabase_client import SupabaseClient
-from transcribe_helper import get_youtube_transcript, SupaDataError
+from transcribe_helper import request_transcript, job_manager, SupaDataError
 from youtube_processor import YouTubeChannelProcessor, YouTubeProcessorError
+from f5_engine import (ReferenceCache, MemoryPolicy, StreamingWavWriter, ChunkCheckpoints,
+                       iter_synthesized_chunks, synthesize_chunk, iter_checkpointed_chunks, file_hash)
+from tts_worker import TTSWorker
+from job_queue import PersistentJobQueue
+from output_cache import OutputCache
+from llm_client import AsyncLLMClient, StreamingChunker, OPENROUTER_URL, run_cancellable
+from llm_router import LLMRouter, LLMProvider
+from chunk_planner import ChunkPlanner
+from title_pipeline import TitlePipeline
+from rewrite_cache import RewriteCache
+from transcript_cache import TranscriptCache
+from channel_cache import ChannelResolutionCache
+from youtube_key_pool import YouTubeKeyPool
+import http_pool
 
 # Import credentials from /workspace/p.py (Vast.ai)
 import sys
@@ -105,6 +120,7 @@ REFERENCE_DIR = "reference"
 OUTPUT_DIR = "output"
 SCRIPTS_DIR = "scripts"
 MAX_TELEGRAM_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+AI_MODES = ("deepseek", "openrouter", "auto")  # LLM backend for YouTube transcripts
 
 # Directories banayiye
 os.makedirs(REFERENCE_DIR, exist_ok=True)
@@ -118,11 +134,25 @@ class WorkingF5Bot:
         self.f5_model = None
         self.reference_audio = None
         self.reference_text = None
-        self.processing_queue = []
+        self.reference_cache = ReferenceCache()  # Reference conditioning reused across chunks
+        self._reference_hash = (None, None)  # ((path, mtime, size), sha256) of the current reference
+        self.tts_worker = TTSWorker()  # F5-TTS inference runs here, off the event loop
+        self.checkpoint_dir = "checkpoints"  # Per-chunk audio of unfinished TTS jobs
+        ChunkCheckpoints.purge(self.checkpoint_dir, older_than_days=3)
+        # Durable script queue (SQLite) - survives restarts; interrupted jobs are resumed
+        self.processing_queue = PersistentJobQueue(os.getenv("QUEUE_DB_PATH", "processing_queue.db"))
+        self.processing_queue.requeue_interrupted()
+        self.processing_queue.purge_finished(older_than_days=7)
         self.completed_files = []  # Track completed files with links
         self.is_processing = False
-        self.stop_requested = False  # Add stop flag
+        self._stop_event = asyncio.Event()  # Backs stop_requested; set -> in-flight LLM calls are cancelled
+        self._llm_calls = 0  # LLM calls currently awaited through cancellable()
+        self._channel_runs = 0  # process_youtube_channel runs in progress (never set is_processing)
         self.gofile_cache = {}
+        # Finished audio keyed by script + reference + synthesis params (size-bounded LRU)
+        self.output_cache = OutputCache(
+            "output_cache", max_bytes=int(float(os.getenv("OUTPUT_CACHE_MAX_GB", "10")) * 1024 ** 3)
+        )
         self.latest_outputs_by_chat = {}
 
         # Queue batch processing settings
@@ -137,12 +167,41 @@ class WorkingF5Bot:
         # Initialize defaults before loading config
         self.deepseek_prompt = "Rewrite this content to be more engaging:"
         self.youtube_transcript_prompt = "Rewrite this YouTube transcript content to be more engaging and natural for text-to-speech:"
-        self.ai_mode = "deepseek"  # "deepseek" or "openrouter" - for YouTube transcript processing only
+        self.ai_mode = "deepseek"  # "deepseek", "openrouter" or "auto" (latency-aware router) - YouTube transcript processing only
         self.openrouter_model = "deepseek/deepseek-chat"  # Default OpenRouter model
         self.ffmpeg_filter = "afftdn=nr=12:nf=-25,highpass=f=80,lowpass=f=10000,equalizer=f=6000:t=h:width=2000:g=-6"
         self.audio_speed = 0.8
         self.audio_quality = 'high'
         self.chunk_size = 500  # Audio generation chunk size (chars). Higher = faster but lower quality. 4090 can handle 2000+
+        self.tts_batch_size = 1  # Chunks packed per F5-TTS forward pass (1 = sequential)
+        self.llm_streaming = os.getenv("LLM_STREAMING", "false").lower() == "true"  # YouTube links: TTS starts on first streamed sentences
+        self.memory_policy = MemoryPolicy("balanced")  # aggressive | balanced | throughput
+        try:
+            self.tts_batch_max_frames = int(os.getenv("F5_BATCH_MAX_FRAMES", 16384))  # VRAM budget: batch * longest piece (mel frames)
+        except Exception:
+            self.tts_batch_max_frames = 16384
+        try:
+            self.transcript_concurrency_per_key = int(os.getenv("SUPADATA_MAX_CONCURRENCY", 3))  # In-flight Supadata requests per key
+        except Exception:
+            self.transcript_concurrency_per_key = 3
+        self._supadata_slots = {}  # api_key -> asyncio.Semaphore
+        # Persistent LLM rewrite cache (prompt + model + temperature + chunk -> result)
+        try:
+            rewrite_ttl_days = float(os.getenv("REWRITE_CACHE_TTL_DAYS", 30))
+        except Exception:
+            rewrite_ttl_days = 30
+        self.rewrite_cache = RewriteCache(os.getenv("REWRITE_CACHE_DB", "rewrite_cache.db"), ttl_days=rewrite_ttl_days)
+        # Transcripts by video ID + language, consulted before any Supadata call
+        try:
+            transcript_ttl_days = float(os.getenv("TRANSCRIPT_CACHE_TTL_DAYS", 90))
+        except Exception:
+            transcript_ttl_days = 90
+        self.transcript_cache = TranscriptCache(os.getenv("TRANSCRIPT_CACHE_DIR", "transcript_cache"), ttl_days=transcript_ttl_days)
+        self.transcript_cache.purge_expired()
+        self.chunk_planner = ChunkPlanner()  # Token-aware LLM chunk sizing, calibrated from API usage
+        self.llm_client = AsyncLLMClient(cache=self.rewrite_cache, on_usage=self.chunk_planner.record)  # Concurrent DeepSeek chunk rewriting
+        self.gpu_lock = asyncio.Lock()  # One script on the GPU at a time across pipelines
+        self.channel_pipeline_depth = 2  # Items buffered between channel pipeline stages
 
         # Title generation prompts for DeepSeek
         self.title_prompt_1 = "Based on the following script, generate 1 catchy and engaging title for a video. The title should be attention-grabbing, relevant to the content, and optimized for social media. Keep it concise (under 60 characters). Only return the title, nothing else.\n\nScript:"
@@ -159,6 +218,18 @@ class WorkingF5Bot:
         # Load configuration from file (will override defaults if exists)
         self.load_config()
 
+        # Latency-aware routing across DeepSeek direct and OpenRouter (channel runs, ai_mode "auto")
+        self.openrouter_client = AsyncLLMClient(
+            url=OPENROUTER_URL, model=self.openrouter_model, cache=self.rewrite_cache, name="OpenRouter",
+            on_usage=self.chunk_planner.record,
+            extra_headers={"HTTP-Referer": "https://github.com/anthropics/claude-code", "X-Title": "F5-TTS Bot"}
+        )
+        self.llm_router = LLMRouter([
+            LLMProvider("deepseek", self.llm_client, lambda: os.getenv("DEEPSEEK_API_KEY")),
+            LLMProvider("openrouter", self.openrouter_client, lambda: os.getenv("OPENROUTER_API_KEY")),
+        ])
+        self.title_pipeline = TitlePipeline(self.llm_router, cache=self.rewrite_cache)
+
         # Initialize F5-TTS
         self.init_f5_tts()
         
@@ -168,7 +239,12 @@ class WorkingF5Bot:
         self.api_keys_ok = self.check_api_keys()
         # Initialize YouTube Channel Processor & Supabase
         self.supabase = SupabaseClient()
-        self.youtube_processor = YouTubeChannelProcessor()
+        # Channel URL -> ID/name/uploads playlist, so repeat channels skip search().list
+        self.channel_cache = ChannelResolutionCache(os.getenv("CHANNEL_CACHE_FILE", "channel_cache.json"))
+        # Every YouTube key with per-Pacific-day quota accounting, rotated on quotaExceeded
+        self.youtube_key_pool = YouTubeKeyPool(state_path=os.getenv("YOUTUBE_QUOTA_FILE", "youtube_quota.json"))
+        self.youtube_processor = YouTubeChannelProcessor(channel_cache=self.channel_cache,
+                                                         key_pool=self.youtube_key_pool)
         self.chunks_dir = "chunks"
         os.makedirs(self.chunks_dir, exist_ok=True)
         print("✅ YouTube channel processor and Supabase client initialized")
@@ -182,7 +258,61 @@ class WorkingF5Bot:
             self.supabase.add_chat_config("-1002343932866", "aman")
             self.supabase.add_chat_config("-1002498893774", "anu")
             print("✅ Multi-chat configuration saved to database")
+            # Optional: mirror queue job states to Supabase (tts_jobs table)
+            if os.getenv("QUEUE_MIRROR_SUPABASE", "false").lower() == "true":
+                self.processing_queue.mirror = self.supabase
+            # Optional: share LLM rewrites across instances (llm_rewrite_cache table)
+            if os.getenv("REWRITE_CACHE_SUPABASE", "false").lower() == "true":
+                self.rewrite_cache.mirror = self.supabase
+            # Optional: share transcripts across instances (youtube_transcripts table)
+            if os.getenv("TRANSCRIPT_CACHE_SUPABASE", "false").lower() == "true":
+                self.transcript_cache.mirror = self.supabase
+            # Share channel resolutions across instances (youtube_channel_handles table)
+            if os.getenv("CHANNEL_CACHE_SUPABASE", "true").lower() == "true":
+                self.channel_cache.mirror = self.supabase
         
+    @property
+    def stop_requested(self):
+        return self._stop_event.is_set()
+
+    @stop_requested.setter
+    def stop_requested(self, value):
+        if value:
+            self._stop_event.set()
+        else:
+            self._stop_event.clear()
+
+    async def reference_hash(self):
+        """SHA-256 of the reference file, re-read only when the reference changes"""
+        stat = os.stat(self.reference_audio)
+        key = (self.reference_audio, stat.st_mtime_ns, stat.st_size)
+        if self._reference_hash[0] != key:
+            self._reference_hash = (key, await asyncio.to_thread(file_hash, self.reference_audio))
+        return self._reference_hash[1]
+
+    def _has_active_work(self):
+        """Anything /stop can act on: the script queue, LLM calls or a channel run"""
+        return self.is_processing or self._llm_calls > 0 or self._channel_runs > 0
+
+    def _release_stop(self):
+        """The queue handled /stop: clear the flag unless a channel run is still unwinding from it"""
+        if not self._channel_runs:
+            self.stop_requested = False
+
+    async def cancellable(self, awaitable, label="LLM call"):
+        """
+        Await an LLM call that /stop cancels immediately (request closed, connection freed).
+        Returns: the call's result, or None if stopped
+        """
+        self._llm_calls += 1
+        try:
+            return await run_cancellable(awaitable, self._stop_event, label)
+        finally:
+            self._llm_calls -= 1
+            # Outside the queue and channel runs nothing else resets the flag: clear it once every call has unwound
+            if not self._has_active_work():
+                self.stop_requested = False
+
     async def _send_chunk_update(self, chat_id, current_chunk, total_chunks):
         """Send chunk progress update to Telegram"""
         try:
@@ -365,6 +495,9 @@ class WorkingF5Bot:
                 self.audio_quality = config.get('audio_quality', 'high')
                 self.power_policy = config.get('power_policy', 'off')
                 self.chunk_size = config.get('chunk_size', 500)
+                self.tts_batch_size = config.get('tts_batch_size', 1)
+                self.llm_streaming = config.get('llm_streaming', self.llm_streaming)
+                self.memory_policy.set_mode(config.get('memory_policy', 'balanced'))
 
                 # Load FFmpeg filter and clean it if it's a full command
                 raw_filter = config.get('ffmpeg_filter', 'afftdn=nr=12:nf=-25,highpass=f=80,lowpass=f=10000,equalizer=f=6000:t=h:width=2000:g=-6')
@@ -418,6 +551,9 @@ class WorkingF5Bot:
                 'audio_quality': self.audio_quality,
                 'power_policy': self.power_policy,
                 'chunk_size': self.chunk_size,
+                'tts_batch_size': self.tts_batch_size,
+                'llm_streaming': self.llm_streaming,
+                'memory_policy': self.memory_policy.mode,
                 'ffmpeg_filter': self.ffmpeg_filter,
                 'delivery_prefs': self.delivery_prefs_by_chat,
                 'title_prompt_1': self.title_prompt_1,
@@ -541,10 +677,17 @@ class WorkingF5Bot:
             
             await send_message(f"✅ Transcript retrieved ({len(transcript)} chars)")
 
+            # Streaming mode: LLM output is chunked as sentences complete and synthesized right away
+            if self.llm_streaming:
+                return await self._process_youtube_transcript_streaming(transcript, chat_id, context, send_message)
+
             # Step 2: Process through selected AI (DeepSeek or OpenRouter) with YouTube-specific prompt
             if self.ai_mode == "openrouter":
                 await send_message(f"🤖 Using OpenRouter AI mode...")
                 processed_script = await self.process_with_openrouter(transcript, chat_id, context, self.youtube_transcript_prompt)
+            elif self.ai_mode == "auto":
+                await send_message(f"🤖 Using Auto AI mode (fastest healthy provider)...")
+                processed_script = await self.process_with_router(transcript, chat_id, context, self.youtube_transcript_prompt)
             else:
                 await send_message(f"🤖 Using DeepSeek AI mode...")
                 processed_script = await self.process_with_deepseek(transcript, chat_id, context, self.youtube_transcript_prompt)
@@ -586,7 +729,8 @@ class WorkingF5Bot:
             
             # Step 5: Generate audio with F5-TTS
             await send_message("🎵 Generating audio...")
-            success, output_files = await self.generate_audio_f5(processed_script, chat_id)
+            async with self.gpu_lock:
+                success, output_files = await self.generate_audio_f5(processed_script, chat_id)
             
             if success:
                 await self.send_outputs_by_mode(context, chat_id, output_files, processed_script, "YouTube Audio")
@@ -872,6 +1016,7 @@ class WorkingF5Bot:
             self.reference_text = new_ref_text
             
             # Clear F5-TTS cache
+            self.reference_cache.clear()
             if hasattr(self.f5_model, '_cached_ref_audio'):
                 delattr(self.f5_model, '_cached_ref_audio')
             if hasattr(self.f5_model, '_cached_ref_text'):
@@ -918,6 +1063,14 @@ class WorkingF5Bot:
     async def get_youtube_transcript(self, url):
         """Get transcript from SupaData API using correct implementation"""
         try:
+            # Transcribed before? No Supadata call needed
+            video_id = self.youtube_processor.extract_video_id(url)
+            if video_id:
+                cached = await asyncio.to_thread(self.transcript_cache.get, video_id)
+                if cached:
+                    print(f"⚡ Transcript cache hit for {video_id} ({len(cached)} chars)")
+                    return cached
+
             api_key = os.getenv("SUPADATA_API_KEY")
             if not api_key:
                 print("❌ SUPADATA_API_KEY not set")
@@ -942,11 +1095,11 @@ class WorkingF5Bot:
             print(f"🔄 Making GET request to SupaData API...")
 
             # Use GET request with params (not POST with JSON body)
-            response = requests.get(
+            response = await http_pool.get(
                 api_url,
                 params=params,
                 headers=headers,
-                timeout=1000
+                timeout=120  # long videos come back as 202 jobs, not slow responses
             )
 
             print(f"📊 SupaData response: {response.status_code}")
@@ -963,7 +1116,10 @@ class WorkingF5Bot:
                     return None
 
                 print(f"🔄 Large file detected, polling job: {job_id}")
-                return await self._poll_supadata_job(job_id, api_key)
+                transcript = await self._poll_supadata_job(job_id, api_key)
+                if transcript and video_id:
+                    await asyncio.to_thread(self.transcript_cache.put, video_id, transcript)
+                return transcript
             elif response.status_code >= 400:
                 error_text = response.text[:200]
                 print(f"❌ SupaData error {response.status_code}: {error_text}")
@@ -984,6 +1140,8 @@ class WorkingF5Bot:
                 transcript = self._extract_transcript_text(data)
                 if transcript:
                     print(f"✅ Transcript received: {len(transcript)} characters")
+                    if video_id:
+                        await asyncio.to_thread(self.transcript_cache.put, video_id, transcript)
                     return transcript
                 else:
                     print("❌ No transcript content found in response")
@@ -1014,7 +1172,7 @@ class WorkingF5Bot:
             for endpoint in endpoints_to_try:
                 try:
                     print(f"🔄 Trying endpoint: {endpoint}")
-                    response = requests.post(
+                    response = await http_pool.post(
                         endpoint,
                         headers={
                             "Authorization": f"Bearer {api_key}",
@@ -1044,51 +1202,9 @@ class WorkingF5Bot:
             return None
 
     async def _poll_supadata_job(self, job_id, api_key):
-        """Poll for job results when SupaData returns a job ID"""
-        poll_url = f"https://api.supadata.ai/v1/transcript/{job_id}"
-        headers = {
-            "x-api-key": api_key,
-            "Accept": "application/json"
-        }
-
-        max_attempts = 60  # 5 minutes max
-        attempt = 0
-
-        while attempt < max_attempts:
-            try:
-                response = requests.get(poll_url, headers=headers, timeout=1000)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    status = data.get("status")
-
-                    if status == "completed":
-                        print("✅ Job completed successfully")
-                        transcript = self._extract_transcript_text(data)
-                        return transcript
-                    elif status == "failed":
-                        error = data.get("error", "Unknown error")
-                        print(f"❌ Job failed: {error}")
-                        return None
-                    elif status in ["queued", "active"]:
-                        print(f"🔄 Job status: {status}, waiting...")
-                        await asyncio.sleep(5)  # Wait 5 seconds
-                        attempt += 1
-                        continue
-                    else:
-                        print(f"❌ Unknown job status: {status}")
-                        return None
-                else:
-                    print(f"❌ Job status check failed: {response.status_code}")
-                    return None
-
-            except Exception as e:
-                print(f"⚠️ Poll attempt {attempt + 1} failed: {e}")
-                attempt += 1
-                await asyncio.sleep(5)
-
-        print("❌ Job polling timeout")
-        return None
+        """Wait for a SupaData job (polled with every other outstanding job by the shared job manager)"""
+        transcript, _ = await job_manager.wait(job_id, api_key, extract=self._extract_transcript_text)
+        return transcript
 
     def _extract_transcript_text(self, data):
         """Extract transcript text from SupaData response - handle both dict and list"""
@@ -1182,91 +1298,23 @@ class WorkingF5Bot:
                 print("❌ DEEPSEEK_API_KEY not set")
                 return None
             
-            # Split transcript into smaller chunks to reduce API timeouts (configurable)
-            try:
-                chunk_size = int(os.getenv("DEEPSEEK_CHUNK_SIZE", 7000))
-            except Exception:
-                chunk_size = 7000
-            chunks = self.split_text_into_chunks(transcript, chunk_size)
-            processed_chunks = []
-            
-            await context.bot.send_message(chat_id, f"🤖 Processing {len(chunks)} chunks with DeepSeek...")
-            
-            for i, chunk in enumerate(chunks):
-                await context.bot.send_message(chat_id, f"🔄 DeepSeek chunk {i+1}/{len(chunks)}")
-
-                # Robust DeepSeek API call with retries
-                try:
-                    max_retries = int(os.getenv("DEEPSEEK_MAX_RETRIES", 3))
-                except Exception:
-                    max_retries = 3
-                try:
-                    timeout_seconds = int(os.getenv("DEEPSEEK_TIMEOUT", 1000))
-                except Exception:
-                    timeout_seconds = 1000
-                try:
-                    backoff_seconds = int(os.getenv("DEEPSEEK_BACKOFF", 5))
-                except Exception:
-                    backoff_seconds = 5
-                processed_text = None
+            # Chunks sized by tokens against the model's limits and measured speed
+            chunks = self.plan_llm_chunks(transcript, [self.llm_client.model], prompt, "DEEPSEEK_CHUNK_SIZE")
 
-                for attempt in range(1, max_retries + 1):
-                    try:
-                        response = requests.post(
-                            "https://api.deepseek.com/v1/chat/completions",
-                            headers={
-                                "Authorization": f"Bearer {api_key}",
-                                "Content-Type": "application/json"
-                            },
-                            json={
-                                "model": "deepseek-chat",
-                                "messages": [
-                                    {"role": "system", "content": prompt},
-                                    {"role": "user", "content": chunk}
-                                ],
-                                "temperature": 0.7
-                            },
-                            timeout=timeout_seconds
-                        )
+            await context.bot.send_message(chat_id, f"🤖 Processing {len(chunks)} chunks with DeepSeek...")
 
-                        if response.status_code == 200:
-                            result = response.json()
-                            processed_text = result.get("choices", [{}])[0].get("message", {}).get("content", "")
-                            break
-                        elif response.status_code == 429:
-                            # Rate limited - respect Retry-After if present
-                            retry_after = response.headers.get("Retry-After")
-                            wait_time = int(retry_after) if retry_after and retry_after.isdigit() else backoff_seconds * attempt
-                            print(f"⚠️ DeepSeek rate limited (429) on chunk {i+1}, waiting {wait_time}s and retrying ({attempt}/{max_retries})")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"DeepSeek API error for chunk {i+1}: {response.status_code} - {response.text[:200]}")
-                            # Backoff and retry for server errors
-                            if 500 <= response.status_code < 600 and attempt < max_retries:
-                                await asyncio.sleep(backoff_seconds * attempt)
-                                continue
-                            break
-                    except requests.Timeout:
-                        print(f"⏱️ DeepSeek timeout on chunk {i+1}, attempt {attempt}/{max_retries}")
-                        if attempt < max_retries:
-                            await asyncio.sleep(backoff_seconds * attempt)
-                            continue
-                    except requests.RequestException as e:
-                        print(f"🌐 DeepSeek request error on chunk {i+1}, attempt {attempt}/{max_retries}: {e}")
-                        if attempt < max_retries:
-                            await asyncio.sleep(backoff_seconds * attempt)
-                            continue
-                    except Exception as e:
-                        print(f"Unexpected DeepSeek error on chunk {i+1}: {e}")
-                        break
+            async def report_progress(done, total):
+                await context.bot.send_message(chat_id, f"🔄 DeepSeek chunks done: {done}/{total}")
 
-                if processed_text is None:
-                    # Use original if API fails after retries
-                    processed_text = chunk
-                processed_chunks.append(processed_text)
-                # Small delay between chunks to avoid bursts / rate limiting
-                await asyncio.sleep(float(os.getenv("DEEPSEEK_INTER_CHUNK_SLEEP", 0.5)))
+            # All chunks rewritten concurrently (DEEPSEEK_MAX_IN_FLIGHT), results in chunk order
+            results = await self.cancellable(
+                self.llm_client.rewrite_chunks(api_key, prompt, chunks, on_chunk_done=report_progress),
+                "DeepSeek rewrite"
+            )
+            if results is None:
+                return None
+            # Use original text for any chunk that failed after retries
+            processed_chunks = [result if result is not None else chunk for result, chunk in zip(results, chunks)]
             
             return " ".join(processed_chunks)
             
@@ -1274,6 +1322,39 @@ class WorkingF5Bot:
             print(f"DeepSeek processing error: {e}")
             return None
 
+    async def process_with_router(self, transcript, chat_id, context, custom_prompt=None):
+        """Process transcript in chunks, each routed to the fastest healthy LLM provider"""
+        try:
+            prompt = custom_prompt if custom_prompt else self.youtube_transcript_prompt
+
+            if not self.llm_router.available():
+                print("❌ Neither DEEPSEEK_API_KEY nor OPENROUTER_API_KEY set")
+                return None
+
+            # Sized for the tightest model any chunk may be routed to
+            models = [provider.client.model for provider, _ in self.llm_router.available()]
+            chunks = self.plan_llm_chunks(transcript, models, prompt, "DEEPSEEK_CHUNK_SIZE")
+
+            await context.bot.send_message(chat_id, f"🤖 Processing {len(chunks)} chunks (auto provider routing)...")
+
+            async def report_progress(done, total):
+                await context.bot.send_message(chat_id, f"🔄 AI chunks done: {done}/{total}")
+
+            results = await self.cancellable(
+                self.llm_router.rewrite_chunks(prompt, chunks, on_chunk_done=report_progress),
+                "Routed rewrite"
+            )
+            if results is None:
+                return None
+            # Use original text for any chunk that failed on every provider
+            processed_chunks = [result if result is not None else chunk for result, chunk in zip(results, chunks)]
+
+            return " ".join(processed_chunks)
+
+        except Exception as e:
+            print(f"Router processing error: {e}")
+            return None
+
     async def process_with_openrouter(self, transcript, chat_id, context, custom_prompt=None):
         """Process transcript through OpenRouter API in chunks"""
         try:
@@ -1289,93 +1370,27 @@ class WorkingF5Bot:
                 await context.bot.send_message(chat_id, error_msg)
                 return None
 
-            # Split transcript into smaller chunks
-            try:
-                chunk_size = int(os.getenv("OPENROUTER_CHUNK_SIZE", 7000))
-            except Exception:
-                chunk_size = 7000
-            chunks = self.split_text_into_chunks(transcript, chunk_size)
-            processed_chunks = []
+            # Split transcript into token-sized chunks
+            chunks = self.plan_llm_chunks(transcript, [self.openrouter_model], prompt, "OPENROUTER_CHUNK_SIZE")
 
             await context.bot.send_message(chat_id, f"🤖 Processing {len(chunks)} chunks with OpenRouter...")
 
-            for i, chunk in enumerate(chunks):
-                await context.bot.send_message(chat_id, f"🔄 OpenRouter chunk {i+1}/{len(chunks)}")
-
-                # OpenRouter API call with retries
-                try:
-                    max_retries = 3
-                    timeout_seconds = 1000
-                    backoff_seconds = 5
-                except Exception:
-                    max_retries = 3
-                    timeout_seconds = 1000
-                    backoff_seconds = 5
+            async def report_progress(done, total):
+                await context.bot.send_message(chat_id, f"🔄 OpenRouter chunks done: {done}/{total}")
 
-                processed_text = None
-
-                for attempt in range(1, max_retries + 1):
-                    try:
-                        print(f"🔄 [OPENROUTER] Making API request for chunk {i+1}...")
-                        response = requests.post(
-                            "https://openrouter.ai/api/v1/chat/completions",
-                            headers={
-                                "Authorization": f"Bearer {api_key}",
-                                "Content-Type": "application/json",
-                                "HTTP-Referer": "https://github.com/anthropics/claude-code",
-                                "X-Title": "F5-TTS Bot"
-                            },
-                            json={
-                                "model": self.openrouter_model,
-                                "messages": [
-                                    {"role": "system", "content": prompt},
-                                    {"role": "user", "content": chunk}
-                                ],
-                                "temperature": 0.7
-                            },
-                            timeout=timeout_seconds
-                        )
-
-                        print(f"📊 [OPENROUTER] Response status: {response.status_code}")
-
-                        if response.status_code == 200:
-                            result = response.json()
-                            processed_text = result['choices'][0]['message']['content'].strip()
-                            print(f"✅ [OPENROUTER] Chunk {i+1} processed successfully")
-                            break
-                        elif response.status_code == 429:
-                            # Rate limited
-                            retry_after = response.headers.get("Retry-After")
-                            wait_time = int(retry_after) if retry_after and retry_after.isdigit() else backoff_seconds * attempt
-                            print(f"⚠️ [OPENROUTER] Rate limited (429) on chunk {i+1}, waiting {wait_time}s")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"❌ [OPENROUTER] API error for chunk {i+1}: {response.status_code} - {response.text[:200]}")
-                            if 500 <= response.status_code < 600 and attempt < max_retries:
-                                await asyncio.sleep(backoff_seconds * attempt)
-                                continue
-                            break
-                    except requests.Timeout:
-                        print(f"⏱️ [OPENROUTER] Timeout on chunk {i+1}, attempt {attempt}/{max_retries}")
-                        if attempt < max_retries:
-                            await asyncio.sleep(backoff_seconds * attempt)
-                            continue
-                    except requests.RequestException as e:
-                        print(f"🌐 [OPENROUTER] Request error on chunk {i+1}, attempt {attempt}/{max_retries}: {e}")
-                        if attempt < max_retries:
-                            await asyncio.sleep(backoff_seconds * attempt)
-                            continue
-                    except Exception as e:
-                        print(f"❌ [OPENROUTER] Unexpected error on chunk {i+1}: {e}")
-                        break
+            # Same client as DeepSeek (retries, 429 pauses, rewrite cache), OPENROUTER_MAX_IN_FLIGHT at once
+            results = await self.cancellable(
+                self.openrouter_client.rewrite_chunks(api_key, prompt, chunks, on_chunk_done=report_progress),
+                "OpenRouter rewrite"
+            )
+            if results is None:
+                return None
 
-                if processed_text is None:
+            processed_chunks = []
+            for i, (result, chunk) in enumerate(zip(results, chunks)):
+                if result is None:
                     print(f"⚠️ [OPENROUTER] Chunk {i+1} processing failed, using original")
-                    processed_text = chunk
-                processed_chunks.append(processed_text)
-                # Small delay between chunks
-                await asyncio.sleep(0.5)
+                processed_chunks.append(result.strip() if result is not None else chunk)
 
             return " ".join(processed_chunks)
 
@@ -1392,127 +1407,89 @@ class WorkingF5Bot:
                 return None
             
             full_prompt = f"{prompt_text}\n\nHere is the script:\n{two_sentences}"
-            
-            # Make request in a thread to allow stop checking
-            import concurrent.futures
-            
-            def make_deepseek_request():
-                try:
-                    response = requests.post(
-                        "https://api.deepseek.com/v1/chat/completions",
-                        headers={
-                            "Authorization": f"Bearer {api_key}",
-                            "Content-Type": "application/json"
-                        },
-                        json={
-                            "model": "deepseek-chat",
-                            "messages": [
-                                {"role": "user", "content": full_prompt}
-                            ],
-                            "temperature": 0.7
-                        },
-                        timeout=120
-                    )
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        return result.get("choices", [{}])[0].get("message", {}).get("content", "")
-                    else:
-                        return None
-                except Exception as e:
-                    print(f"DeepSeek request error: {e}")
-                    return None
-            
-            # Run in executor with periodic stop checks
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(make_deepseek_request)
-                
-                # Check every 0.5 seconds if stop was requested
-                while not future.done():
-                    if self.stop_requested:
-                        print("🛑 Stop requested during DeepSeek call")
-                        future.cancel()
-                        return None
-                    await asyncio.sleep(0.5)
-                
-                return future.result()
-            
+
+            # Cancelled (connection closed) the moment /stop is used
+            return await self.cancellable(
+                self.llm_client.chat(api_key, "", full_prompt, label="two-sentence prompt"),
+                "DeepSeek call"
+            )
+
         except Exception as e:
             print(f"Process two sentences error: {e}")
             return None
 
-    async def generate_title_with_deepseek(self, prompt, content, chat_id, context):
-        """Generate title using DeepSeek API with given prompt and content"""
+    async def generate_titles(self, script, chat_id, context, force=False):
+        """
+        Full title job: refine chain (prompt 1 -> 2 -> 3) and "10 more" run concurrently.
+        Returns: result dict from TitlePipeline.run, or None
+        """
         try:
-            api_key = os.getenv("DEEPSEEK_API_KEY")
-
-            # Debug logging
-            print(f"🔍 [TITLE GEN] Checking API key...")
-            print(f"🔍 [TITLE GEN] API key found: {bool(api_key)}")
-            if api_key:
-                print(f"🔍 [TITLE GEN] API key length: {len(api_key)}")
-                print(f"🔍 [TITLE GEN] API key starts with: {api_key[:10]}...")
-
-            if not api_key:
-                error_msg = "❌ DeepSeek API key not configured in .env file"
-                print(f"❌ [TITLE GEN] {error_msg}")
-                await context.bot.send_message(chat_id, error_msg)
+            if not self.llm_router.available():
+                await context.bot.send_message(chat_id, "❌ DeepSeek API key not configured in .env file")
                 return None
 
-            # Combine prompt with content
-            full_prompt = f"{prompt}\n\n{content}"
-            print(f"✅ [TITLE GEN] Full prompt length: {len(full_prompt)} chars")
+            prompts = {
+                'initial': self.title_prompt_1,
+                'refine': self.title_prompt_2,
+                'polish': self.title_prompt_3,
+                'more': self.title_prompt_10_more,
+            }
+            start = time.time()
+            result = await self.cancellable(self.title_pipeline.run(script, prompts, force=force), "Title job")
+            if not result:
+                await context.bot.send_message(chat_id, "❌ Title generation failed on every AI provider")
+                return None
 
-            # Send processing message
-            await context.bot.send_message(chat_id, "🤖 Generating title with DeepSeek AI...")
+            self.title_generation_state[chat_id] = {'stage': 'done', 'title': result['final'], 'script': script}
+            source = "⚡ cached" if result['cached'] else f"⏱️ {time.time() - start:.1f}s"
+            more = "\n".join(f"{i}. {title}" for i, title in enumerate(result['more'], 1))
+            await context.bot.send_message(
+                chat_id,
+                f"🎯 Title ({source})\n\n"
+                f"1️⃣ {result['initial'] or '-'}\n"
+                f"2️⃣ {result['refined'] or '-'}\n"
+                f"💎 {result['final'] or '-'}\n\n"
+                f"📝 More titles:\n{more or '-'}"
+            )
+            return result
 
-            # Make API call
-            try:
-                print(f"🔄 [TITLE GEN] Making API request to DeepSeek...")
-                response = requests.post(
-                    "https://api.deepseek.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "deepseek-chat",
-                        "messages": [
-                            {"role": "user", "content": full_prompt}
-                        ],
-                        "temperature": 0.7
-                    },
-                    timeout=60
-                )
+        except Exception as e:
+            print(f"❌ [TITLE GEN] Title job error: {e}")
+            await context.bot.send_message(chat_id, f"❌ Title generation error: {str(e)}")
+            return None
 
-                print(f"📊 [TITLE GEN] Response status: {response.status_code}")
+    async def titles_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/titles - titles for the replied-to script (text or .txt), else the latest saved script"""
+        try:
+            chat_id = update.effective_chat.id
+            force = bool(context.args) and context.args[0].lower() in ("new", "fresh")
+            script = None
 
-                if response.status_code == 200:
-                    result = response.json()
-                    title = result['choices'][0]['message']['content'].strip()
-                    print(f"✅ [TITLE GEN] Title generated: {title}")
-                    return title
-                else:
-                    error_msg = f"DeepSeek API error: {response.status_code} - {response.text[:200]}"
-                    print(f"❌ [TITLE GEN] {error_msg}")
-                    await context.bot.send_message(chat_id, f"❌ DeepSeek API error: {response.status_code}\n\nDetails: {response.text[:100]}")
-                    return None
+            replied_msg = update.message.reply_to_message if update.message else None
+            if replied_msg and getattr(replied_msg, 'document', None) and replied_msg.document.file_name.endswith('.txt'):
+                file = await context.bot.get_file(replied_msg.document.file_id)
+                script = (await file.download_as_bytearray()).decode('utf-8', errors='replace')
+            elif replied_msg and replied_msg.text:
+                script = replied_msg.text
+            else:
+                scripts = [os.path.join(SCRIPTS_DIR, name) for name in os.listdir(SCRIPTS_DIR) if name.endswith('.txt')]
+                if scripts:
+                    with open(max(scripts, key=os.path.getmtime), 'r', encoding='utf-8') as f:
+                        script = f.read()
 
-            except requests.Timeout:
-                error_msg = "DeepSeek request timed out"
-                print(f"⏱️ [TITLE GEN] {error_msg}")
-                await context.bot.send_message(chat_id, f"❌ {error_msg}")
-                return None
-            except Exception as e:
-                error_msg = f"DeepSeek request error: {str(e)}"
-                print(f"❌ [TITLE GEN] {error_msg}")
-                await context.bot.send_message(chat_id, f"❌ Error: {str(e)}")
-                return None
+            if not script or not script.strip():
+                await context.bot.send_message(
+                    chat_id,
+                    "❌ No script found\n\n"
+                    "💡 Reply to a script (text or .txt) with /titles\n"
+                    "Use /titles new to skip the cached result"
+                )
+                return
 
+            await context.bot.send_message(chat_id, "🎯 Generating titles...")
+            await self.generate_titles(script, chat_id, context, force=force)
         except Exception as e:
-            error_msg = f"Title generation error: {str(e)}"
-            print(f"❌ [TITLE GEN] {error_msg}")
-            return None
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=f"❌ Titles error: {str(e)}")
 
     def extract_continuation_paragraph(self, deepseek_output):
         """
@@ -2035,6 +2012,9 @@ class WorkingF5Bot:
             for k in youtube_keys:
                 status = "✅ Active" if k['is_active'] else "❌ Inactive"
                 message += f"  • {k['api_key'][:20]}... - {status}\n"
+            quota = self.youtube_key_pool.summary()
+            if quota:
+                message += f"  Quota today (Pacific):\n{quota}\n"
             message += "\n"
 
             # Supadata keys
@@ -2150,13 +2130,13 @@ class WorkingF5Bot:
         Complete pipeline to process a YouTube channel:
         1. Fetch top 1000 videos (>10min, sorted by views)
         2. Select 6 unique videos (15-day cooldown)
-        3. For each video:
-           - Get transcript
-           - Chunk at 7000 chars
-           - Process chunks with DeepSeek
-           - Generate audio with global counter
-           - Upload to Gofile
-        4. Send all audio links
+        3. Start transcript fetches for all selected videos concurrently
+        4. Run each video through pipelined stages (bounded queues in between):
+           - Await its transcript
+           - Chunk with plan_llm_chunks (token-aware sizing) + rewrite the chunks via the LLM router
+           - Generate audio with global counter (GPU, serialized)
+           - Upload to Contabo
+        5. Send all audio links
         """
         chat_id = update.effective_chat.id
 
@@ -2171,6 +2151,8 @@ class WorkingF5Bot:
             except Exception as e:
                 print(f"Error sending message: {e}")
 
+        transcript_tasks = {}
+        self._channel_runs += 1  # /stop is accepted (and stays set) until this run unwinds
         try:
             await send_message(
                 "🔍 **YouTube Channel Detected!**\n\n"
@@ -2178,11 +2160,22 @@ class WorkingF5Bot:
                 parse_mode="Markdown"
             )
 
-            # Step 1: Initialize YouTube processor with API key
+            # Step 1: Sync the pool with the active YouTube keys, so a batch can
+            # rotate keys mid-fetch instead of dying on the first quotaExceeded
+            # (and keys deactivated since the last run are no longer used)
+            if self.supabase.is_connected():
+                active_keys = [
+                    k['api_key'] for k in self.supabase.get_all_api_keys_status()
+                    if k['key_type'] == 'youtube' and k['is_active']
+                ]
+                if active_keys:
+                    self.youtube_key_pool.set_keys(active_keys)
+
+            # Initialize YouTube processor with API key
             if not self.youtube_processor.youtube:
-                # Get API key from database
+                # Get API key from the pool / database
                 if self.supabase.is_connected():
-                    yt_key = self.supabase.get_active_api_key('youtube')
+                    yt_key = self.youtube_key_pool.select() or self.supabase.get_active_api_key('youtube')
                     if yt_key:
                         self.youtube_processor.set_api_key(yt_key)
                     else:
@@ -2204,11 +2197,13 @@ class WorkingF5Bot:
             channel_id = None
             channel_name = None
             all_videos = []
+            video_count = 0
             used_cache = False
+            cached_channel = None
 
             # Try to get from database cache
             if self.supabase.is_connected():
-                cached_channel = self.supabase.get_youtube_channel(channel_url)
+                cached_channel = await asyncio.to_thread(self.supabase.get_youtube_channel, channel_url)
 
                 if cached_channel:
                     # Check if cache is recent (less than 7 days old)
@@ -2236,8 +2231,16 @@ class WorkingF5Bot:
                                 # Use cached data
                                 channel_id = cached_channel['channel_id']
                                 channel_name = cached_channel['channel_name']
-                                all_videos = cached_channel.get('videos', [])
-                                used_cache = True
+                                # None: videos live in youtube_channel_videos and are
+                                # selected there, without downloading the whole list
+                                all_videos = cached_channel.get('videos')
+                                if all_videos is None:
+                                    video_count = await asyncio.to_thread(
+                                        self.supabase.count_channel_videos, channel_id, min_duration_sec=600
+                                    )
+                                else:
+                                    video_count = len(all_videos)
+                                used_cache = video_count > 0
 
                                 cache_days = cache_age.days
                                 cache_hours = cache_age.seconds // 3600
@@ -2249,10 +2252,11 @@ class WorkingF5Bot:
                                 else:
                                     age_str = "recently"
 
-                                await send_message(
-                                    f"✅ Using cached data (updated {age_str})\n"
-                                    f"📊 {len(all_videos)} videos in cache"
-                                )
+                                if used_cache:
+                                    await send_message(
+                                        f"✅ Using cached data (updated {age_str})\n"
+                                        f"📊 {video_count} videos in cache"
+                                    )
                             else:
                                 await send_message(
                                     f"⚠️ Cache expired ({cache_age.days} days old)\n"
@@ -2267,11 +2271,42 @@ class WorkingF5Bot:
                         # If any error in parsing, fetch fresh data
                         await send_message("⚠️ Cache error, fetching fresh data...")
 
-            # Fetch fresh data if no cache or cache expired
+            # Stale cache: page only the new uploads and refresh view counts
+            known_videos = None
+            if not used_cache and cached_channel and cached_channel.get('channel_id'):
+                known_videos = cached_channel.get('videos') or await asyncio.to_thread(
+                    self.supabase.get_channel_videos, cached_channel['channel_id']
+                )
+            if known_videos:
+                await send_message("🔄 Refreshing cached channel incrementally...")
+                refreshed = await asyncio.to_thread(
+                    self.youtube_processor.refresh_channel_videos,
+                    cached_channel['channel_id'], known_videos, 10
+                )
+                if refreshed:
+                    channel_id = cached_channel['channel_id']
+                    channel_name = cached_channel.get('channel_name')
+                    all_videos = refreshed
+                    video_count = len(all_videos)
+                    used_cache = True
+                    new_count = len({v['video_id'] for v in refreshed} -
+                                    {v['video_id'] for v in known_videos})
+                    # Row-per-video upsert: keep it off the event loop
+                    await asyncio.to_thread(
+                        self.supabase.store_youtube_channel,
+                        channel_url, channel_id, channel_name, all_videos
+                    )
+                    await send_message(
+                        f"✅ Cache refreshed: {new_count} new videos, view counts updated"
+                    )
+
+            # Fetch fresh data if no cache or refresh failed
             if not used_cache:
                 await send_message("📺 Fetching channel videos from YouTube...")
 
-                channel_id, channel_name, all_videos = self.youtube_processor.get_channel_top_videos(
+                # Blocking API client: keep it off the event loop
+                channel_id, channel_name, all_videos = await asyncio.to_thread(
+                    self.youtube_processor.get_channel_top_videos,
                     channel_url, count=1000, min_duration_min=10
                 )
 
@@ -2281,10 +2316,12 @@ class WorkingF5Bot:
                         "Please check the channel URL."
                     )
                     return
+                video_count = len(all_videos)
 
                 # Store in database for future use
                 if self.supabase.is_connected():
-                    self.supabase.store_youtube_channel(
+                    await asyncio.to_thread(
+                        self.supabase.store_youtube_channel,
                         channel_url, channel_id, channel_name, all_videos
                     )
                     await send_message("💾 Channel data cached in database")
@@ -2294,22 +2331,29 @@ class WorkingF5Bot:
                 f"✅ **Channel Found:**\n"
                 f"📺 {channel_name or 'Unknown'}\n"
                 f"🆔 `{channel_id}`\n\n"
-                f"📊 Found {len(all_videos)} videos (>10 min)\n"
+                f"📊 Found {video_count} videos (>10 min)\n"
                 f"🎯 Selecting top 6 unique videos...",
                 parse_mode="Markdown"
             )
 
-            # Step 3: Get unprocessed video IDs (15-day cooldown)
-            all_video_ids = [v['video_id'] for v in all_videos]
-            unprocessed_ids = all_video_ids  # Default: all
+            if all_videos is None:
+                # Steps 3-4 as one query: >10 min, not processed in 15 days, top 6 by views
+                selected_videos = await asyncio.to_thread(
+                    self.supabase.get_top_channel_videos,
+                    channel_id, count=6, min_duration_sec=600, days=15
+                )
+            else:
+                # Step 3: Get unprocessed video IDs (15-day cooldown)
+                all_video_ids = [v['video_id'] for v in all_videos]
+                unprocessed_ids = all_video_ids  # Default: all
 
-            if self.supabase.is_connected():
-                unprocessed_ids = self.supabase.get_unprocessed_videos(all_video_ids, days=15)
+                if self.supabase.is_connected():
+                    unprocessed_ids = await asyncio.to_thread(self.supabase.get_unprocessed_videos, all_video_ids, days=15)
 
-            # Step 4: Select top 6
-            selected_videos = self.youtube_processor.select_unique_videos(
-                all_videos, unprocessed_ids, count=6
-            )
+                # Step 4: Select top 6
+                selected_videos = self.youtube_processor.select_unique_videos(
+                    all_videos, unprocessed_ids, count=6
+                )
 
             if not selected_videos:
                 await send_message(
@@ -2333,96 +2377,165 @@ class WorkingF5Bot:
                 parse_mode="Markdown"
             )
 
-            # Step 5: Process each video
+            # Step 5: Fetch all transcripts concurrently (bounded per Supadata key) so
+            # network waits overlap with DeepSeek/TTS work on earlier videos
+            transcript_tasks = {
+                video['video_id']: asyncio.create_task(self._get_transcript_with_rotation(video['url']))
+                for video in selected_videos
+            }
+
+            # Step 6: Process videos as a pipeline: transcript -> DeepSeek -> GPU -> upload.
+            # Stages are linked by bounded queues so video N+1 is rewritten while video N
+            # is on the GPU and video N-1 uploads; only the GPU stage is serialized.
             processed_count = 0
             all_audio_links = []
+            total_videos = len(selected_videos)
+            rewrite_queue = asyncio.Queue(maxsize=self.channel_pipeline_depth)
+            synth_queue = asyncio.Queue(maxsize=self.channel_pipeline_depth)
+            upload_queue = asyncio.Queue(maxsize=self.channel_pipeline_depth)
 
-            for idx, video in enumerate(selected_videos, 1):
-                video_id = video['video_id']
-                video_url = video['url']
-                video_title = video['title']
-
+            async def fetch_stage():
                 try:
-                    await send_message(
-                        f"📹 **Video {idx}/6**\n"
-                        f"🎬 {video_title[:60]}...\n"
-                        f"🆔 Video ID: `{video_id}`\n"
-                        f"👁️ Views: {video['view_count']:,}\n\n"
-                        f"🔄 Processing...",
-                        parse_mode="Markdown"
-                    )
-
-                    # Step 5a: Get transcript
-                    transcript, key_exhausted = await self._get_transcript_with_rotation(video_url)
-
-                    if not transcript:
-                        await send_message(f"❌ Video {idx}: Transcript fetch failed. Skipping...")
-                        continue
-
-                    await send_message(
-                        f"✅ Video {idx}: Transcript received ({len(transcript)} chars)"
-                    )
+                    for idx, video in enumerate(selected_videos, 1):
+                        video_id = video['video_id']
+                        if self.stop_requested:
+                            await send_message(f"🛑 Stop requested - not starting videos {idx}-{total_videos}")
+                            break
+                        try:
+                            await send_message(
+                                f"📹 **Video {idx}/{total_videos}**\n"
+                                f"🎬 {video['title'][:60]}...\n"
+                                f"🆔 Video ID: `{video_id}`\n"
+                                f"👁️ Views: {video['view_count']:,}\n\n"
+                                f"🔄 Processing...",
+                                parse_mode="Markdown"
+                            )
 
-                    # Step 5b: Chunk transcript
-                    chunks = self.youtube_processor.chunk_text_at_fullstop(transcript, max_chars=7000)
-                    await send_message(
-                        f"📦 Video {idx}: Split into {len(chunks)} chunks"
-                    )
+                            # Step 6a: Get transcript (already in flight)
+                            transcript, key_exhausted = await transcript_tasks[video_id]
 
-                    # Step 5c: Process chunks with DeepSeek
-                    processed_chunks = await self._process_chunks_with_deepseek(
-                        chunks, video_id, chat_id, update, context, idx, len(selected_videos)
-                    )
+                            if not transcript:
+                                await send_message(f"❌ Video {idx}: Transcript fetch failed. Skipping...")
+                                continue
 
-                    if not processed_chunks:
-                        await send_message(f"❌ Video {idx}: DeepSeek processing failed. Skipping...")
-                        continue
+                            await send_message(
+                                f"✅ Video {idx}: Transcript received ({len(transcript)} chars)"
+                            )
+                            await rewrite_queue.put((idx, video, transcript))
+                        except Exception as e:
+                            print(f"Error fetching video {idx}: {e}")
+                            await send_message(f"❌ Video {idx}: Error - {str(e)[:100]}\nContinuing with next video...")
+                finally:
+                    await rewrite_queue.put(None)
 
-                    # Step 5d: Merge chunks
-                    merged_script = "\n\n".join(processed_chunks)
+            async def rewrite_stage():
+                try:
+                    while (item := await rewrite_queue.get()) is not None:
+                        idx, video, transcript = item
+                        video_id = video['video_id']
+                        if self.stop_requested:
+                            continue  # drain the queue so the fetch stage never blocks
+                        try:
+                            # Step 6b: Chunk transcript (token-aware, for any model the router may pick)
+                            chunks = self.plan_llm_chunks(
+                                transcript,
+                                [provider.client.model for provider, _ in self.llm_router.available()] or [self.llm_client.model],
+                                split_fn=self.youtube_processor.chunk_text_at_fullstop
+                            )
+                            await send_message(
+                                f"📦 Video {idx}: Split into {len(chunks)} chunks"
+                            )
 
-                    # Save merged script
-                    self.youtube_processor.save_merged_script(merged_script, video_id, self.chunks_dir)
+                            # Step 6c: Process chunks with DeepSeek
+                            processed_chunks = await self._process_chunks_with_deepseek(
+                                chunks, video_id, chat_id, update, context, idx, total_videos
+                            )
 
-                    await send_message(
-                        f"✅ Video {idx}: Script processed ({len(merged_script)} chars)\n"
-                        f"🎵 Generating audio..."
-                    )
+                            if not processed_chunks:
+                                await send_message(f"❌ Video {idx}: DeepSeek processing failed. Skipping...")
+                                continue
 
-                    # Step 5e: Generate audio with global counter
-                    audio_links = await self._generate_audio_with_counter(
-                        merged_script, video_id, chat_id, update, context
-                    )
+                            # Step 6d: Merge chunks
+                            merged_script = "\n\n".join(processed_chunks)
 
-                    if audio_links:
-                        all_audio_links.extend(audio_links)
-                        processed_count += 1
+                            # Save merged script
+                            self.youtube_processor.save_merged_script(merged_script, video_id, self.chunks_dir)
 
-                        # Mark video as processed in database
-                        if self.supabase.is_connected():
-                            counter = self.supabase.get_counter()
-                            self.supabase.mark_video_processed(
-                                video_id, video_url, channel_id, str(chat_id), counter
+                            await send_message(
+                                f"✅ Video {idx}: Script processed ({len(merged_script)} chars)\n"
+                                f"🎵 Queued for audio generation..."
                             )
+                            await synth_queue.put((idx, video, merged_script))
+                        except Exception as e:
+                            print(f"Error rewriting video {idx}: {e}")
+                            await send_message(f"❌ Video {idx}: Error - {str(e)[:100]}\nContinuing with next video...")
+                finally:
+                    await synth_queue.put(None)
 
-                        await send_message(
-                            f"✅ **Video {idx}/{len(selected_videos)} complete!**\n"
-                            f"🆔 Video ID: `{video_id}`\n"
-                            f"📊 Progress: {processed_count}/{len(selected_videos)} successful",
-                            parse_mode="Markdown"
-                        )
-                    else:
-                        await send_message(f"❌ Video {idx}: Audio generation failed. Skipping...")
+            async def synth_stage():
+                try:
+                    while (item := await synth_queue.get()) is not None:
+                        idx, video, merged_script = item
+                        if self.stop_requested:
+                            continue
+                        try:
+                            # Step 6e: Generate audio with global counter (one script on the GPU at a time)
+                            async with self.gpu_lock:
+                                counter, raw_output = await self._synthesize_with_counter(
+                                    merged_script, video['video_id'], chat_id, update, context
+                                )
+                            if raw_output:
+                                await upload_queue.put((idx, video, counter, raw_output))
+                            else:
+                                await send_message(f"❌ Video {idx}: Audio generation failed. Skipping...")
+                        except Exception as e:
+                            print(f"Error synthesizing video {idx}: {e}")
+                            await send_message(f"❌ Video {idx}: Error - {str(e)[:100]}\nContinuing with next video...")
+                finally:
+                    await upload_queue.put(None)
+
+            async def upload_stage():
+                nonlocal processed_count
+                while (item := await upload_queue.get()) is not None:
+                    idx, video, counter, raw_output = item
+                    video_id = video['video_id']
+                    try:
+                        # Step 6f: Upload (finished audio is still uploaded after /stop)
+                        audio_links = await self._upload_counter_audio(raw_output, chat_id, update, context)
+
+                        if audio_links:
+                            all_audio_links.extend(audio_links)
+                            processed_count += 1
+
+                            # Mark video as processed in database
+                            if self.supabase.is_connected():
+                                await asyncio.to_thread(
+                                    self.supabase.mark_video_processed,
+                                    video_id, video['url'], channel_id, str(chat_id), counter
+                                )
 
-                except Exception as e:
-                    print(f"Error processing video {idx}: {e}")
-                    await send_message(
-                        f"❌ Video {idx}: Error - {str(e)[:100]}\n"
-                        f"Continuing with next video..."
-                    )
-                    continue
+                            await send_message(
+                                f"✅ **Video {idx}/{total_videos} complete!**\n"
+                                f"🆔 Video ID: `{video_id}`\n"
+                                f"📊 Progress: {processed_count}/{total_videos} successful",
+                                parse_mode="Markdown"
+                            )
+                        else:
+                            await send_message(f"❌ Video {idx}: Upload failed. Skipping...")
+                    except Exception as e:
+                        print(f"Error uploading video {idx}: {e}")
+                        await send_message(f"❌ Video {idx}: Upload error - {str(e)[:100]}\nContinuing with next video...")
 
-            # Step 6: Final summary
+            stages = [asyncio.create_task(stage()) for stage in (fetch_stage, rewrite_stage, synth_stage, upload_stage)]
+            try:
+                await asyncio.gather(*stages)
+            finally:
+                for stage in stages:
+                    stage.cancel()
+                # Let cancelled stages unwind (GPU job, uploads) before the run counts as finished
+                await asyncio.gather(*stages, return_exceptions=True)
+
+            # Step 7: Final summary
             if processed_count > 0:
                 # Save enhanced audio links to database
                 # Links come in pairs: [raw, enhanced, raw, enhanced, ...]
@@ -2470,12 +2583,27 @@ class WorkingF5Bot:
             error_msg = f"❌ Channel processing error: {str(e)}"
             print(error_msg)
             await send_message(error_msg[:500])
+        finally:
+            for task in transcript_tasks.values():
+                task.cancel()
+            self.youtube_key_pool.flush()
+            self._channel_runs -= 1
+            if not self._has_active_work():
+                self.stop_requested = False
 
     async def _get_transcript_with_rotation(self, video_url: str) -> tuple:
         """
         Get transcript with automatic Supadata key rotation on exhaustion.
         Returns: (transcript_text, key_exhausted)
         """
+        # Transcribed before (cooldown re-run, retry after a TTS failure)? Skip Supadata
+        video_id = self.youtube_processor.extract_video_id(video_url)
+        if video_id:
+            cached = await asyncio.to_thread(self.transcript_cache.get, video_id)
+            if cached:
+                print(f"⚡ Transcript cache hit for {video_id} ({len(cached)} chars)")
+                return cached, False
+
         max_attempts = 5  # Try up to 5 different keys
 
         for attempt in range(max_attempts):
@@ -2490,10 +2618,19 @@ class WorkingF5Bot:
                 print("❌ No Supadata API key available")
                 return None, False
 
-            # Try to get transcript
-            transcript, key_exhausted = await get_youtube_transcript(video_url, api_key)
+            # Try to get transcript (at most transcript_concurrency_per_key requests per key in flight)
+            slot = self._supadata_slots.setdefault(
+                api_key, asyncio.Semaphore(self.transcript_concurrency_per_key)
+            )
+            async with slot:
+                transcript, key_exhausted, job_id = await request_transcript(video_url, api_key)
+            # Long videos become async jobs: polled by the shared job manager, outside the key slot
+            if job_id:
+                transcript, key_exhausted = await job_manager.wait(job_id, api_key)
 
             if transcript:
+                if video_id:
+                    await asyncio.to_thread(self.transcript_cache.put, video_id, transcript)
                 return transcript, False
 
             if key_exhausted:
@@ -2533,8 +2670,8 @@ class WorkingF5Bot:
         if not deepseek_key:
             deepseek_key = os.getenv("DEEPSEEK_API_KEY")
 
-        if not deepseek_key:
-            print("❌ No DeepSeek API key available")
+        if not self.llm_router.available({"deepseek": deepseek_key}):
+            print("❌ No DeepSeek / OpenRouter API key available")
             return []
 
         # Get custom prompt if available
@@ -2544,32 +2681,31 @@ class WorkingF5Bot:
         if not prompt:
             prompt = "Rewrite this content to be more engaging and natural for text-to-speech audio:"
 
-        processed_chunks = []
-
         # Save original chunks
         self.youtube_processor.save_chunks_to_disk(chunks, video_id, self.chunks_dir)
 
-        for chunk_idx, chunk in enumerate(chunks, 1):
-            try:
-                await send_msg(
-                    f"🤖 Video {video_idx}: Processing chunk {chunk_idx}/{len(chunks)}..."
-                )
+        await send_msg(f"🤖 Video {video_idx}: Processing {len(chunks)} chunks with DeepSeek...")
 
-                # Process with DeepSeek (use existing method from bot)
-                processed = await self.process_with_deepseek(
-                    chunk, chat_id, context, custom_prompt=prompt
-                )
+        async def report_progress(done, total):
+            await send_msg(f"🤖 Video {video_idx}: Chunk {done}/{total} processed")
 
-                if processed:
-                    processed_chunks.append(processed)
-                else:
-                    # Fallback to original chunk
-                    processed_chunks.append(chunk)
+        # All chunks rewritten concurrently, each on the fastest healthy provider
+        # (slow requests hedged to the other one); results come back in chunk order
+        try:
+            results = await self.cancellable(
+                self.llm_router.rewrite_chunks(
+                    prompt, chunks, on_chunk_done=report_progress, api_keys={"deepseek": deepseek_key}
+                ),
+                f"Video {video_idx} rewrite"
+            )
+            if results is None:
+                return []
+        except Exception as e:
+            print(f"Error processing chunks: {e}")
+            results = [None] * len(chunks)
 
-            except Exception as e:
-                print(f"Error processing chunk {chunk_idx}: {e}")
-                # Fallback to original chunk
-                processed_chunks.append(chunk)
+        # Fallback to original chunk wherever DeepSeek failed
+        processed_chunks = [result if result else chunk for result, chunk in zip(results, chunks)]
 
         return processed_chunks
 
@@ -2579,6 +2715,17 @@ class WorkingF5Bot:
         Generate audio using F5-TTS with global counter-based naming.
         Returns list of Gofile links.
         """
+        counter, raw_output = await self._synthesize_with_counter(script, video_id, chat_id, update, context)
+        if not raw_output:
+            return []
+        return await self._upload_counter_audio(raw_output, chat_id, update, context)
+
+    async def _synthesize_with_counter(self, script: str, video_id: str, chat_id: int,
+                                       update: Update, context: ContextTypes.DEFAULT_TYPE) -> tuple:
+        """
+        GPU stage: synthesize script to <counter>_raw.wav and create the enhanced version.
+        Returns: (counter, raw_output_path) or (None, None) on failure
+        """
         # Helper to send messages (works for both channels and direct messages)
         async def send_msg(text, parse_mode=None):
             try:
@@ -2615,7 +2762,7 @@ class WorkingF5Bot:
             if not success:
                 error_msg = result if isinstance(result, str) else "Unknown error"
                 await send_msg(f"❌ Audio generation failed: {error_msg}")
-                return []
+                return None, None
 
             # result contains list of output files from generate_audio_f5
             # Move/rename the first file to our counter-based naming
@@ -2630,7 +2777,7 @@ class WorkingF5Bot:
             # Apply filters for enhanced version
             await send_msg(f"🎛️ Creating enhanced version...")
 
-            # Create enhanced version using FFmpeg
+            # Create enhanced version using FFmpeg (off the event loop)
             try:
                 import subprocess
                 ffmpeg_enhance_cmd = [
@@ -2638,7 +2785,7 @@ class WorkingF5Bot:
                     '-af', self.ffmpeg_filter,
                     '-y', enhanced_output
                 ]
-                subprocess.run(ffmpeg_enhance_cmd, capture_output=True, check=True, timeout=60)
+                await asyncio.to_thread(subprocess.run, ffmpeg_enhance_cmd, capture_output=True, check=True, timeout=60)
                 print(f"✅ Enhanced audio created: {enhanced_output}")
             except Exception as e:
                 print(f"⚠️ Enhanced audio creation failed: {e}")
@@ -2648,9 +2795,34 @@ class WorkingF5Bot:
                     shutil.copy(raw_output, enhanced_output)
                     print(f"✅ Using raw audio as enhanced (fallback)")
 
-            # Upload only RAW file to Gofile and Contabo
-            links = []
+            return counter, raw_output
+
+        except Exception as e:
+            error = f"Error generating audio: {str(e)}"
+            print(f"❌ {error}")
+            import traceback
+            traceback.print_exc()
+            await send_msg(f"❌ {error}")
+            return None, None
+
+    async def _upload_counter_audio(self, raw_output: str, chat_id: int,
+                                    update: Update, context: ContextTypes.DEFAULT_TYPE) -> list:
+        """
+        Upload stage: upload only the RAW file to Contabo.
+        Returns list of links.
+        """
+        # Helper to send messages (works for both channels and direct messages)
+        async def send_msg(text, parse_mode=None):
+            try:
+                if update.message:
+                    await update.message.reply_text(text, parse_mode=parse_mode)
+                else:
+                    await context.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+            except Exception as e:
+                print(f"Error sending message: {e}")
 
+        links = []
+        try:
             if os.path.exists(raw_output):
                 filename = os.path.basename(raw_output)
                 size_mb = os.path.getsize(raw_output) // (1024 * 1024)
@@ -2669,16 +2841,12 @@ class WorkingF5Bot:
             else:
                 print(f"❌ Raw file not found: {raw_output}")
                 await send_msg(f"❌ Raw file not found")
-
-            return links
-
         except Exception as e:
-            error = f"Error generating audio: {str(e)}"
+            error = f"Error uploading audio: {str(e)}"
             print(f"❌ {error}")
-            import traceback
-            traceback.print_exc()
             await send_msg(f"❌ {error}")
-            return []
+
+        return links
 
     async def _generate_f5_audio(self, text: str, output_path: str, chat_id: int, context: ContextTypes.DEFAULT_TYPE) -> tuple:
         """
@@ -2697,75 +2865,74 @@ class WorkingF5Bot:
             chunks = self.split_text_into_chunks(text, self.chunk_size)
             print(f"📊 Split into {len(chunks)} chunks")
 
-            # Generate audio for each chunk
-            audio_segments = []
+            # Reference clip/transcript/mel prepared once and reused for every chunk
+            conditioning = await self.tts_worker.run(
+                self.reference_cache.get, self.f5_model, self.reference_audio, target_rms=0.1,
+                ref_hash=await self.reference_hash()
+            )
 
-            for i, chunk in enumerate(chunks):
-                if self.stop_requested:
-                    error = f"Stop requested during chunk {i+1}/{len(chunks)}"
-                    print(f"🛑 {error}")
-                    return False, error
-
-                print(f"📄 Processing chunk {i+1}/{len(chunks)}")
-
-                # Clear CUDA memory
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-
-                # F5-TTS inference (same as existing method)
-                with torch.inference_mode():
-                    result = self.f5_model.infer(
-                        ref_file=self.reference_audio,
-                        ref_text="",  # Auto-extract
-                        gen_text=chunk,
-                        remove_silence=True,
-                        cross_fade_duration=0.15,
+            if self.stop_requested:
+                error = f"Stop requested during chunk 1/{len(chunks)}"
+                print(f"🛑 {error}")
+                return False, error
+
+            # Generate audio for each chunk (packed into padded batches when tts_batch_size > 1)
+            # Chunks finished by an earlier (failed/stopped) attempt are loaded from disk
+            checkpoints = ChunkCheckpoints(self.checkpoint_dir, text, conditioning.ref_hash,
+                                           speed=self.audio_speed, nfe_step=32, cfg_strength=1.5)
+            resumed = checkpoints.count(chunks)
+            if resumed:
+                print(f"♻️ Resuming from checkpoint: {resumed}/{len(chunks)} chunks already done")
+
+            # Synthesis runs on the TTS worker thread; the event loop stays free for Telegram
+            job = self.tts_worker.submit(
+                lambda: iter_checkpointed_chunks(
+                    checkpoints,
+                    chunks,
+                    lambda missing: iter_synthesized_chunks(
+                        self.f5_model,
+                        conditioning,
+                        missing,
+                        batch_size=self.tts_batch_size,
+                        max_batch_frames=self.tts_batch_max_frames,
                         speed=self.audio_speed,
                         nfe_step=32,
                         cfg_strength=1.5,
-                        target_rms=0.1
+                        cross_fade_duration=0.15
                     )
+                ),
+                total=len(chunks),
+                # Flush CUDA cache / gc only when the memory policy asks for it, on the
+                # worker thread between chunks (never from the event loop mid-inference)
+                after_item=lambda item: self.memory_policy.after_chunk(item[0])
+            )
 
-                # Extract audio data
-                if isinstance(result, tuple):
-                    audio_data = result[0]
-                else:
-                    audio_data = result
-
-                # Move to CPU
-                if torch.is_tensor(audio_data):
-                    audio_data = audio_data.cpu()
-
-                audio_segments.append(audio_data)
-
-                # Cleanup
-                del result
-                import gc
-                gc.collect()
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
+            # Each chunk is appended to the output file as soon as it is ready
+            print(f"💾 Streaming audio to {output_path}...")
+            writer = StreamingWavWriter(output_path, sample_rate=24000, cross_fade_duration=0.15)
 
-            print("🔗 Combining audio segments...")
+            async def on_chunk(item):
+                i, audio_data = item
+                print(f"📄 Chunk {i+1}/{len(chunks)} done")
+                writer.append(audio_data)
+                if self.stop_requested and i + 1 < len(chunks):
+                    print(f"🛑 Stop requested during chunk {i+2}/{len(chunks)}")
+                    return False
+                return True
 
-            # Concatenate all segments
-            if torch.is_tensor(audio_segments[0]):
-                final_audio = torch.cat(audio_segments, dim=-1).cpu()
-            else:
-                import numpy as np
-                final_audio = np.concatenate(audio_segments)
-
-            # Save to provided output path
-            print(f"💾 Saving audio to {output_path}...")
-            if torch.is_tensor(final_audio):
-                if final_audio.dim() == 1:
-                    final_audio = final_audio.unsqueeze(0)
-                import torchaudio
-                torchaudio.save(output_path, final_audio, 24000)
-            else:
-                import soundfile as sf
-                sf.write(output_path, final_audio, 24000)
+            try:
+                # Worker stops at the next batch boundary if we leave early
+                completed = await job.drain(on_chunk)
+            finally:
+                writer.close()
+
+            if not completed or writer.chunks_written != len(chunks):
+                error = f"Stopped after {writer.chunks_written}/{len(chunks)} chunks"
+                print(f"🛑 {error}")
+                return False, error
 
-            print(f"✅ Audio saved successfully")
+            checkpoints.clear()
+            print(f"✅ Audio saved successfully ({writer.duration:.1f}s)")
             return True, None
 
         except Exception as e:
@@ -2863,6 +3030,7 @@ class WorkingF5Bot:
             if context.args:
                 new_model = " ".join(context.args)
                 self.openrouter_model = new_model
+                self.openrouter_client.model = new_model
 
                 # Save configuration to file
                 self.save_config()
@@ -2989,6 +3157,108 @@ class WorkingF5Bot:
         except Exception as e:
             await context.bot.send_message(chat_id=update.effective_chat.id, text=f"❌ Chunk size update error: {str(e)}")
 
+    async def set_batch_size_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Change how many TTS chunks are packed into one F5-TTS forward pass"""
+        try:
+            chat_id = update.effective_chat.id
+
+            if context.args:
+                try:
+                    new_size = int(context.args[0])
+
+                    if new_size < 1 or new_size > 16:
+                        response = (
+                            "❌ Invalid batch size!\n\n"
+                            "Must be between 1 and 16.\n\n"
+                            "Recommended values:\n"
+                            "• 1 (default) - Sequential, lowest VRAM\n"
+                            "• 4 - RTX 3090/4080\n"
+                            "• 8 - RTX 4090 (24 GB)"
+                        )
+                        await context.bot.send_message(chat_id=chat_id, text=response)
+                        return
+
+                    old_size = self.tts_batch_size
+                    self.tts_batch_size = new_size
+
+                    # Save configuration to file
+                    self.save_config()
+
+                    response = (
+                        f"✅ TTS batch size updated and saved!\n\n"
+                        f"📊 Old: {old_size}\n"
+                        f"📊 New: {new_size}\n\n"
+                        f"💾 VRAM budget: {self.tts_batch_max_frames} mel frames per batch\n"
+                        f"(set F5_BATCH_MAX_FRAMES to change)"
+                    )
+                    await context.bot.send_message(chat_id=chat_id, text=response)
+                except ValueError:
+                    await context.bot.send_message(chat_id=chat_id, text="❌ Please provide a valid number!\n\nExample: /set_batch_size 4")
+            else:
+                response = (
+                    f"📊 Current TTS batch size: {self.tts_batch_size}\n"
+                    f"💾 VRAM budget: {self.tts_batch_max_frames} mel frames per batch\n\n"
+                    f"💡 Usage: /set_batch_size <number>\n\n"
+                    f"Examples:\n"
+                    f"• /set_batch_size 1 (sequential)\n"
+                    f"• /set_batch_size 8 (RTX 4090)"
+                )
+                await context.bot.send_message(chat_id=chat_id, text=response)
+        except Exception as e:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=f"❌ Batch size update error: {str(e)}")
+
+    async def llm_stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Show per-provider LLM latency / error stats from the router"""
+        try:
+            response = (
+                f"📊 LLM providers (ai_mode: {self.ai_mode})\n\n"
+                f"{self.llm_router.summary()}\n\n"
+                f"🏁 Hedging: {'ON' if self.llm_router.hedge else 'OFF'}"
+            )
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=response)
+        except Exception as e:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=f"❌ LLM stats error: {str(e)}")
+
+    async def ai_mode_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Select the LLM backend for YouTube transcripts: deepseek, openrouter or auto"""
+        try:
+            chat_id = update.effective_chat.id
+
+            if context.args and context.args[0].lower() in AI_MODES:
+                self.ai_mode = context.args[0].lower()
+                self.save_config()
+                response = f"✅ AI mode: {self.ai_mode}"
+            else:
+                response = (
+                    f"🤖 AI mode: {self.ai_mode}\n\n"
+                    f"💡 Usage: /ai_mode {'|'.join(AI_MODES)}"
+                )
+            await context.bot.send_message(chat_id=chat_id, text=response)
+        except Exception as e:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=f"❌ AI mode error: {str(e)}")
+
+    async def llm_streaming_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Toggle streaming LLM -> TTS mode for YouTube links"""
+        try:
+            chat_id = update.effective_chat.id
+
+            if context.args and context.args[0].lower() in ("on", "off"):
+                self.llm_streaming = context.args[0].lower() == "on"
+                self.save_config()
+                state = "ON ⚡" if self.llm_streaming else "OFF"
+                response = (
+                    f"✅ LLM streaming: {state}\n\n"
+                    f"YouTube links will {'start synthesis on the first streamed sentences' if self.llm_streaming else 'wait for the full rewritten script'}."
+                )
+            else:
+                response = (
+                    f"📊 LLM streaming: {'ON ⚡' if self.llm_streaming else 'OFF'}\n\n"
+                    f"💡 Usage: /llm_streaming on|off"
+                )
+            await context.bot.send_message(chat_id=chat_id, text=response)
+        except Exception as e:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=f"❌ LLM streaming toggle error: {str(e)}")
+
     def _extract_ffmpeg_filter(self, raw_input):
         """Extract filter string from FFmpeg command or return as-is if already a filter"""
         try:
@@ -3313,6 +3583,7 @@ class WorkingF5Bot:
             self.reference_text = new_ref_text
 
             # Clear any cached reference data to prevent conflicts
+            self.reference_cache.clear()
             if hasattr(self.f5_model, '_cached_ref_audio'):
                 delattr(self.f5_model, '_cached_ref_audio')
             if hasattr(self.f5_model, '_cached_ref_text'):
@@ -3650,6 +3921,7 @@ class WorkingF5Bot:
             keyboard = [
                 [InlineKeyboardButton(f"⚡ Speed: {self.audio_speed}x", callback_data="settings:speed")],
                 [InlineKeyboardButton(f"🔧 Quality: {self.audio_quality}", callback_data="settings:quality")],
+                [InlineKeyboardButton(f"🧠 GPU Memory: {self.memory_policy.mode}", callback_data="settings:memory")],
                 [InlineKeyboardButton("🎚️ FFmpeg Filter", callback_data="settings:ffmpeg")],
                 [InlineKeyboardButton("🔙 Back to Settings", callback_data="main:settings")]
             ]
@@ -3659,6 +3931,38 @@ class WorkingF5Bot:
                 reply_markup=InlineKeyboardMarkup(keyboard)
             )
 
+        elif data == "settings:memory":
+            def mark(mode, label):
+                return f"✓ {label}" if self.memory_policy.mode == mode else label
+
+            keyboard = [
+                [InlineKeyboardButton(mark("aggressive", "Aggressive (lowest VRAM)"), callback_data="settings:memory_set:aggressive")],
+                [InlineKeyboardButton(mark("balanced", "Balanced (default)"), callback_data="settings:memory_set:balanced")],
+                [InlineKeyboardButton(mark("throughput", "Throughput (fastest)"), callback_data="settings:memory_set:throughput")],
+                [InlineKeyboardButton("🔙 Back", callback_data="settings:audio_menu")]
+            ]
+            free_pct = int(MemoryPolicy.free_vram_fraction() * 100)
+            await q.edit_message_text(
+                f"🧠 GPU Memory Policy\n\n"
+                f"Current: {self.memory_policy.mode}\n"
+                f"Free VRAM now: {free_pct}%\n\n"
+                f"• Aggressive: flush CUDA cache + gc after every chunk\n"
+                f"• Balanced: flush when free VRAM < 20%\n"
+                f"• Throughput: flush only when free VRAM < 5%",
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+
+        elif data.startswith("settings:memory_set:"):
+            mode = data.split(":", 2)[2]
+            if not self.memory_policy.set_mode(mode):
+                await q.message.reply_text("⚠️ Invalid memory policy.")
+                return
+            self.save_config()
+            await q.edit_message_text(
+                f"✅ GPU memory policy set to {mode} and saved!",
+                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back", callback_data="settings:audio_menu")]])
+            )
+
         elif data == "settings:ffmpeg":
             await q.edit_message_text(
                 f"🎚️ FFmpeg Audio Filter\n\n"
@@ -3714,12 +4018,36 @@ class WorkingF5Bot:
                 reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back", callback_data="main:settings")]])
             )
 
-        # 3C. AI MODE TOGGLE (Disabled)
+        # 3C. AI MODE SELECTOR
         elif data == "settings:toggle_ai_mode":
+            def mark(mode, label):
+                return f"✓ {label}" if self.ai_mode == mode else label
+
+            keyboard = [
+                [InlineKeyboardButton(mark("deepseek", "DeepSeek (direct)"), callback_data="settings:ai_mode_set:deepseek")],
+                [InlineKeyboardButton(mark("openrouter", "OpenRouter"), callback_data="settings:ai_mode_set:openrouter")],
+                [InlineKeyboardButton(mark("auto", "Auto (fastest healthy provider)"), callback_data="settings:ai_mode_set:auto")],
+                [InlineKeyboardButton("🔙 Back to Pipeline", callback_data="settings:pipeline_menu")]
+            ]
             await q.edit_message_text(
-                "ℹ️ AI Mode Feature Disabled\n\n"
-                "YouTube links now automatically process as Reference Audio only.",
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back to Settings", callback_data="main:settings")]])
+                f"🤖 AI Mode\n\n"
+                f"Current: {self.ai_mode}\n\n"
+                f"• DeepSeek: always the DeepSeek API\n"
+                f"• OpenRouter: always OpenRouter ({self.openrouter_model})\n"
+                f"• Auto: latency-aware router with hedging and failover (/llm_stats)",
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+
+        elif data.startswith("settings:ai_mode_set:"):
+            mode = data.split(":", 2)[2]
+            if mode not in AI_MODES:
+                await q.message.reply_text("⚠️ Invalid AI mode.")
+                return
+            self.ai_mode = mode
+            self.save_config()
+            await q.edit_message_text(
+                f"✅ AI mode set to {mode} and saved!",
+                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back", callback_data="settings:toggle_ai_mode")]])
             )
 
         # 3D. OPENROUTER MODEL SETTINGS
@@ -3817,11 +4145,12 @@ class WorkingF5Bot:
             )
 
         elif data == "settings:stop_processing":
-            if not self.is_processing:
+            if not self._has_active_work():
                 await q.answer("⚠️ No processing currently running", show_alert=True)
                 return
 
             self.stop_requested = True
+            self.tts_worker.cancel_current()
             await q.edit_message_text(
                 "🛑 STOP REQUESTED!\n\n"
                 "⏳ Stopping current operation...\n"
@@ -3873,6 +4202,7 @@ class WorkingF5Bot:
                 [InlineKeyboardButton("📝 Transcript", callback_data="pipeline:transcript")],
                 [InlineKeyboardButton("🎯 Title Creation", callback_data="pipeline:title")],
                 [InlineKeyboardButton("🖼️ Image Creation", callback_data="pipeline:image")],
+                [InlineKeyboardButton(f"🤖 AI Mode: {self.ai_mode}", callback_data="settings:toggle_ai_mode")],
                 [InlineKeyboardButton("🔙 Back to Settings", callback_data="main:settings")]
             ]
             await q.edit_message_text(
@@ -4612,7 +4942,7 @@ class WorkingF5Bot:
             print(f"✅ Batch timer completed! Starting processing of {queue_count} files...")
 
             # Create detailed queue summary
-            file_list = "\n".join([f"  {i+1}. {item['filename']}" for i, item in enumerate(self.processing_queue[:10])])
+            file_list = "\n".join([f"  {i+1}. {item['filename']}" for i, item in enumerate(self.processing_queue.peek(10))])
             if queue_count > 10:
                 file_list += f"\n  ... and {queue_count - 10} more files"
 
@@ -4673,8 +5003,9 @@ class WorkingF5Bot:
             return
 
         self.is_processing = True
-        self.stop_requested = False  # Reset stop flag
+        self._release_stop()  # Reset stop flag
         print("📄 Queue processing started...")
+        job_id = None
 
         try:
             while self.processing_queue:
@@ -4689,10 +5020,13 @@ class WorkingF5Bot:
                     )
                     # Clear queue
                     self.processing_queue.clear()
-                    self.stop_requested = False
+                    self._release_stop()
                     break
                 
-                queue_item = self.processing_queue.pop(0)
+                queue_item = self.processing_queue.pop_next()
+                if not queue_item:
+                    break
+                job_id = queue_item['job_id']
                 script_text = queue_item['script']
                 filename = queue_item['filename']
                 item_chat_id = queue_item.get('chat_id', CHAT_ID)  # Get chat ID from queue item
@@ -4725,15 +5059,17 @@ class WorkingF5Bot:
                         chat_id=actual_chat_id,
                         text=f"🛑 Stopped before generating: {filename}"
                     )
+                    self.processing_queue.mark_failed(job_id, "stopped by user")
                     self.processing_queue.clear()
-                    self.stop_requested = False
+                    self._release_stop()
                     break
                 
                 # Store chat ID for chunk updates
                 self._current_chat_id = actual_chat_id
                 # Audio generate kariye (pass chat id and script name)
                 script_name = filename.replace('.txt', '') if filename else None
-                success, output_files = await self.generate_audio_f5(script_text, actual_chat_id, script_name=script_name)
+                async with self.gpu_lock:
+                    success, output_files = await self.generate_audio_f5(script_text, actual_chat_id, script_name=script_name)
                 # Cleanup chunk progress context
                 self._current_chat_id = None
                 
@@ -4748,11 +5084,14 @@ class WorkingF5Bot:
                             f"📊 Remaining: {len(self.processing_queue)} files"
                         )
                     )
+                    self.processing_queue.mark_failed(job_id, "stopped by user")
                     self.processing_queue.clear()
-                    self.stop_requested = False
+                    self._release_stop()
                     break
                 
                 if success:
+                    self.processing_queue.mark_done(job_id)
+                    job_id = None
                     self.latest_outputs_by_chat[actual_chat_id] = {
                         "paths": output_files, "links": {}, "filename": filename, "ts": time.time()
                     }
@@ -4777,6 +5116,8 @@ class WorkingF5Bot:
                     )
                     
                 else:
+                    self.processing_queue.mark_failed(job_id, str(output_files))
+                    job_id = None
                     await context.bot.send_message(
                         chat_id=actual_chat_id,
                         text=f"❌ {filename} failed!\n\n"
@@ -4784,9 +5125,9 @@ class WorkingF5Bot:
                              f"🔧 Continuing with next file..."
                     )
                 
-                # Memory cleanup
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
+
+                # Memory cleanup between scripts
+                await self.tts_worker.run(self.memory_policy.after_job)
                 
                 await asyncio.sleep(2)  # Small delay between files
             
@@ -4813,6 +5154,8 @@ class WorkingF5Bot:
         except Exception as e:
             error_msg = f"❌ Queue processing error: {str(e)}"
             print(error_msg)
+            if job_id is not None:
+                self.processing_queue.mark_failed(job_id, str(e))
             try:
                 await context.bot.send_message(chat_id=actual_chat_id, text=error_msg)
             except:
@@ -4827,6 +5170,175 @@ class WorkingF5Bot:
             except Exception as _e:
                 pass
     
+    async def _process_youtube_transcript_streaming(self, transcript, chat_id, context, send_message):
+        """
+        YouTube link flow in streaming mode: rewrite (SSE) -> sentence chunker -> F5-TTS,
+        so the first audio chunk is synthesized seconds after the first tokens arrive.
+        Returns: (script_path, output_files) like process_youtube_link
+        """
+        if self.ai_mode == "openrouter":
+            llm_client, api_key = self.openrouter_client, os.getenv("OPENROUTER_API_KEY")
+            size_env = "OPENROUTER_CHUNK_SIZE"
+        elif self.ai_mode == "auto":
+            # Whole stream on the provider currently ranked fastest (no per-chunk hedging)
+            ranked = self.llm_router.rank(self.llm_router.available())
+            llm_client, api_key = (ranked[0][0].client, ranked[0][1]) if ranked else (self.llm_client, None)
+            size_env = "DEEPSEEK_CHUNK_SIZE"
+        else:
+            llm_client, api_key = self.llm_client, os.getenv("DEEPSEEK_API_KEY")
+            size_env = "DEEPSEEK_CHUNK_SIZE"
+
+        if not api_key:
+            await send_message(f"❌ {self.ai_mode.capitalize()} API key not set")
+            return None, None
+
+        llm_chunks = self.plan_llm_chunks(transcript, [llm_client.model], self.youtube_transcript_prompt, size_env)
+
+        await send_message(
+            f"⚡ Streaming {self.ai_mode.capitalize()} ({len(llm_chunks)} chunks) straight into F5-TTS..."
+        )
+
+        script_parts = []  # raw streamed text, joined into the final script afterwards
+
+        async def tts_chunks():
+            chunker = StreamingChunker(self.chunk_size, self.split_text_into_chunks)
+            async for delta in llm_client.stream_chunks_in_order(
+                api_key, self.youtube_transcript_prompt, llm_chunks
+            ):
+                script_parts.append(delta)
+                for tts_chunk in chunker.feed(delta):
+                    yield tts_chunk
+            for tts_chunk in chunker.flush():
+                yield tts_chunk
+
+        success, output_files = await self.generate_audio_f5_streaming(
+            tts_chunks(), script_parts, chat_id
+        )
+        processed_script = "".join(script_parts).strip()
+
+        # Save processed script (sent after audio in streaming mode)
+        script_path = None
+        if processed_script:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            script_filename = f"deepseek_script_{timestamp}.txt"
+            script_path = os.path.join(SCRIPTS_DIR, script_filename)
+            with open(script_path, 'w', encoding='utf-8') as f:
+                f.write(processed_script)
+            try:
+                with open(script_path, 'rb') as f:
+                    await context.bot.send_document(
+                        chat_id=chat_id,
+                        document=f,
+                        filename=script_filename,
+                        caption=f"📝 **{self.ai_mode.capitalize()} Processed Script** (streamed)\n"
+                               f"📄 File: {script_filename}\n"
+                               f"📏 Size: {len(processed_script)} chars"
+                    )
+            except Exception as e:
+                print(f"❌ Failed to send script via Telegram: {e}")
+
+        if success:
+            await self.send_outputs_by_mode(context, chat_id, output_files, processed_script, "YouTube Audio")
+        else:
+            await send_message(f"❌ Audio generation failed: {output_files}")
+
+        await self.cleanup_processing_files(exclude_scripts=True)
+        return script_path, output_files if success else None
+
+    async def generate_audio_f5_streaming(self, chunk_stream, script_parts, chat_id=None, script_name=None):
+        """
+        F5-TTS over an async stream of text chunks (e.g. LLM output being generated).
+        Chunks are synthesized as they arrive; script_parts collects the full text
+        so the result can be stored in the output cache afterwards.
+        Returns: (success, output_files or error message)
+        """
+        try:
+            if script_name:
+                clean_name = re.sub(r'[^\w\-]', '_', script_name)
+                base_output_path = os.path.join(OUTPUT_DIR, clean_name)
+            else:
+                base_output_path = os.path.join(OUTPUT_DIR, f"generated_{int(time.time())}")
+            raw_output = f"{base_output_path}_raw.wav"
+
+            # One script on the GPU at a time: held for the whole streamed job
+            async with self.gpu_lock:
+                conditioning = await self.tts_worker.run(
+                    self.reference_cache.get, self.f5_model, self.reference_audio, target_rms=0.1,
+                    ref_hash=await self.reference_hash()
+                )
+
+                def synthesize_on_worker(i, text_chunk):
+                    wave = synthesize_chunk(self.f5_model, conditioning, text_chunk,
+                                            speed=self.audio_speed, nfe_step=32, cfg_strength=1.5,
+                                            cross_fade_duration=0.15)
+                    # Flush CUDA cache / gc only when the memory policy asks for it
+                    self.memory_policy.after_chunk(i)
+                    return wave
+
+                # Explicit hand-off: the LLM stream fills an asyncio queue on the event loop
+                # and each text chunk becomes one worker call, so the TTS thread is never
+                # parked waiting for LLM output and other worker calls can interleave
+                feed = asyncio.Queue()
+                received = 0
+
+                async def pump():
+                    nonlocal received
+                    try:
+                        async for text_chunk in chunk_stream:
+                            received += 1
+                            feed.put_nowait(text_chunk)
+                        return True
+                    finally:
+                        feed.put_nowait(None)
+
+                # /stop closes the LLM stream right away, even before the first chunk is synthesized
+                pump_task = asyncio.create_task(self.cancellable(pump(), "LLM stream"))
+
+                writer = StreamingWavWriter(raw_output, sample_rate=24000, cross_fade_duration=0.15)
+                finished = False
+                try:
+                    i = 0
+                    while (text_chunk := await feed.get()) is not None:
+                        if self.stop_requested:
+                            print(f"🛑 Stop requested before streamed chunk {i+1}")
+                            break
+                        writer.append(await self.tts_worker.run(synthesize_on_worker, i, text_chunk))
+                        print(f"📄 Streamed chunk {i+1} synthesized ({received} received so far)")
+                        if i == 0 and chat_id:
+                            await self._send_chunk_update(chat_id, 1, "streaming")
+                        i += 1
+                    else:
+                        finished = True
+                finally:
+                    if not finished:
+                        pump_task.cancel()
+                    writer.close()
+
+                if not finished or not await pump_task:
+                    await self.tts_worker.run(self.memory_policy.release)
+                    return False, "Stopped by user"
+                if writer.chunks_written == 0 or writer.chunks_written != received:
+                    return False, f"Stopped after {writer.chunks_written}/{received} chunks"
+
+            print(f"💾 Raw audio saved ({writer.duration:.1f}s)")
+            await self.tts_worker.run(self.memory_policy.after_job)
+            output_files = await self.create_audio_variants(base_output_path)
+
+            # Same cache key as the non-streaming path for this script
+            cache_key = OutputCache.make_key(
+                "".join(script_parts), await self.reference_hash(),
+                speed=self.audio_speed, chunk_size=self.chunk_size,
+                nfe_step=32, cfg_strength=1.5, ffmpeg_filter=self.ffmpeg_filter
+            )
+            # Copies the finished WAVs: keep it off the event loop
+            await asyncio.to_thread(self.output_cache.put, cache_key, base_output_path, output_files)
+            return True, output_files
+
+        except Exception as e:
+            error_msg = f"F5-TTS streaming generation error: {str(e)}"
+            print(f"❌ {error_msg}")
+            return False, error_msg
+
     async def generate_audio_f5(self, script_text, chat_id=None, script_name=None):
         """F5-TTS API with PC-like parameters and processing"""
         try:
@@ -4847,113 +5359,114 @@ class WorkingF5Bot:
                 base_output_path = os.path.join(OUTPUT_DIR, f"generated_{timestamp}")
             raw_output = f"{base_output_path}_raw.wav"
             
+            # Identical script + reference + settings already rendered? Serve it from the cache
+            cache_key = OutputCache.make_key(
+                script_text, await self.reference_hash(),
+                speed=self.audio_speed, chunk_size=self.chunk_size,
+                nfe_step=32, cfg_strength=1.5, ffmpeg_filter=self.ffmpeg_filter
+            )
+            cached_files = await asyncio.to_thread(self.output_cache.get, cache_key, base_output_path)
+            if cached_files:
+                print(f"⚡ Output cache hit - reusing {len(cached_files)} audio file(s)")
+                return True, cached_files
+            
             # Split text into chunks (configurable size)
             chunks = self.split_text_into_chunks(script_text, self.chunk_size)
             print(f"📊 Split into {len(chunks)} chunks ({self.chunk_size} chars each)")
             
-            # Generate audio for each chunk
-            audio_segments = []
-            
-            for i, chunk in enumerate(chunks):
-                # Check for stop request BEFORE processing
-                if self.stop_requested:
-                    print(f"🛑 Stop requested during chunk {i+1}/{len(chunks)}")
-                    # Clean up and return immediately
-                    if torch.cuda.is_available():
-                        torch.cuda.empty_cache()
-                    return False, "Stopped by user"
-                
-                print(f"📄 Processing chunk {i+1}/{len(chunks)}")
-                
-                # Send chunk progress to Telegram (skip first chunk as it's already notified)
-                if i > 0:  # Don't send for chunk 1 as it's already in the main processing message
-                    try:
-                        # Get chat ID from context (you'll need to pass it to this method)
-                        if hasattr(self, '_current_chat_id') and self._current_chat_id:
-                            await self._send_chunk_update(self._current_chat_id, i+1, len(chunks))
-                            # Check again after sending update (user might have sent /stop)
-                            if self.stop_requested:
-                                print(f"🛑 Stop requested after chunk update")
-                                if torch.cuda.is_available():
-                                    torch.cuda.empty_cache()
-                                return False, "Stopped by user"
-                    except Exception as e:
-                        print(f"Failed to send chunk update: {e}")
-                
-                # Clear CUDA memory before each chunk
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-                
-                # Check one more time before heavy processing
-                if self.stop_requested:
-                    if torch.cuda.is_available():
-                        torch.cuda.empty_cache()
-                    return False, "Stopped by user"
-                
-                # F5-TTS API call with cached reference text and inference mode
-                with torch.inference_mode():
-                    result = self.f5_model.infer(
-                        ref_file=self.reference_audio,
-                        ref_text="",  # Let F5-TTS auto-extract to avoid cache conflicts
-                        gen_text=chunk,
-                        remove_silence=True,
-                        cross_fade_duration=0.15,
+            # Reference clip/transcript/mel prepared once and reused for every chunk
+            conditioning = await self.tts_worker.run(
+                self.reference_cache.get, self.f5_model, self.reference_audio, target_rms=0.1,
+                ref_hash=await self.reference_hash()
+            )
+
+            # Check for stop request BEFORE processing
+            if self.stop_requested:
+                print(f"🛑 Stop requested before chunk 1/{len(chunks)}")
+                return False, "Stopped by user"
+
+            # Generate audio for each chunk (packed into padded batches when tts_batch_size > 1)
+            # Chunks finished by an earlier (failed/stopped) attempt are loaded from disk
+            checkpoints = ChunkCheckpoints(self.checkpoint_dir, script_text, conditioning.ref_hash,
+                                           speed=self.audio_speed, nfe_step=32, cfg_strength=1.5)
+            resumed = checkpoints.count(chunks)
+            if resumed:
+                print(f"♻️ Resuming from checkpoint: {resumed}/{len(chunks)} chunks already done")
+
+            # Synthesis runs on the TTS worker thread; the event loop stays free for Telegram
+            job = self.tts_worker.submit(
+                lambda: iter_checkpointed_chunks(
+                    checkpoints,
+                    chunks,
+                    lambda missing: iter_synthesized_chunks(
+                        self.f5_model,
+                        conditioning,
+                        missing,
+                        batch_size=self.tts_batch_size,
+                        max_batch_frames=self.tts_batch_max_frames,
                         speed=self.audio_speed,
                         nfe_step=32,
                         cfg_strength=1.5,
-                        target_rms=0.1
+                        cross_fade_duration=0.15
                     )
-                
-                # Check after inference completes
+                ),
+                total=len(chunks),
+                # Flush CUDA cache / gc only when the memory policy asks for it, on the
+                # worker thread between chunks (never from the event loop mid-inference)
+                after_item=lambda item: self.memory_policy.after_chunk(item[0])
+            )
+            print(f"📄 Processing chunk 1/{len(chunks)} (batch size {self.tts_batch_size})")
+            
+            # Raw audio is written chunk by chunk (cross-faded at boundaries), so only
+            # one chunk is held in memory and a crash still leaves the partial file
+            writer = StreamingWavWriter(raw_output, sample_rate=24000, cross_fade_duration=0.15)
+
+            async def on_chunk(item):
+                i, audio_data = item
+                writer.append(audio_data)
+
+                if i + 1 >= len(chunks):
+                    return True  # last chunk: keep reading until the worker reports done
+
+                # Check for stop request before the next chunk
                 if self.stop_requested:
-                    print(f"🛑 Stop requested after inference chunk {i+1}")
-                    if torch.cuda.is_available():
-                        torch.cuda.empty_cache()
-                    return False, "Stopped by user"
-                
-                # Extract audio data
-                if isinstance(result, tuple):
-                    audio_data = result[0]
-                else:
-                    audio_data = result
-                
-                # Move to CPU to save VRAM
-                if torch.is_tensor(audio_data):
-                    audio_data = audio_data.cpu()
-                
-                audio_segments.append(audio_data)
-                
-                # Cleanup after each chunk
-                del result
-                import gc
-                gc.collect()
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-            
-            print("🔗 Combining audio segments...")
-            
-            # Concatenate all segments
-            if torch.is_tensor(audio_segments[0]):
-                final_audio = torch.cat(audio_segments, dim=-1).cpu()
-            else:
-                import numpy as np
-                final_audio = np.concatenate(audio_segments)
-            
-            # Save raw audio first
-            print(f"💾 Saving raw audio...")
-            if torch.is_tensor(final_audio):
-                if final_audio.dim() == 1:
-                    final_audio = final_audio.unsqueeze(0)
-                import torchaudio
-                torchaudio.save(raw_output, final_audio, 24000)
-                audio_array = final_audio.squeeze().numpy()
-            else:
-                import soundfile as sf
-                sf.write(raw_output, final_audio, 24000)
-                audio_array = final_audio
+                    print(f"🛑 Stop requested after chunk {i+1}/{len(chunks)}")
+                    return False
+
+                print(f"📄 Processing chunk {i+2}/{len(chunks)}")
+
+                # Send chunk progress to Telegram (chunk 1 is already in the main processing message)
+                try:
+                    if hasattr(self, '_current_chat_id') and self._current_chat_id:
+                        await self._send_chunk_update(self._current_chat_id, i+2, len(chunks))
+                        # Check again after sending update (user might have sent /stop)
+                        if self.stop_requested:
+                            print(f"🛑 Stop requested after chunk update")
+                            return False
+                except Exception as e:
+                    print(f"Failed to send chunk update: {e}")
+                return True
+
+            try:
+                # Worker stops at the next batch boundary if we leave early
+                completed = await job.drain(on_chunk)
+            finally:
+                writer.close()
+
+            if not completed or writer.chunks_written != len(chunks):
+                print(f"🛑 Stopped after {writer.chunks_written}/{len(chunks)} chunks (partial audio kept in {raw_output})")
+                await self.tts_worker.run(self.memory_policy.release)
+                return False, "Stopped by user"
             
+            print(f"💾 Raw audio saved ({writer.duration:.1f}s)")
+            checkpoints.clear()
+            
+            # Script finished: release GPU memory before ffmpeg post-processing
+            await self.tts_worker.run(self.memory_policy.after_job)
+
             # Now create 4 versions like PC file
-            output_files = await self.create_audio_variants(base_output_path, audio_array)
+            output_files = await self.create_audio_variants(base_output_path)
+            await asyncio.to_thread(self.output_cache.put, cache_key, base_output_path, output_files)
             
             print(f"✅ Generated {len(output_files)} audio variants")
             return True, output_files
@@ -4963,6 +5476,22 @@ class WorkingF5Bot:
             print(f"❌ {error_msg}")
             return False, error_msg
     
+    def plan_llm_chunks(self, text, models, prompt=None, cap_env=None, split_fn=None):
+        """
+        Split text for LLM rewriting with the token-aware chunk planner.
+        cap_env names an optional hard cap in characters (e.g. DEEPSEEK_CHUNK_SIZE).
+        """
+        cap = None
+        if cap_env and os.getenv(cap_env):
+            try:
+                cap = int(os.getenv(cap_env))
+            except Exception:
+                cap = None
+        chunks = self.chunk_planner.plan(text, models, split_fn or self.split_text_into_chunks,
+                                         prompt=prompt, max_chars=cap)
+        print(f"📐 Planned {len(chunks)} LLM chunks for {len(text)} chars ({', '.join(models)})")
+        return chunks
+
     def split_text_into_chunks(self, text, max_length):
         """Split text into chunks like PC version"""
         import re
@@ -5000,7 +5529,7 @@ class WorkingF5Bot:
         
         return chunks
     
-    async def create_audio_variants(self, base_path, audio_array):
+    async def create_audio_variants(self, base_path, audio_array=None):
         """Create 2 audio variants: Raw and Enhanced (using ffmpeg filter)"""
         import numpy as np
         import subprocess
@@ -5241,11 +5770,12 @@ class WorkingF5Bot:
             print(f"   File size: {file_size / (1024*1024):.2f} MB")
 
             with open(file_path, "rb") as f:
-                resp = requests.post(
+                resp = await http_pool.post(
                     upload_url,
                     headers={"x-api-key": CONTABO_API_KEY},
                     files={"file": (filename, f, "audio/wav")},
-                    timeout=300
+                    timeout=300,
+                    retries=0  # file stream can't be replayed
                 )
 
             print(f"   Response status: {resp.status_code}")
@@ -5272,10 +5802,10 @@ class WorkingF5Bot:
                 print(f"   Response: {resp.text[:500]}")
                 return None
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             print(f"❌ Contabo upload timeout (300s)")
             return None
-        except requests.exceptions.ConnectionError as e:
+        except httpx.ConnectError as e:
             print(f"❌ Contabo connection error: {e}")
             return None
         except Exception as e:
@@ -5307,7 +5837,7 @@ class WorkingF5Bot:
             # Upload as text file
             upload_url = f"{CONTABO_URL}/upload/external-audio"
 
-            resp = requests.post(
+            resp = await http_pool.post(
                 upload_url,
                 headers={"x-api-key": CONTABO_API_KEY},
                 files={"file": (link_filename, link_content, "text/plain")},
@@ -5445,7 +5975,7 @@ class WorkingF5Bot:
     async def stop_processing_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Stop all ongoing processing immediately"""
         try:
-            if not self.is_processing:
+            if not self._has_active_work():
                 await update.message.reply_text(
                     "⚠️ No processing currently running.\n\n"
                     "Use this command when audio/video generation is in progress."
@@ -5453,6 +5983,7 @@ class WorkingF5Bot:
                 return
 
             self.stop_requested = True
+            self.tts_worker.cancel_current()
 
             await update.message.reply_text(
                 "🛑 STOP REQUESTED!\n\n"
@@ -5744,7 +6275,7 @@ class WorkingF5Bot:
                 return
             
             if policy == "stop":
-                ok = self.vast_stop_instance()
+                ok = await asyncio.to_thread(self.vast_stop_instance)
                 if msg_chat:
                     await context.bot.send_message(
                         chat_id=msg_chat,
@@ -5752,7 +6283,7 @@ class WorkingF5Bot:
                              ("✅ Instance stopped successfully." if ok else "⚠️ Stop failed - check manually.")
                     )
             elif policy == "destroy":
-                ok = self.vast_destroy_instance()
+                ok = await asyncio.to_thread(self.vast_destroy_instance)
                 if msg_chat:
                     await context.bot.send_message(
                         chat_id=msg_chat,
@@ -5819,6 +6350,11 @@ async def async_main():
     application.add_handler(CommandHandler("set_openrouter_model", bot_instance.set_openrouter_model_command))
     application.add_handler(CommandHandler("set_ffmpeg", bot_instance.set_ffmpeg_command))
     application.add_handler(CommandHandler("set_chunk_size", bot_instance.set_chunk_size_command))
+    application.add_handler(CommandHandler("set_batch_size", bot_instance.set_batch_size_command))
+    application.add_handler(CommandHandler("ai_mode", bot_instance.ai_mode_command))
+    application.add_handler(CommandHandler("llm_streaming", bot_instance.llm_streaming_command))
+    application.add_handler(CommandHandler("llm_stats", bot_instance.llm_stats_command))
+    application.add_handler(CommandHandler("titles", bot_instance.titles_command))
     application.add_handler(CommandHandler("update_ytdlp", bot_instance.update_ytdlp_command))
     application.add_handler(CommandHandler("start_processing", bot_instance.start_processing_command))
     # YouTube Channel Automation Commands
@@ -5879,6 +6415,11 @@ async def async_main():
 
     print("✅ Bot is now running! Press Ctrl+C to stop.")
 
+    # Resume scripts left in the persistent queue by a previous run
+    if bot_instance.processing_queue:
+        print(f"♻️ Resuming {len(bot_instance.processing_queue)} queued script(s) from previous run")
+        asyncio.create_task(bot_instance.process_queue(application))
+
     # Keep the bot running
     try:
         import signal
@@ -5898,6 +6439,8 @@ async def async_main():
         await application.updater.stop()
         await application.stop()
         await application.shutdown()
+        bot_instance.tts_worker.shutdown()
+        await http_pool.aclose()
 
 def main():
     """Synchronous main entry point."""
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Shared Async HTTP Layer
+=======================
+One long-lived httpx.AsyncClient for every outbound API call (DeepSeek,
+OpenRouter, Supadata, Contabo):
+- Per-host connection pools with keep-alive (no TLS handshake per request)
+- HTTP/2 when the optional 'h2' package is installed
+- Unified timeout and retry policy (transport errors, 502/503/504)
+- Never blocks the event loop
+"""
+
+import asyncio
+import os
+from typing import Iterable, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables httpx HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = httpx.Timeout(120.0, connect=15.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=90)
+RETRY_STATUSES = (502, 503, 504)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """The shared client (created on first use inside the running event loop)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=DEFAULT_TIMEOUT,
+            limits=DEFAULT_LIMITS,
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def request(method: str, url: str, *, retries: Optional[int] = None,
+                  backoff: float = 2.0, retry_statuses: Iterable[int] = RETRY_STATUSES,
+                  timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+    """
+    Send a request through the shared client.
+
+    Transport errors / timeouts and retry_statuses are retried with exponential
+    backoff (HTTP_RETRIES, default 2). Any other response is returned as-is for
+    the caller to inspect; the last error is raised once retries run out.
+
+    Args:
+        timeout: Overall timeout in seconds for this request (default: pool timeout)
+        **kwargs: Passed to httpx (params, headers, json, data, files, ...)
+    """
+    if retries is None:
+        try:
+            retries = int(os.getenv("HTTP_RETRIES", 2))
+        except Exception:
+            retries = 2
+    if timeout is not None:
+        kwargs['timeout'] = httpx.Timeout(timeout, connect=min(timeout, 15.0))
+
+    client = get_client()
+    for attempt in range(retries + 1):
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            if attempt >= retries:
+                raise
+        else:
+            if response.status_code not in retry_statuses or attempt >= retries:
+                return response
+        await asyncio.sleep(backoff * (2 ** attempt))
+
+
+async def get(url: str, **kwargs) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs) -> httpx.Response:
+    return await request("POST", url, **kwargs)
+
+
+async def aclose():
+    """Close the shared client (bot shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Persistent Job Queue
+====================
+Restart-safe replacement for the in-memory script processing queue:
+- Jobs stored in a local SQLite file (survives bot restarts / instance stops)
+- Job states: queued -> running -> done | failed
+- Jobs left 'running' by a crash are re-queued at startup
+- Indexed dequeue of the oldest queued job (no list shifting)
+- Optional mirror of job state to Supabase (see SupabaseClient.upsert_queue_job),
+  sent in order from a background thread so queue operations never wait on it
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class PersistentJobQueue:
+    """SQLite-backed FIFO of script jobs"""
+
+    def __init__(self, db_path: str = "processing_queue.db", mirror=None):
+        """
+        Args:
+            db_path: SQLite file holding the queue
+            mirror: Optional object with upsert_queue_job(dict) (e.g. SupabaseClient)
+        """
+        self.db_path = db_path
+        self.mirror = mirror
+        self._lock = threading.Lock()
+        self._mirror_rows: "queue.Queue[dict]" = queue.Queue()
+        self._mirror_thread: Optional[threading.Thread] = None
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                state TEXT NOT NULL,
+                filename TEXT,
+                payload TEXT NOT NULL,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state_id ON jobs (state, id)")
+        self._queued = self._count(QUEUED)
+
+    # =============================================================================
+    # LIST-LIKE VIEW OF QUEUED JOBS
+    # =============================================================================
+
+    def __len__(self) -> int:
+        return self._queued
+
+    def __bool__(self) -> bool:
+        return self._queued > 0
+
+    def append(self, item: Dict[str, Any]) -> int:
+        """Add a job (queue_item dict) to the end of the queue. Returns job id."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (state, filename, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (QUEUED, item.get('filename'), json.dumps(item), now, now)
+            )
+            self._queued += 1
+            job_id = cur.lastrowid
+        self._mirror(job_id, QUEUED, item.get('filename'))
+        return job_id
+
+    def peek(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Oldest queued jobs without claiming them"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload FROM jobs WHERE state = ? ORDER BY id LIMIT ?", (QUEUED, limit)
+            ).fetchall()
+        return [self._load(job_id, payload) for job_id, payload in rows]
+
+    def clear(self) -> int:
+        """Drop every queued job (marked failed so the record stays). Returns count."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE state = ?",
+                (FAILED, "cleared", now, QUEUED)
+            )
+            self._queued = 0
+        return cur.rowcount
+
+    # =============================================================================
+    # JOB LIFECYCLE
+    # =============================================================================
+
+    def pop_next(self) -> Optional[Dict[str, Any]]:
+        """
+        Claim the oldest queued job and mark it running.
+
+        Returns:
+            queue_item dict with 'job_id' set, or None if the queue is empty
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, payload FROM jobs WHERE state = ? ORDER BY id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if not row:
+                return None
+            job_id, payload = row
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE id = ?", (RUNNING, time.time(), job_id)
+            )
+            self._queued -= 1
+        item = self._load(job_id, payload)
+        self._mirror(job_id, RUNNING, item.get('filename'))
+        return item
+
+    def mark_done(self, job_id: int):
+        self._set_state(job_id, DONE)
+
+    def mark_failed(self, job_id: int, error: Optional[str] = None):
+        self._set_state(job_id, FAILED, error)
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs left 'running' by a crash/restart back in the queue. Returns count."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET state = ?, updated_at = ? WHERE state = ?", (QUEUED, time.time(), RUNNING)
+            )
+            self._queued = self._count(QUEUED)
+        if cur.rowcount:
+            print(f"♻️ Re-queued {cur.rowcount} interrupted job(s)")
+        return cur.rowcount
+
+    def purge_finished(self, older_than_days: float = 7) -> int:
+        """Delete done/failed jobs older than N days. Returns count."""
+        cutoff = time.time() - older_than_days * 86400
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE state IN (?, ?) AND updated_at < ?", (DONE, FAILED, cutoff)
+            )
+        return cur.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per state"""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        return {state: count for state, count in rows}
+
+    # =============================================================================
+    # INTERNALS
+    # =============================================================================
+
+    def _count(self, state: str) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE state = ?", (state,)).fetchone()[0]
+
+    def _set_state(self, job_id: int, state: str, error: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, updated_at = ? WHERE id = ?",
+                (state, error, time.time(), job_id)
+            )
+        self._mirror(job_id, state, error=error)
+
+    @staticmethod
+    def _load(job_id: int, payload: str) -> Dict[str, Any]:
+        item = json.loads(payload)
+        item['job_id'] = job_id
+        return item
+
+    def _mirror(self, job_id: int, state: str, filename: Optional[str] = None, error: Optional[str] = None):
+        """Hand the state change to the mirror thread (a slow Supabase must not block the bot)"""
+        if not self.mirror:
+            return
+        row = {'job_id': job_id, 'state': state, 'error': error}
+        if filename is not None:
+            row['filename'] = filename
+        self._mirror_rows.put(row)
+        with self._lock:
+            if self._mirror_thread is None or not self._mirror_thread.is_alive():
+                self._mirror_thread = threading.Thread(target=self._mirror_writer, name="queue-mirror", daemon=True)
+                self._mirror_thread.start()
+
+    def _mirror_writer(self):
+        """Send mirrored rows one at a time, in the order the transitions happened"""
+        while True:
+            row = self._mirror_rows.get()
+            try:
+                mirror = self.mirror
+                if mirror:
+                    mirror.upsert_queue_job(row)
+            except Exception as e:
+                print(f"⚠️ Queue mirror failed: {e}")
+            finally:
+                self._mirror_rows.task_done()
+
+    def flush_mirror(self):
+        """Block until every pending mirror write has been sent (or has failed)"""
+        self._mirror_rows.join()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
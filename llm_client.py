@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Async LLM Client - DeepSeek / OpenRouter chat completions
+=========================================================
+Rewrites transcript chunks concurrently instead of one blocking request
+after another:
+- Bounded parallelism (max requests in flight)
+- Rate-limit aware: a 429 pauses every queued request until Retry-After
+- Retries with backoff on timeouts / 5xx
+- Results reassembled in chunk order
+- Optional RewriteCache: identical (prompt, model, temperature, chunk)
+  requests are answered from cache
+- Streaming (SSE) mode that yields text as it is generated, plus a
+  sentence chunker so TTS can start on the first finished sentences
+- run_cancellable(): any call is cancelled the moment /stop fires, which
+  closes its request and frees the pooled connection immediately
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+import httpx
+
+import http_pool
+
+DEEPSEEK_URL = "https://api.deepseek.com/v1/chat/completions"
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+
+def _env_number(name: str, default, cast=int):
+    try:
+        return cast(os.getenv(name, default))
+    except Exception:
+        return default
+
+
+async def run_cancellable(awaitable, stop_event: asyncio.Event, label: str = "LLM call"):
+    """
+    Await an LLM call, cancelling it as soon as stop_event is set.
+
+    Returns:
+        The call's result, or None if it was stopped
+    """
+    if stop_event.is_set():
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        print(f"🛑 {label} skipped, stop requested")
+        return None
+    task = asyncio.ensure_future(awaitable)
+    stopper = asyncio.ensure_future(stop_event.wait())
+    try:
+        await asyncio.wait({task, stopper}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stopper.cancel()
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)  # let the request unwind
+    if task.cancelled():
+        print(f"🛑 {label} cancelled by stop request")
+        return None
+    return task.result()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After header as seconds (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.replace('.', '', 1).isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _messages(system_prompt: str, user_content: str) -> List[dict]:
+    """Chat messages; an empty system prompt sends the user message alone"""
+    messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    messages.append({"role": "user", "content": user_content})
+    return messages
+
+
+class AsyncLLMClient:
+    """Concurrent chat-completion client for one OpenAI-compatible provider"""
+
+    def __init__(self, url: str = DEEPSEEK_URL, model: str = "deepseek-chat",
+                 max_in_flight: Optional[int] = None, max_retries: Optional[int] = None,
+                 timeout: Optional[float] = None, backoff: Optional[float] = None,
+                 cache=None, name: str = "DeepSeek", extra_headers: Optional[dict] = None,
+                 on_usage: Optional[Callable[[str, dict, int, float], None]] = None):
+        """
+        Args:
+            name: Provider name for logs; also the env prefix for the defaults
+                  (<NAME>_MAX_IN_FLIGHT, _MAX_RETRIES, _TIMEOUT, _BACKOFF)
+            extra_headers: Sent with every request (e.g. OpenRouter HTTP-Referer / X-Title)
+            on_usage: Optional callback(model, usage, prompt_chars, seconds) after each
+                      successful completion (e.g. ChunkPlanner.record)
+        """
+        self.url = url
+        self.name = name
+        self.extra_headers = extra_headers or {}
+        self.on_usage = on_usage
+        self.cache = cache  # RewriteCache or None
+        self.model = model
+        env = name.upper()
+        self.max_in_flight = max_in_flight or _env_number(f"{env}_MAX_IN_FLIGHT", 4)
+        self.max_retries = max_retries or _env_number(f"{env}_MAX_RETRIES", 3)
+        self.timeout = timeout or _env_number(f"{env}_TIMEOUT", 1000, float)
+        self.backoff = backoff or _env_number(f"{env}_BACKOFF", 5, float)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._paused_until = 0.0  # monotonic time before which no request is sent
+
+    def _ensure_slots(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+
+    async def _wait_for_rate_limit(self):
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def chat(self, api_key: str, system_prompt: str, user_content: str,
+                   temperature: float = 0.7, label: str = "request",
+                   cache_lookup: bool = True,
+                   on_send: Optional[Callable[[], None]] = None) -> Optional[str]:
+        """
+        One chat completion with retries.
+
+        Args:
+            cache_lookup: False when the caller already checked the cache
+                          (the result is still stored)
+            on_send: Optional callback run each time a request actually goes out
+                     (after waiting for a max_in_flight slot and any rate-limit pause)
+
+        Returns:
+            The response text, or None after all retries failed
+        """
+        self._ensure_slots()
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.make_key(system_prompt, self.model, temperature, user_content)
+            cached = await self.cache.get_async(cache_key) if cache_lookup else None
+            if cached is not None:
+                print(f"⚡ Rewrite cache hit for {label}")
+                return cached
+
+        payload = {
+            "model": self.model,
+            "messages": _messages(system_prompt, user_content),
+            "temperature": temperature
+        }
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        headers.update(self.extra_headers)
+
+        for attempt in range(1, self.max_retries + 1):
+            async with self._slots:
+                await self._wait_for_rate_limit()
+                if on_send:
+                    on_send()
+                started = time.monotonic()
+                try:
+                    # Shared keep-alive pool; retries/429 handling are done here, not in http_pool
+                    response = await http_pool.post(self.url, headers=headers, json=payload,
+                                                    timeout=self.timeout, retries=0)
+                except httpx.TimeoutException:
+                    print(f"⏱️ {self.name} timeout on {label}, attempt {attempt}/{self.max_retries}")
+                    response = None
+                except httpx.HTTPError as e:
+                    print(f"🌐 {self.name} request error on {label}, attempt {attempt}/{self.max_retries}: {e}")
+                    response = None
+
+            if response is not None:
+                if response.status_code == 200:
+                    result = response.json()
+                    content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+                    if self.on_usage and result.get("usage"):
+                        try:
+                            self.on_usage(self.model, result["usage"], len(system_prompt) + len(user_content),
+                                          time.monotonic() - started)
+                        except Exception as e:
+                            print(f"Usage callback error: {e}")
+                    if cache_key and content:
+                        await self.cache.put_async(cache_key, content)
+                    return content
+
+                if response.status_code == 429:
+                    # Rate limited - hold back every request until Retry-After
+                    wait_time = parse_retry_after(response.headers.get("Retry-After")) or self.backoff * attempt
+                    print(f"⚠️ {self.name} rate limited (429) on {label}, pausing {wait_time:.0f}s ({attempt}/{self.max_retries})")
+                    self._pause(wait_time)
+                    continue
+
+                print(f"{self.name} API error for {label}: {response.status_code} - {response.text[:200]}")
+                if not 500 <= response.status_code < 600:
+                    return None
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * attempt)
+
+        return None
+
+    async def rewrite_chunks(self, api_key: str, system_prompt: str, chunks: List[str],
+                             on_chunk_done: Optional[Callable[[int, int], Awaitable[None]]] = None,
+                             temperature: float = 0.7) -> List[Optional[str]]:
+        """
+        Rewrite all chunks concurrently (at most max_in_flight at once).
+
+        Args:
+            on_chunk_done: Optional async callback(completed_count, total)
+
+        Returns:
+            One result per chunk, in chunk order (None where the chunk failed)
+        """
+        completed = 0
+
+        async def run(i: int, chunk: str) -> Optional[str]:
+            nonlocal completed
+            result = await self.chat(api_key, system_prompt, chunk, temperature,
+                                     label=f"chunk {i + 1}/{len(chunks)}")
+            completed += 1
+            if on_chunk_done:
+                try:
+                    await on_chunk_done(completed, len(chunks))
+                except Exception as e:
+                    print(f"Chunk progress callback error: {e}")
+            return result
+
+        return list(await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks))))
+
+    async def stream(self, api_key: str, system_prompt: str, user_content: str,
+                     temperature: float = 0.7, label: str = "request", url: Optional[str] = None,
+                     model: Optional[str] = None, extra_headers: Optional[dict] = None) -> AsyncIterator[str]:
+        """
+        Streaming chat completion with the same cache / rate-limit / retry policy as chat().
+
+        A request is only retried if it failed before producing any text; a
+        stream that breaks midway ends with what was received.
+        url/model/extra_headers override the client's own.
+        """
+        self._ensure_slots()
+        url = url or self.url
+        model = model or self.model
+        extra_headers = {**self.extra_headers, **(extra_headers or {})}
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.make_key(system_prompt, model, temperature, user_content)
+            cached = await self.cache.get_async(cache_key)
+            if cached is not None:
+                print(f"⚡ Rewrite cache hit for {label}")
+                yield cached
+                return
+
+        messages = _messages(system_prompt, user_content)
+        for attempt in range(1, self.max_retries + 1):
+            produced = []
+            try:
+                async with self._slots:
+                    await self._wait_for_rate_limit()
+                    async for delta in stream_chat_completion(url, api_key, model, messages, temperature,
+                                                              extra_headers, self.timeout):
+                        produced.append(delta)
+                        yield delta
+                if cache_key and produced:
+                    await self.cache.put_async(cache_key, "".join(produced))
+                return
+            except LLMStreamError as e:
+                if produced:
+                    print(f"⚠️ Stream for {label} broke after {len(produced)} deltas: {e}")
+                    return
+                if e.status_code == 429:
+                    wait_time = parse_retry_after(e.retry_after) or self.backoff * attempt
+                    print(f"⚠️ LLM rate limited (429) on {label}, pausing {wait_time:.0f}s ({attempt}/{self.max_retries})")
+                    self._pause(wait_time)
+                    continue
+                print(f"LLM stream error for {label}: {e}")
+                if not 500 <= e.status_code < 600:
+                    return
+            except httpx.HTTPError as e:
+                if produced:
+                    print(f"⚠️ Stream for {label} broke after {len(produced)} deltas: {e}")
+                    return
+                print(f"🌐 LLM stream error on {label}, attempt {attempt}/{self.max_retries}: {e}")
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff * attempt)
+
+    async def stream_chunks_in_order(self, api_key: str, system_prompt: str, chunks: List[str],
+                                     temperature: float = 0.7, separator: str = " ",
+                                     **stream_kwargs) -> AsyncIterator[str]:
+        """
+        Stream rewrites of all chunks concurrently (bounded by max_in_flight) but
+        yield their text strictly in chunk order. A chunk whose request fails
+        without producing text falls back to the original chunk.
+        """
+        queues = [asyncio.Queue() for _ in chunks]
+
+        async def pump(i: int, chunk: str):
+            produced = False
+            try:
+                async for delta in self.stream(api_key, system_prompt, chunk, temperature,
+                                               label=f"chunk {i + 1}/{len(chunks)}", **stream_kwargs):
+                    produced = True
+                    queues[i].put_nowait(delta)
+            except Exception as e:
+                print(f"Stream error on chunk {i + 1}: {e}")
+            finally:
+                if not produced:
+                    queues[i].put_nowait(chunk)
+                queues[i].put_nowait(None)
+
+        tasks = [asyncio.create_task(pump(i, chunk)) for i, chunk in enumerate(chunks)]
+        try:
+            for i, q in enumerate(queues):
+                while (delta := await q.get()) is not None:
+                    yield delta
+                if i + 1 < len(queues):
+                    yield separator
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+# =============================================================================
+# STREAMING (server-sent events)
+# =============================================================================
+
+class LLMStreamError(Exception):
+    """Non-200 response when opening a streaming completion"""
+
+    def __init__(self, status_code: int, detail: str = "", retry_after: Optional[str] = None):
+        super().__init__(f"{status_code} - {detail}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+async def stream_chat_completion(url: str, api_key: str, model: str, messages: List[dict],
+                                 temperature: float = 0.7, extra_headers: Optional[dict] = None,
+                                 timeout: float = 1000) -> AsyncIterator[str]:
+    """
+    Stream an OpenAI-compatible chat completion (DeepSeek, OpenRouter).
+
+    Yields:
+        Content deltas as they arrive
+    """
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    if extra_headers:
+        headers.update(extra_headers)
+    payload = {"model": model, "messages": messages, "temperature": temperature, "stream": True}
+
+    client = http_pool.get_client()
+    async with client.stream("POST", url, headers=headers, json=payload,
+                             timeout=httpx.Timeout(timeout, connect=15.0)) as response:
+        if response.status_code != 200:
+            body = (await response.aread()).decode('utf-8', 'replace')
+            raise LLMStreamError(response.status_code, body[:200], response.headers.get("Retry-After"))
+
+        async for line in response.aiter_lines():
+            line = line.strip()
+            if not line.startswith("data:"):
+                continue  # keep-alive comments (": OPENROUTER PROCESSING") / blank lines
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            delta = (event.get("choices") or [{}])[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+class StreamingChunker:
+    """
+    Turn an LLM token stream into TTS chunks as sentences complete.
+
+    Complete sentences are re-chunked with the bot's own splitter; every chunk
+    except the last is final (more text can only extend the last one), so the
+    emitted chunks match split_fn(full_text, max_length) as long as no single
+    sentence is longer than max_length.
+    """
+
+    SENTENCE_END = re.compile(r'[.!?]\s+')
+
+    def __init__(self, max_length: int, split_fn: Callable[[str, int], List[str]]):
+        self.max_length = max_length
+        self.split_fn = split_fn
+        self._complete = ""  # complete sentences not emitted yet
+        self._partial = ""   # text after the last sentence boundary
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text; returns chunks that are now final"""
+        self._partial += text
+        last = None
+        for last in self.SENTENCE_END.finditer(self._partial):
+            pass
+        if last is None:
+            return []
+        self._complete += self._partial[:last.end()]
+        self._partial = self._partial[last.end():]
+
+        chunks = self.split_fn(self._complete, self.max_length)
+        if len(chunks) <= 1:
+            return []
+        self._complete = chunks[-1] + " "
+        return chunks[:-1]
+
+    def flush(self) -> List[str]:
+        """End of stream: remaining text as chunks"""
+        text = (self._complete + self._partial).strip()
+        self._complete = self._partial = ""
+        return self.split_fn(text, self.max_length) if text else []
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+LLM Provider Router
+===================
+Sends chat completions to the best of several OpenAI-compatible backends
+(DeepSeek direct, OpenRouter) instead of a fixed ai_mode switch:
+- Rolling p50/p95 latency and error rate per provider/model
+- New requests go to the fastest healthy provider (weighted by its load)
+- Providers that keep failing are benched for a cooldown
+- Hedging: a request still running after the provider's p95 is duplicated
+  to the next provider; the first good answer wins, the other is cancelled
+- Failover: when a provider gives up, the request moves on to the next one
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from llm_client import AsyncLLMClient, _env_number
+
+
+class ProviderStats:
+    """Rolling latency / outcome window for one provider + model"""
+
+    def __init__(self, window: int = 50):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.benched_until = 0.0  # monotonic time
+        self.in_flight = 0
+        self.hedges_won = 0
+
+    def record(self, ok: bool, latency: Optional[float] = None):
+        self.outcomes.append(ok)
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(0.5)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+
+class LLMProvider:
+    """One backend: an AsyncLLMClient plus where its API key comes from"""
+
+    def __init__(self, name: str, client: AsyncLLMClient, api_key: Callable[[], Optional[str]],
+                 window: int = 50):
+        self.name = name
+        self.client = client
+        self.get_api_key = api_key
+        self.window = window
+        self._stats: Dict[str, ProviderStats] = {}  # model -> stats
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}:{self.client.model}"
+
+    @property
+    def stats(self) -> ProviderStats:
+        """Stats for the client's current model (switching models starts fresh)"""
+        model = self.client.model
+        if model not in self._stats:
+            self._stats[model] = ProviderStats(self.window)
+        return self._stats[model]
+
+
+class _Attempt:
+    """One provider call, timed from when its request actually goes out
+    (not while it waits for a max_in_flight slot or a rate-limit pause)"""
+
+    def __init__(self, provider: LLMProvider):
+        self.provider = provider
+        self.sent_at: Optional[float] = None  # monotonic time of the first send
+        self.sent = asyncio.Event()
+
+    def mark_sent(self):
+        if self.sent_at is None:
+            self.sent_at = time.monotonic()
+            self.sent.set()
+
+    def elapsed(self) -> Optional[float]:
+        return time.monotonic() - self.sent_at if self.sent_at is not None else None
+
+
+class LLMRouter:
+    """Latency-aware routing, hedging and failover across LLM providers"""
+
+    def __init__(self, providers: List[LLMProvider], hedge: Optional[bool] = None):
+        self.providers = providers
+        if hedge is None:
+            hedge = os.getenv("LLM_HEDGE", "true").lower() == "true"
+        self.hedge = hedge
+        self.hedge_after = _env_number("LLM_HEDGE_AFTER", 90, float)  # until a provider has enough samples
+        self.hedge_min = _env_number("LLM_HEDGE_MIN", 15, float)
+        self.latency_prior = _env_number("LLM_LATENCY_PRIOR", 30, float)  # assumed p50 of unmeasured providers
+        self.bench_after = _env_number("LLM_BENCH_AFTER_FAILURES", 3)
+        self.bench_seconds = _env_number("LLM_BENCH_SECONDS", 120, float)
+        self.max_error_rate = _env_number("LLM_MAX_ERROR_RATE", 0.5, float)
+
+    # =============================================================================
+    # PROVIDER SELECTION
+    # =============================================================================
+
+    def available(self, api_keys: Optional[Dict[str, str]] = None) -> List[Tuple[LLMProvider, str]]:
+        """(provider, api_key) for every provider with a key (api_keys overrides by name)"""
+        candidates = []
+        for provider in self.providers:
+            key = (api_keys or {}).get(provider.name) or provider.get_api_key()
+            if key:
+                candidates.append((provider, key))
+        return candidates
+
+    def is_healthy(self, provider: LLMProvider) -> bool:
+        stats = provider.stats
+        if time.monotonic() < stats.benched_until:
+            return False
+        return len(stats.outcomes) < 4 or stats.error_rate <= self.max_error_rate
+
+    def _score(self, provider: LLMProvider) -> float:
+        """Expected latency, inflated by how busy the provider already is"""
+        p50 = provider.stats.p50
+        if p50 is None:
+            p50 = self.latency_prior
+        load = provider.stats.in_flight / max(1, provider.client.max_in_flight)
+        return p50 * (1 + load)
+
+    def rank(self, candidates: List[Tuple[LLMProvider, str]]) -> List[Tuple[LLMProvider, str]]:
+        """Healthy providers first, fastest first (list order breaks ties)"""
+        return sorted(candidates, key=lambda c: (not self.is_healthy(c[0]), self._score(c[0])))
+
+    def hedge_deadline(self, provider: LLMProvider) -> float:
+        stats = provider.stats
+        if len(stats.latencies) < 5:
+            return self.hedge_after
+        return max(self.hedge_min, stats.p95)
+
+    def _record_failure(self, provider: LLMProvider):
+        stats = provider.stats
+        stats.record(False)
+        if stats.consecutive_failures >= self.bench_after:
+            stats.benched_until = time.monotonic() + self.bench_seconds
+            print(f"🚫 {provider.label} benched for {self.bench_seconds:.0f}s "
+                  f"after {stats.consecutive_failures} failures")
+
+    # =============================================================================
+    # REQUESTS
+    # =============================================================================
+
+    async def _cached(self, candidates: List[Tuple[LLMProvider, str]], system_prompt: str,
+                temperature: float, user_content: str) -> Optional[str]:
+        """Rewrite already cached for any candidate's model (not counted as a request)"""
+        seen = set()
+        for provider, _ in candidates:
+            cache = provider.client.cache
+            if not cache or (id(cache), provider.client.model) in seen:
+                continue
+            seen.add((id(cache), provider.client.model))
+            cached = await cache.get_async(cache.make_key(system_prompt, provider.client.model, temperature, user_content))
+            if cached is not None:
+                return cached
+        return None
+
+    async def chat(self, system_prompt: str, user_content: str, temperature: float = 0.7,
+                   label: str = "request", api_keys: Optional[Dict[str, str]] = None,
+                   cache_lookup: bool = True) -> Optional[str]:
+        """
+        One chat completion on the best provider, hedged / failed over to the others.
+        cache_lookup=False forces a fresh completion (the result is still cached).
+
+        Returns:
+            The response text, or None if every provider failed
+        """
+        candidates = self.rank(self.available(api_keys))
+        if not candidates:
+            print("❌ No LLM provider has an API key configured")
+            return None
+
+        cached = await self._cached(candidates, system_prompt, temperature, user_content) if cache_lookup else None
+        if cached is not None:
+            print(f"⚡ Rewrite cache hit for {label}")
+            return cached
+
+        remaining = list(candidates)
+        pending: Dict[asyncio.Task, _Attempt] = {}
+        won = False
+
+        def launch():
+            provider, key = remaining.pop(0)
+            attempt = _Attempt(provider)
+            task = asyncio.create_task(provider.client.chat(
+                key, system_prompt, user_content, temperature,
+                label=f"{label} via {provider.name}", cache_lookup=False,
+                on_send=attempt.mark_sent
+            ))
+            provider.stats.in_flight += 1
+            pending[task] = attempt
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                sent_waiter = None
+                if self.hedge and remaining and len(pending) == 1:
+                    attempt = next(iter(pending.values()))
+                    if attempt.sent_at is None:
+                        # Still queued behind the client's max_in_flight: the hedge clock hasn't started
+                        sent_waiter = asyncio.create_task(attempt.sent.wait())
+                    else:
+                        timeout = max(0.0, attempt.sent_at + self.hedge_deadline(attempt.provider) - time.monotonic())
+
+                waiting = set(pending) | ({sent_waiter} if sent_waiter else set())
+                try:
+                    done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    if sent_waiter:
+                        sent_waiter.cancel()
+                done.discard(sent_waiter)
+                if not done:
+                    if sent_waiter:
+                        continue  # request went out: start the hedge clock
+                    attempt = next(iter(pending.values()))
+                    print(f"🏁 {label}: {attempt.provider.label} still running after "
+                          f"{attempt.elapsed():.0f}s, hedging to {remaining[0][0].label}")
+                    launch()
+                    continue
+
+                for task in done:
+                    attempt = pending.pop(task)
+                    provider = attempt.provider
+                    provider.stats.in_flight -= 1
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        print(f"❌ {provider.label} error on {label}: {e}")
+                        result = None
+                    if result:
+                        provider.stats.record(True, attempt.elapsed())
+                        if pending:
+                            provider.stats.hedges_won += 1
+                        won = True
+                        return result
+                    self._record_failure(provider)
+
+                if not pending and remaining:
+                    print(f"↪️ {label}: failing over to {remaining[0][0].label}")
+                    launch()
+            return None
+        finally:
+            for task, attempt in pending.items():
+                task.cancel()
+                attempt.provider.stats.in_flight -= 1
+                # Lost a hedge race: elapsed time is a lower bound on its latency.
+                # Attempts cancelled by /stop or never sent say nothing about latency.
+                if won and attempt.sent_at is not None:
+                    attempt.provider.stats.latencies.append(attempt.elapsed())
+
+    async def rewrite_chunks(self, system_prompt: str, chunks: List[str],
+                             on_chunk_done: Optional[Callable[[int, int], Awaitable[None]]] = None,
+                             temperature: float = 0.7,
+                             api_keys: Optional[Dict[str, str]] = None) -> List[Optional[str]]:
+        """
+        Rewrite all chunks concurrently, each routed independently.
+
+        Returns:
+            One result per chunk, in chunk order (None where every provider failed)
+        """
+        completed = 0
+
+        async def run(i: int, chunk: str) -> Optional[str]:
+            nonlocal completed
+            result = await self.chat(system_prompt, chunk, temperature,
+                                     label=f"chunk {i + 1}/{len(chunks)}", api_keys=api_keys)
+            completed += 1
+            if on_chunk_done:
+                try:
+                    await on_chunk_done(completed, len(chunks))
+                except Exception as e:
+                    print(f"Chunk progress callback error: {e}")
+            return result
+
+        return list(await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks))))
+
+    def summary(self) -> str:
+        """Human-readable per-provider stats"""
+        def fmt(seconds):
+            return f"{seconds:.1f}s" if seconds is not None else "-"
+
+        lines = []
+        for provider in self.providers:
+            stats = provider.stats
+            if time.monotonic() < stats.benched_until:
+                state = "🚫 benched"
+            elif self.is_healthy(provider):
+                state = "✅ healthy"
+            else:
+                state = "⚠️ degraded"
+            key = "" if provider.get_api_key() else " (no API key)"
+            lines.append(
+                f"{provider.label}{key} - {state}\n"
+                f"   p50 {fmt(stats.p50)} / p95 {fmt(stats.p95)}, "
+                f"errors {stats.error_rate:.0%} of {len(stats.outcomes)}, "
+                f"in flight {stats.in_flight}, hedges won {stats.hedges_won}"
+            )
+        return "\n".join(lines)
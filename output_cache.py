@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+TTS Output Cache
+================
+Content-addressed cache of finished audio (raw + enhanced WAVs):
+- Key: normalized script text + reference audio hash + synthesis parameters
+- Resubmitted scripts (channel re-runs, duplicate uploads) are served from
+  disk instead of being re-synthesized
+- Size-bounded, least-recently-used entries are evicted first
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from typing import Dict, List, Optional
+
+
+def normalize_script(text: str) -> str:
+    """Collapse whitespace so trivially different uploads share a cache entry"""
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class OutputCache:
+    """LRU cache of final audio files, bounded by total size on disk"""
+
+    def __init__(self, root: str = "output_cache", max_bytes: int = 10 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._sizes: Dict[str, int] = {}
+        for key in os.listdir(root):
+            entry = os.path.join(root, key)
+            if key.endswith(".tmp"):
+                shutil.rmtree(entry, ignore_errors=True)  # interrupted put()
+            elif os.path.isdir(entry):
+                self._sizes[key] = self._dir_size(entry)
+
+    @staticmethod
+    def make_key(script_text: str, ref_hash: str, **params) -> str:
+        """Key from normalized script, reference hash and synthesis parameters"""
+        payload = json.dumps({
+            'script': normalize_script(script_text),
+            'ref': ref_hash,
+            'params': params,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, key: str, base_output_path: str) -> Optional[List[str]]:
+        """
+        Copy a cached entry to <base_output_path><suffix> for every cached variant.
+
+        Returns:
+            List of output file paths (raw first), or None on a miss
+        """
+        entry = os.path.join(self.root, key)
+        if key not in self._sizes or not os.path.isdir(entry):
+            return None
+
+        try:
+            with open(os.path.join(entry, "manifest.json"), 'r') as f:
+                suffixes = json.load(f)['suffixes']
+            output_files = []
+            for i, suffix in enumerate(suffixes):
+                dest = f"{base_output_path}{suffix}"
+                shutil.copyfile(os.path.join(entry, f"{i}.wav"), dest)
+                output_files.append(dest)
+        except Exception as e:
+            print(f"⚠️ Output cache entry unreadable, dropping: {e}")
+            self._remove(key)
+            return None
+
+        os.utime(entry)  # mark as recently used
+        return output_files
+
+    def put(self, key: str, base_output_path: str, output_files: List[str]) -> bool:
+        """Store the finished variants (<base_output_path><suffix>) under key"""
+        entry = os.path.join(self.root, key)
+        tmp_entry = f"{entry}.tmp"
+        try:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            os.makedirs(tmp_entry)
+            suffixes = []
+            for path in output_files:
+                if not path.startswith(base_output_path) or not os.path.exists(path):
+                    continue
+                shutil.copyfile(path, os.path.join(tmp_entry, f"{len(suffixes)}.wav"))
+                suffixes.append(path[len(base_output_path):])
+            if not suffixes:
+                shutil.rmtree(tmp_entry, ignore_errors=True)
+                return False
+            with open(os.path.join(tmp_entry, "manifest.json"), 'w') as f:
+                json.dump({'suffixes': suffixes, 'created_at': time.time()}, f)
+
+            self._remove(key)
+            os.replace(tmp_entry, entry)
+            self._sizes[key] = self._dir_size(entry)
+        except Exception as e:
+            print(f"⚠️ Output cache store failed: {e}")
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return False
+
+        self._evict()
+        return True
+
+    def clear(self):
+        for key in list(self._sizes):
+            self._remove(key)
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        by_age = sorted(self._sizes, key=self._last_used)
+        for key in by_age:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+            print(f"🗑️ Output cache evicted {key[:12]}")
+
+    def _last_used(self, key: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(self.root, key))
+        except OSError:
+            return 0.0
+
+    def _remove(self, key: str):
+        shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+        self._sizes.pop(key, None)
+
+    @staticmethod
+    def _dir_size(path: str) -> int:
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+LLM Rewrite Cache
+=================
+Persistent cache of LLM chunk rewrites so re-runs (channel re-processing,
+retries after TTS failures) don't pay again for identical requests:
+- Key: hash of system prompt + model + temperature + chunk text
+- Local SQLite store with TTL and total-size eviction (least recently used)
+- Optional Supabase mirror (llm_rewrite_cache table) shared across instances;
+  coroutines use get_async/put_async so mirror round trips never block the loop
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional, Set
+
+
+class RewriteCache:
+    """SQLite-backed (prompt, model, temperature, chunk) -> rewrite cache"""
+
+    def __init__(self, db_path: str = "rewrite_cache.db", ttl_days: float = 30,
+                 max_bytes: int = 200 * 1024 * 1024, mirror=None):
+        """
+        Args:
+            db_path: SQLite file holding the cache
+            ttl_days: Entries older than this are treated as misses and purged
+            max_bytes: Total size of cached results before LRU eviction
+            mirror: Optional object with get_rewrite(key) / store_rewrite(key, result)
+                    (e.g. SupabaseClient)
+        """
+        self.ttl_seconds = ttl_days * 86400
+        self.max_bytes = max_bytes
+        self.mirror = mirror
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._mirror_tasks: Set[asyncio.Task] = set()  # background mirror stores (put_async)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rewrites (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_rewrites_last_used ON rewrites (last_used)")
+        self.purge_expired()
+
+    @staticmethod
+    def make_key(system_prompt: str, model: str, temperature: float, text: str) -> str:
+        payload = json.dumps([system_prompt, model, round(float(temperature), 4), text])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached rewrite or None (checks the mirror on a local miss - blocking, see get_async)"""
+        result = self._get_local(key)
+        if result is None and self.mirror:
+            result = self._get_mirror(key)
+        return self._count(result)
+
+    async def get_async(self, key: str) -> Optional[str]:
+        """get() for coroutines: the SQLite read stays inline, the mirror lookup runs in a thread"""
+        result = self._get_local(key)
+        if result is None and self.mirror:
+            result = await asyncio.to_thread(self._get_mirror, key)
+        return self._count(result)
+
+    def put(self, key: str, result: str):
+        if not result:
+            return
+        self._store_local(key, result)
+        if self.mirror:
+            self._put_mirror(key, result)
+
+    async def put_async(self, key: str, result: str):
+        """put() for coroutines: stored locally now, mirrored by a background task"""
+        if not result:
+            return
+        self._store_local(key, result)
+        if self.mirror:
+            task = asyncio.create_task(asyncio.to_thread(self._put_mirror, key, result))
+            self._mirror_tasks.add(task)
+            task.add_done_callback(self._mirror_tasks.discard)
+
+    def _count(self, result: Optional[str]) -> Optional[str]:
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def _get_local(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result, created_at FROM rewrites WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                self._conn.execute("UPDATE rewrites SET last_used = ? WHERE key = ?", (now, key))
+                return row[0]
+        return None
+
+    def _get_mirror(self, key: str) -> Optional[str]:
+        try:
+            result = self.mirror.get_rewrite(key, max_age_days=self.ttl_seconds / 86400)
+        except Exception as e:
+            print(f"⚠️ Rewrite cache mirror lookup failed: {e}")
+            return None
+        if not result:
+            return None
+        self._store_local(key, result)
+        return result
+
+    def _put_mirror(self, key: str, result: str):
+        try:
+            self.mirror.store_rewrite(key, result)
+        except Exception as e:
+            print(f"⚠️ Rewrite cache mirror store failed: {e}")
+
+    def _store_local(self, key: str, result: str):
+        now = time.time()
+        size = len(result.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rewrites (key, result, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, result, size, now, now)
+            )
+        self._evict()
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM rewrites WHERE created_at < ?", (cutoff,))
+        return cur.rowcount
+
+    def _evict(self):
+        """Drop least recently used entries until total size <= max_bytes"""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM rewrites").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            rows = self._conn.execute("SELECT key, size FROM rewrites ORDER BY last_used").fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM rewrites WHERE key = ?", doomed)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
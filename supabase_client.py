@@ -89,10 +89,25 @@ CREATE TABLE IF NOT EXISTS youtube_channels (
     channel_url TEXT NOT NULL UNIQUE,
     channel_id TEXT NOT NULL,
     channel_name TEXT,
-    videos_json JSONB,  -- Top 1000 videos cache
+    videos_json JSONB,  -- Legacy video cache (only used until youtube_channel_videos exists)
     last_updated TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- YouTube Channel Videos (one row per video; selection runs as an indexed query)
+CREATE TABLE IF NOT EXISTS youtube_channel_videos (
+    channel_id TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    title TEXT,
+    published_at TIMESTAMPTZ,
+    view_count BIGINT DEFAULT 0,
+    duration INTEGER DEFAULT 0,  -- seconds
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (channel_id, video_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_channel_videos_views ON youtube_channel_videos (channel_id, view_count DESC);
+CREATE INDEX IF NOT EXISTS idx_channel_videos_duration ON youtube_channel_videos (channel_id, duration);
+
 -- Processed Videos Table
 CREATE TABLE IF NOT EXISTS processed_videos (
     id BIGSERIAL PRIMARY KEY,
@@ -166,6 +181,40 @@ CREATE TABLE IF NOT EXISTS default_reference_audio (
     uploaded_at TIMESTAMPTZ DEFAULT NOW(),
     CHECK (id = 1)  -- Ensure only one row (single master reference)
 );
+
+-- TTS Job Queue Mirror (optional, local SQLite queue is the source of truth)
+CREATE TABLE IF NOT EXISTS tts_jobs (
+    job_id BIGINT PRIMARY KEY,
+    filename TEXT,
+    state TEXT NOT NULL CHECK (state IN ('queued', 'running', 'done', 'failed')),
+    error TEXT,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- LLM Rewrite Cache Mirror (optional, shared across instances)
+CREATE TABLE IF NOT EXISTS llm_rewrite_cache (
+    cache_key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- YouTube Transcript Cache Mirror (optional, shared across instances)
+CREATE TABLE IF NOT EXISTS youtube_transcripts (
+    video_id TEXT NOT NULL,
+    lang TEXT NOT NULL DEFAULT 'auto',
+    transcript TEXT NOT NULL,
+    fetched_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (video_id, lang)
+);
+
+-- YouTube Channel Resolution Cache Mirror (URL key -> channel, skips search().list)
+CREATE TABLE IF NOT EXISTS youtube_channel_handles (
+    handle_key TEXT PRIMARY KEY,
+    channel_id TEXT NOT NULL,
+    channel_name TEXT,
+    uploads_playlist_id TEXT,
+    resolved_at TIMESTAMPTZ DEFAULT NOW()
+);
 """
 
     # =============================================================================
@@ -272,21 +321,26 @@ CREATE TABLE IF NOT EXISTS default_reference_audio (
 
     def store_youtube_channel(self, channel_url: str, channel_id: str,
                               channel_name: str, videos: List[Dict]) -> bool:
-        """Store or update YouTube channel with top 1000 videos"""
+        """
+        Store or update YouTube channel with top 1000 videos.
+        Videos go to youtube_channel_videos; the legacy videos_json blob is only
+        written when that table is not available.
+        """
         if not self.is_connected():
             return False
 
         try:
+            normalized = self.store_channel_videos(channel_id, videos)
             data = {
                 'channel_url': channel_url,
                 'channel_id': channel_id,
                 'channel_name': channel_name,
-                'videos_json': json.dumps(videos),
+                'videos_json': None if normalized else json.dumps(videos),
                 'last_updated': datetime.now().isoformat()
             }
 
             # Upsert (insert or update)
-            self.client.table('youtube_channels').upsert(data).execute()
+            self.client.table('youtube_channels').upsert(data, on_conflict='channel_url').execute()
             print(f"✅ Channel cached: {channel_name} ({len(videos)} videos)")
             return True
         except Exception as e:
@@ -294,7 +348,11 @@ CREATE TABLE IF NOT EXISTS default_reference_audio (
             return False
 
     def get_youtube_channel(self, channel_url: str) -> Optional[Dict]:
-        """Get cached YouTube channel data"""
+        """
+        Get cached YouTube channel data.
+        'videos' is only present for channels still cached in the legacy
+        videos_json blob; otherwise query youtube_channel_videos.
+        """
         if not self.is_connected():
             return None
 
@@ -308,13 +366,123 @@ CREATE TABLE IF NOT EXISTS default_reference_audio (
                 channel = result.data[0]
                 # Parse videos JSON
                 if channel.get('videos_json'):
-                    channel['videos'] = json.loads(channel['videos_json'])
+                    videos_json = channel['videos_json']
+                    channel['videos'] = json.loads(videos_json) if isinstance(videos_json, str) else videos_json
                 return channel
             return None
         except Exception as e:
             print(f"❌ Error getting channel: {e}")
             return None
 
+    def store_channel_videos(self, channel_id: str, videos: List[Dict]) -> bool:
+        """Replace a channel's video rows (upsert in batches, then drop videos no longer listed)"""
+        if not self.is_connected():
+            return False
+
+        try:
+            now = datetime.now().isoformat()
+            rows = [{
+                'channel_id': channel_id,
+                'video_id': v['video_id'],
+                'title': v.get('title'),
+                'published_at': v.get('published_at'),
+                'view_count': v.get('view_count', 0),
+                'duration': v.get('duration', 0),
+                'updated_at': now
+            } for v in videos]
+
+            for i in range(0, len(rows), 500):
+                self.client.table('youtube_channel_videos').upsert(rows[i:i + 500]).execute()
+
+            # Rows not touched by this store were deleted/privated or fell out of the list
+            self.client.table('youtube_channel_videos')\
+                .delete()\
+                .eq('channel_id', channel_id)\
+                .lt('updated_at', now)\
+                .execute()
+            return True
+        except Exception as e:
+            print(f"❌ Error storing channel videos: {e}")
+            return False
+
+    @staticmethod
+    def _video_from_row(row: Dict) -> Dict:
+        row['url'] = f"https://www.youtube.com/watch?v={row['video_id']}"
+        return row
+
+    def get_channel_videos(self, channel_id: str) -> List[Dict]:
+        """All cached videos of a channel, highest views first (for incremental refresh)"""
+        if not self.is_connected():
+            return []
+
+        try:
+            videos = []
+            page_size = 1000  # PostgREST default max rows per response
+            while True:
+                result = self.client.table('youtube_channel_videos')\
+                    .select('video_id, title, published_at, view_count, duration')\
+                    .eq('channel_id', channel_id)\
+                    .order('view_count', desc=True)\
+                    .range(len(videos), len(videos) + page_size - 1)\
+                    .execute()
+                rows = result.data or []
+                videos.extend(self._video_from_row(row) for row in rows)
+                if len(rows) < page_size:
+                    return videos
+        except Exception as e:
+            print(f"❌ Error getting channel videos: {e}")
+            return []
+
+    def count_channel_videos(self, channel_id: str, min_duration_sec: int = 0) -> int:
+        """Number of cached videos of a channel at least min_duration_sec long"""
+        if not self.is_connected():
+            return 0
+
+        try:
+            result = self.client.table('youtube_channel_videos')\
+                .select('video_id', count='exact')\
+                .eq('channel_id', channel_id)\
+                .gte('duration', min_duration_sec)\
+                .limit(1)\
+                .execute()
+            return result.count or 0
+        except Exception as e:
+            print(f"❌ Error counting channel videos: {e}")
+            return 0
+
+    def get_top_channel_videos(self, channel_id: str, count: int = 6,
+                               min_duration_sec: int = 600, days: int = 15) -> List[Dict]:
+        """
+        Top videos by views that are long enough and not processed in the last N days,
+        selected in the database (only `count` rows are downloaded).
+        """
+        if not self.is_connected():
+            return []
+
+        try:
+            cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
+            recent = self.client.table('processed_videos')\
+                .select('video_id')\
+                .eq('channel_id', channel_id)\
+                .gte('processed_date', cutoff_date)\
+                .execute()
+            recent_ids = list({row['video_id'] for row in recent.data}) if recent.data else []
+
+            query = self.client.table('youtube_channel_videos')\
+                .select('video_id, title, published_at, view_count, duration')\
+                .eq('channel_id', channel_id)\
+                .gte('duration', min_duration_sec)
+            if recent_ids:
+                query = query.not_.in_('video_id', recent_ids)
+            result = query.order('view_count', desc=True).limit(count).execute()
+
+            videos = [self._video_from_row(row) for row in result.data or []]
+            print(f"✅ Selected {len(videos)}/{count} unique videos ({len(recent_ids)} on cooldown)")
+            return videos
+        except Exception as e:
+            print(f"❌ Error selecting channel videos: {e}")
+            return []
+
     def mark_video_processed(self, video_id: str, video_url: str, channel_id: str,
                             chat_id: str, audio_counter: int) -> bool:
         """Mark a video as processed"""
@@ -555,6 +723,141 @@ CREATE TABLE IF NOT EXISTS default_reference_audio (
             print(f"❌ Error deleting audio link: {e}")
             return False
 
+    # =============================================================================
+    # TTS JOB QUEUE MIRROR
+    # =============================================================================
+
+    def upsert_queue_job(self, job: Dict[str, Any]) -> bool:
+        """Mirror a local queue job's state (job_id, state, filename, error)"""
+        if not self.is_connected():
+            return False
+
+        try:
+            row = dict(job)
+            row['updated_at'] = datetime.now().isoformat()
+            self.client.table('tts_jobs').upsert(row).execute()
+            return True
+        except Exception as e:
+            print(f"❌ Error mirroring queue job: {e}")
+            return False
+
+    # =============================================================================
+    # LLM REWRITE CACHE MIRROR
+    # =============================================================================
+
+    def get_rewrite(self, cache_key: str, max_age_days: float = 30) -> Optional[str]:
+        """Get a cached LLM rewrite if it is newer than max_age_days"""
+        if not self.is_connected():
+            return None
+
+        try:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+            result = self.client.table('llm_rewrite_cache')\
+                .select('result')\
+                .eq('cache_key', cache_key)\
+                .gte('created_at', cutoff)\
+                .limit(1)\
+                .execute()
+
+            return result.data[0]['result'] if result.data else None
+        except Exception as e:
+            print(f"❌ Error fetching cached rewrite: {e}")
+            return None
+
+    def store_rewrite(self, cache_key: str, result_text: str) -> bool:
+        """Store an LLM rewrite in the shared cache"""
+        if not self.is_connected():
+            return False
+
+        try:
+            self.client.table('llm_rewrite_cache').upsert({
+                'cache_key': cache_key,
+                'result': result_text,
+                'created_at': datetime.now().isoformat()
+            }).execute()
+            return True
+        except Exception as e:
+            print(f"❌ Error storing cached rewrite: {e}")
+            return False
+
+    # =============================================================================
+    # YOUTUBE TRANSCRIPT CACHE MIRROR
+    # =============================================================================
+
+    def get_transcript(self, video_id: str, lang: str = "auto", max_age_days: float = 90) -> Optional[str]:
+        """Get a cached transcript if it was fetched within max_age_days"""
+        if not self.is_connected():
+            return None
+
+        try:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+            result = self.client.table('youtube_transcripts')\
+                .select('transcript')\
+                .eq('video_id', video_id)\
+                .eq('lang', lang)\
+                .gte('fetched_at', cutoff)\
+                .limit(1)\
+                .execute()
+
+            return result.data[0]['transcript'] if result.data else None
+        except Exception as e:
+            print(f"❌ Error fetching cached transcript: {e}")
+            return None
+
+    def store_transcript(self, video_id: str, lang: str, transcript: str) -> bool:
+        """Store a transcript in the shared cache"""
+        if not self.is_connected():
+            return False
+
+        try:
+            self.client.table('youtube_transcripts').upsert({
+                'video_id': video_id,
+                'lang': lang,
+                'transcript': transcript,
+                'fetched_at': datetime.now().isoformat()
+            }).execute()
+            return True
+        except Exception as e:
+            print(f"❌ Error storing cached transcript: {e}")
+            return False
+
+    def get_channel_resolution(self, handle_key: str) -> Optional[Dict]:
+        """Get a resolved channel (channel_id, channel_name, uploads_playlist_id) by URL key"""
+        if not self.is_connected():
+            return None
+
+        try:
+            result = self.client.table('youtube_channel_handles')\
+                .select('channel_id, channel_name, uploads_playlist_id')\
+                .eq('handle_key', handle_key)\
+                .limit(1)\
+                .execute()
+
+            return result.data[0] if result.data else None
+        except Exception as e:
+            print(f"❌ Error fetching channel resolution: {e}")
+            return None
+
+    def store_channel_resolution(self, handle_key: str, channel_id: str,
+                                 channel_name: Optional[str] = None,
+                                 uploads_playlist_id: Optional[str] = None) -> bool:
+        """Store a resolved channel for its URL key"""
+        if not self.is_connected():
+            return False
+
+        try:
+            self.client.table('youtube_channel_handles').upsert({
+                'handle_key': handle_key,
+                'channel_id': channel_id,
+                'channel_name': channel_name,
+                'uploads_playlist_id': uploads_playlist_id,
+                'resolved_at': datetime.now().isoformat()
+            }).execute()
+            return True
+        except Exception as e:
+            print(f"❌ Error storing channel resolution: {e}")
+            return False
+
     # =============================================================================
     # DIRECT SCRIPT RAW AUDIO STORAGE (Supabase Storage Integration)
     # =============================================================================
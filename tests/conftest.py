@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Modules live at the repository root (no package)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class Mirror:
+    """In-memory stand-in for the Supabase mirror of the channel, rewrite and transcript caches"""
+
+    def __init__(self):
+        self.rows = {}
+        self.lookups = []
+
+    def _get(self, key, max_age_days=None):
+        self.lookups.append((key, max_age_days))
+        return self.rows.get(key)
+
+    def get_channel_resolution(self, key):
+        return self._get(key)
+
+    def store_channel_resolution(self, key, channel_id, channel_name, uploads_playlist_id):
+        self.rows[key] = {'channel_id': channel_id, 'channel_name': channel_name,
+                          'uploads_playlist_id': uploads_playlist_id}
+
+    def get_rewrite(self, key, max_age_days=None):
+        return self._get(key, max_age_days)
+
+    def store_rewrite(self, key, result):
+        self.rows[key] = result
+
+    def get_transcript(self, video_id, lang, max_age_days=None):
+        return self._get((video_id, lang), max_age_days)
+
+    def store_transcript(self, video_id, lang, text):
+        self.rows[(video_id, lang)] = text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.time() for TTL and LRU checks"""
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def mirror():
+    return Mirror()
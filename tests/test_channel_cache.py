@@ -0,0 +1,86 @@
+from channel_cache import ChannelResolutionCache, channel_cache_key
+from youtube_processor import YouTubeChannelProcessor
+
+
+def test_channel_cache_key():
+    assert channel_cache_key("https://www.youtube.com/channel/UCAbC-123") == "id:UCAbC-123"
+    assert channel_cache_key("https://youtube.com/@Some.Name/videos") == "handle:some.name"
+    assert channel_cache_key("https://youtube.com/c/MyChannel") == "c:mychannel"
+    assert channel_cache_key("https://youtube.com/user/OldName") == "user:oldname"
+    assert channel_cache_key("https://example.com/watch") is None
+
+
+def test_put_get_and_persistence(tmp_path, clock):
+    cache = ChannelResolutionCache(str(tmp_path / "channels.json"))
+    assert cache.get("handle:x") is None
+    cache.put("handle:x", "UC1", "Channel X", "UU1")
+    cache.put("handle:none", "")  # nothing resolved: not stored
+    entry = cache.get("handle:x")
+    assert (entry['channel_id'], entry['channel_name'], entry['uploads_playlist_id']) == ("UC1", "Channel X", "UU1")
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    reopened = ChannelResolutionCache(str(tmp_path / "channels.json"))
+    assert reopened.get("handle:x")['channel_id'] == "UC1"
+    assert reopened.get("handle:none") is None
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = ChannelResolutionCache(str(tmp_path / "channels.json"), ttl_days=180)
+    cache.put("handle:x", "UC1")
+    clock.now += 180 * 86400
+    assert cache.get("handle:x") is not None
+    clock.now += 1
+    assert cache.get("handle:x") is None
+
+
+def test_expired_entry_is_refreshed_from_mirror(tmp_path, clock, mirror):
+    cache = ChannelResolutionCache(str(tmp_path / "channels.json"), ttl_days=1, mirror=mirror)
+    cache.put("handle:x", "UC1", "Old name")
+    assert mirror.rows["handle:x"]['channel_id'] == "UC1"
+
+    clock.now += 2 * 86400
+    mirror.rows["handle:x"] = {'channel_id': "UC1", 'channel_name': "New name", 'uploads_playlist_id': "UU1"}
+    entry = cache.get("handle:x")
+    assert entry['channel_name'] == "New name"
+    assert entry['resolved_at'] == clock.now  # fresh again locally
+
+
+def test_unreadable_file_and_failing_mirror(tmp_path, clock):
+    (tmp_path / "channels.json").write_text("{not json")
+
+    class BrokenMirror:
+        def get_channel_resolution(self, key):
+            raise RuntimeError("supabase down")
+
+        def store_channel_resolution(self, *args):
+            raise RuntimeError("supabase down")
+
+    cache = ChannelResolutionCache(str(tmp_path / "channels.json"), mirror=BrokenMirror())
+    assert cache.get("handle:x") is None
+    cache.put("handle:x", "UC1")
+    assert cache.get("handle:x")['channel_id'] == "UC1"
+
+
+def search_processor(tmp_path, custom_url):
+    """Processor whose handle lookup finds nothing, so resolution falls back to search"""
+    responses = {
+        'search.list': {'items': [{'snippet': {'channelId': "UC1", 'title': "Some Channel"}}]},
+        'channels.list': {'items': [{'id': "UC1", 'snippet': {'title': "Some Channel", 'customUrl': custom_url}}]},
+    }
+    processor = YouTubeChannelProcessor(channel_cache=ChannelResolutionCache(str(tmp_path / "channels.json")))
+    processor.youtube = object()
+    processor._list_channel = lambda **lookup: None
+    processor._execute = lambda endpoint, build_request: responses[endpoint]
+    return processor
+
+
+def test_exact_search_match_is_cached(tmp_path, clock):
+    processor = search_processor(tmp_path, "@somechannel")
+    assert processor.resolve_channel("https://youtube.com/@SomeChannel")['channel_id'] == "UC1"
+    assert processor.channel_cache.get("handle:somechannel")['channel_id'] == "UC1"
+
+
+def test_closest_search_match_is_not_cached(tmp_path, clock):
+    processor = search_processor(tmp_path, "@somechannel1111")
+    assert processor.resolve_channel("https://youtube.com/@SomeChannel")['channel_id'] == "UC1"
+    assert processor.channel_cache.get("handle:somechannel") is None
@@ -0,0 +1,86 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from f5_engine import ChunkCheckpoints, iter_checkpointed_chunks  # noqa: E402
+
+CHUNKS = ["First chunk.", "Second chunk.", "Third chunk.", "Fourth chunk."]
+
+
+def wave_for(text):
+    return np.full(len(text), len(text) / 100, dtype=np.float32)
+
+
+class StubSynth:
+    """Records which chunk texts it was asked for; optionally fails after N chunks"""
+
+    def __init__(self, fail_after=None):
+        self.requested = []
+        self.fail_after = fail_after
+
+    def __call__(self, texts):
+        self.requested.append(list(texts))
+        for local_index, text in enumerate(texts):
+            if self.fail_after is not None and local_index == self.fail_after:
+                raise RuntimeError("CUDA out of memory")
+            yield local_index, wave_for(text)
+
+
+def make(tmp_path, script="script", **params):
+    params = {'speed': 0.8, 'nfe_step': 32, 'cfg_strength': 1.5, **params}
+    return ChunkCheckpoints(str(tmp_path), script, "refhash", **params)
+
+
+def test_rerun_synthesizes_only_missing_chunks(tmp_path):
+    first = StubSynth(fail_after=2)
+    with pytest.raises(RuntimeError):
+        for _ in iter_checkpointed_chunks(make(tmp_path), CHUNKS, first):
+            pass
+    assert make(tmp_path).count(CHUNKS) == 2
+
+    second = StubSynth()
+    results = list(iter_checkpointed_chunks(make(tmp_path), CHUNKS, second))
+    assert second.requested == [CHUNKS[2:]]
+    assert [i for i, _ in results] == [0, 1, 2, 3]
+    for (_, wave), text in zip(results, CHUNKS):
+        np.testing.assert_array_equal(wave, wave_for(text))
+
+
+def test_complete_job_needs_no_synthesis(tmp_path):
+    list(iter_checkpointed_chunks(make(tmp_path), CHUNKS, StubSynth()))
+    again = StubSynth()
+    assert len(list(iter_checkpointed_chunks(make(tmp_path), CHUNKS, again))) == 4
+    assert again.requested == []
+
+
+def test_changed_chunk_text_or_params_are_not_reused(tmp_path):
+    list(iter_checkpointed_chunks(make(tmp_path), CHUNKS, StubSynth()))
+
+    edited = CHUNKS[:1] + ["Second chunk, edited."] + CHUNKS[2:]
+    synth = StubSynth()
+    list(iter_checkpointed_chunks(make(tmp_path), edited, synth))
+    assert synth.requested == [["Second chunk, edited."]]
+
+    assert make(tmp_path, speed=1.0).count(CHUNKS) == 0
+    assert make(tmp_path, script="other script").count(CHUNKS) == 0
+
+
+def test_clear_and_purge(tmp_path):
+    done = make(tmp_path, script="done")
+    list(iter_checkpointed_chunks(done, CHUNKS, StubSynth()))
+    done.clear()
+    assert not os.path.exists(done.dir)
+
+    stale = make(tmp_path, script="stale")
+    recent = make(tmp_path, script="recent")
+    past = time.time() - 4 * 86400
+    os.utime(stale.dir, (past, past))
+
+    assert ChunkCheckpoints.purge(str(tmp_path), older_than_days=3) == 1
+    assert not os.path.exists(stale.dir)
+    assert os.path.exists(recent.dir)
+    assert ChunkCheckpoints.purge(str(tmp_path / "missing")) == 0
@@ -0,0 +1,85 @@
+import re
+
+import pytest
+
+from chunk_planner import DEFAULT_LIMITS, ChunkPlanner, model_limits
+
+
+def split_text(text, max_length):
+    chunks = []
+    current = ""
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        if len(current) + len(sentence) > max_length and current:
+            chunks.append(current.strip())
+            current = sentence
+        else:
+            current += " " + sentence if current else sentence
+    if current:
+        chunks.append(current.strip())
+    return chunks
+
+
+def make_planner(**kwargs):
+    kwargs.setdefault("latency_target", 10_000)  # latency never binds unless a test wants it
+    kwargs.setdefault("output_ratio", 1.0)
+    kwargs.setdefault("min_chars", 100)
+    return ChunkPlanner(**kwargs)
+
+
+def test_model_limits_strip_vendor_prefix():
+    assert model_limits("deepseek/deepseek-chat") == model_limits("deepseek-chat")
+    assert model_limits("anthropic/claude-3.5-sonnet:beta")["output"] == 8192
+    assert model_limits("unknown-model") == DEFAULT_LIMITS
+
+
+def test_output_limit_bounds_chunk_size():
+    planner = make_planner()
+    # 4096 output tokens * 0.8 safety / ratio 1.0 * 4 chars per token
+    assert planner.max_chunk_chars("deepseek-chat") == int(4096 * 0.8 * 4)
+    assert planner.max_chunk_chars("gpt-4o") > planner.max_chunk_chars("deepseek-chat")
+
+
+def test_latency_target_and_minimum():
+    planner = make_planner(latency_target=10)
+    # 10s * 25 tokens/s prior * 4 chars per token
+    assert planner.max_chunk_chars("deepseek-chat") == 1000
+    assert make_planner(latency_target=1, min_chars=500).max_chunk_chars("deepseek-chat") == 500
+
+
+def test_calibration_from_usage():
+    planner = make_planner()
+    planner.record("m", {"prompt_tokens": 1000, "completion_tokens": 500}, prompt_chars=3000, seconds=10)
+    assert planner.chars_per_token("m") == pytest.approx(3.0)
+    assert planner.tokens_per_sec("m") == pytest.approx(50.0)
+    planner.record("m", {"prompt_tokens": 1000, "completion_tokens": 500}, prompt_chars=5000, seconds=10)
+    assert planner.chars_per_token("m") == pytest.approx(3.0 + 0.3 * 2.0)  # moving average
+    planner.record("m", {"prompt_tokens": 10, "completion_tokens": 10}, prompt_chars=1000, seconds=1)
+    assert planner.chars_per_token("m") == pytest.approx(3.6)  # tiny requests are ignored
+    assert planner.estimate_tokens("x" * 36, "m") == 10
+
+
+def test_plan_short_text_is_one_chunk():
+    planner = make_planner()
+    assert planner.plan("  Short text.  ", ["deepseek-chat"], split_text) == ["Short text."]
+    assert planner.plan("   ", ["deepseek-chat"], split_text) == []
+
+
+def test_plan_uses_fewest_evenly_sized_chunks():
+    planner = make_planner()
+    text = " ".join(f"This is sentence {i} of the transcript." for i in range(400))
+    limit = 3000
+    chunks = planner.plan(text, ["deepseek-chat", "gpt-4o"], split_text, max_chars=limit)
+    expected_count = -(-len(text) // limit)
+    assert len(chunks) == expected_count
+    assert all(len(chunk) <= limit for chunk in chunks)
+    sizes = [len(chunk) for chunk in chunks[:-1]]
+    assert max(sizes) - min(sizes) < 100
+    assert " ".join(chunks) == text
+
+
+def test_tightest_model_decides():
+    planner = make_planner()
+    text = " ".join(f"This is sentence {i} of the transcript." for i in range(1000))
+    tight = planner.plan(text, ["deepseek-chat", "gpt-4o"], split_text)
+    assert all(len(chunk) <= planner.max_chunk_chars("deepseek-chat") for chunk in tight)
+    assert len(planner.plan(text, ["gpt-4o"], split_text)) < len(tight)
@@ -0,0 +1,119 @@
+import threading
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, PersistentJobQueue
+
+
+def make_queue(tmp_path, **kwargs):
+    return PersistentJobQueue(str(tmp_path / "queue.db"), **kwargs)
+
+
+def test_fifo_order_and_length(tmp_path):
+    queue = make_queue(tmp_path)
+    assert not queue
+    first = queue.append({'filename': 'a.txt', 'text': 'one'})
+    queue.append({'filename': 'b.txt', 'text': 'two'})
+    assert len(queue) == 2
+
+    item = queue.pop_next()
+    assert item['job_id'] == first
+    assert item['filename'] == 'a.txt' and item['text'] == 'one'
+    assert len(queue) == 1
+    assert queue.pop_next()['filename'] == 'b.txt'
+    assert queue.pop_next() is None
+
+
+def test_peek_does_not_claim(tmp_path):
+    queue = make_queue(tmp_path)
+    for name in ('a', 'b', 'c'):
+        queue.append({'filename': name})
+    assert [item['filename'] for item in queue.peek(2)] == ['a', 'b']
+    assert len(queue) == 3
+
+
+def test_states_and_counts(tmp_path):
+    queue = make_queue(tmp_path)
+    for name in ('a', 'b', 'c'):
+        queue.append({'filename': name})
+    done = queue.pop_next()['job_id']
+    failed = queue.pop_next()['job_id']
+    queue.mark_done(done)
+    queue.mark_failed(failed, "boom")
+    assert queue.counts() == {DONE: 1, FAILED: 1, QUEUED: 1}
+
+
+def test_interrupted_jobs_survive_restart(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.append({'filename': 'a'})
+    queue.append({'filename': 'b'})
+    queue.pop_next()  # crash while 'a' is running
+    queue.close()
+
+    restarted = make_queue(tmp_path)
+    assert len(restarted) == 1
+    assert restarted.requeue_interrupted() == 1
+    assert len(restarted) == 2
+    assert restarted.pop_next()['filename'] == 'a'
+
+
+def test_clear_marks_queued_jobs_failed(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.append({'filename': 'a'})
+    queue.pop_next()
+    queue.append({'filename': 'b'})
+    queue.append({'filename': 'c'})
+    assert queue.clear() == 2
+    assert not queue
+    counts = queue.counts()
+    assert counts[FAILED] == 2 and counts[RUNNING] == 1
+
+
+def test_purge_finished_keeps_recent_and_active_jobs(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.append({'filename': 'a'})
+    queue.append({'filename': 'b'})
+    queue.mark_done(queue.pop_next()['job_id'])
+    assert queue.purge_finished(older_than_days=1) == 0
+    assert queue.purge_finished(older_than_days=-1) == 1
+    assert queue.counts() == {QUEUED: 1}
+
+
+def test_mirror_gets_state_changes_and_errors_are_contained(tmp_path):
+    class Mirror:
+        def __init__(self):
+            self.rows = []
+
+        def upsert_queue_job(self, row):
+            self.rows.append(row)
+            if row['state'] == DONE:
+                raise RuntimeError("supabase down")
+
+    mirror = Mirror()
+    queue = make_queue(tmp_path, mirror=mirror)
+    job_id = queue.append({'filename': 'a'})
+    queue.pop_next()
+    queue.mark_done(job_id)
+    queue.flush_mirror()
+    assert [row['state'] for row in mirror.rows] == [QUEUED, RUNNING, DONE]
+    assert mirror.rows[0]['filename'] == 'a'
+
+
+def test_slow_mirror_does_not_block_queue_operations(tmp_path):
+    release = threading.Event()
+
+    class SlowMirror:
+        def __init__(self):
+            self.rows = []
+
+        def upsert_queue_job(self, row):
+            release.wait(5)
+            self.rows.append(row)
+
+    mirror = SlowMirror()
+    queue = make_queue(tmp_path, mirror=mirror)
+    job_id = queue.append({'filename': 'a'})
+    queue.pop_next()
+    queue.mark_failed(job_id, "boom")
+    assert mirror.rows == []  # every call returned while the mirror was stuck
+    release.set()
+    queue.flush_mirror()
+    assert [(row['state'], row['error']) for row in mirror.rows] == [(QUEUED, None), (RUNNING, None), (FAILED, "boom")]
@@ -0,0 +1,133 @@
+import asyncio
+
+from llm_router import LLMProvider, LLMRouter
+
+
+class StubClient:
+    """Stands in for AsyncLLMClient: answers after `delay` seconds"""
+
+    def __init__(self, model, result="ok", delay=0.0, max_in_flight=4, gate=None):
+        self.model = model
+        self.cache = None
+        self.max_in_flight = max_in_flight
+        self.result = result
+        self.delay = delay
+        self.gate = gate  # asyncio.Event the request waits on before it is "sent"
+        self.calls = 0
+        self.cancelled = 0
+
+    async def chat(self, api_key, system_prompt, user_content, temperature=0.7,
+                   label="request", cache_lookup=True, on_send=None):
+        self.calls += 1
+        try:
+            if self.gate is not None:
+                await self.gate.wait()
+            if on_send:
+                on_send()
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def make_router(*clients, hedge=True):
+    providers = [LLMProvider(f"p{i}", client, lambda: "key") for i, client in enumerate(clients)]
+    router = LLMRouter(providers, hedge=hedge)
+    router.hedge_after = 0.05
+    return router, providers
+
+
+def test_rank_prefers_fastest_healthy_provider():
+    router, (slow, fast) = make_router(StubClient("a"), StubClient("b"))
+    for _ in range(5):
+        slow.stats.record(True, 10.0)
+        fast.stats.record(True, 1.0)
+    assert [p for p, _ in router.rank(router.available())] == [fast, slow]
+
+    for _ in range(router.bench_after):
+        router._record_failure(fast)
+    assert not router.is_healthy(fast)
+    assert [p for p, _ in router.rank(router.available())] == [slow, fast]
+
+
+def test_rank_inflates_busy_providers():
+    router, (first, second) = make_router(StubClient("a", max_in_flight=2), StubClient("b"))
+    for _ in range(5):
+        first.stats.record(True, 1.0)
+        second.stats.record(True, 1.5)
+    first.stats.in_flight = 2
+    assert router.rank(router.available())[0][0] is second
+
+
+def test_failover_to_next_provider():
+    router, (bad, good) = make_router(StubClient("a", result=None), StubClient("b", result="answer"))
+    assert asyncio.run(router.chat("sys", "text")) == "answer"
+    assert bad.stats.consecutive_failures == 1
+    assert good.stats.outcomes[-1] is True
+    assert bad.stats.in_flight == good.stats.in_flight == 0
+
+
+def test_errors_count_as_failures():
+    router, (bad, good) = make_router(StubClient("a", result=RuntimeError("boom")), StubClient("b"))
+    assert asyncio.run(router.chat("sys", "text")) == "ok"
+    assert list(bad.stats.outcomes) == [False]
+
+
+def test_all_providers_failing_returns_none():
+    router, _ = make_router(StubClient("a", result=None), StubClient("b", result=None))
+    assert asyncio.run(router.chat("sys", "text")) is None
+
+
+def test_hedge_wins_and_loser_records_lower_bound():
+    slow_client = StubClient("a", result="slow", delay=5.0)
+    router, (slow, fast) = make_router(slow_client, StubClient("b", result="fast", delay=0.0))
+    assert asyncio.run(router.chat("sys", "text")) == "fast"
+    assert fast.stats.hedges_won == 1
+    assert slow_client.cancelled == 1
+    assert slow.stats.in_flight == 0
+    assert len(slow.stats.latencies) == 1
+    assert slow.stats.latencies[0] >= router.hedge_after
+
+
+def test_no_hedge_when_disabled():
+    router, (slow, fast) = make_router(StubClient("a", result="slow", delay=0.1), StubClient("b"), hedge=False)
+    assert asyncio.run(router.chat("sys", "text")) == "slow"
+    assert fast.client.calls == 0
+
+
+def test_hedge_clock_starts_when_request_is_sent():
+    async def scenario():
+        gate = asyncio.Event()
+        router, (queued, other) = make_router(StubClient("a", result="queued", gate=gate), StubClient("b"))
+        call = asyncio.create_task(router.chat("sys", "text"))
+        await asyncio.sleep(router.hedge_after * 4)  # queued for a slot longer than the hedge deadline
+        assert other.client.calls == 0
+        gate.set()
+        result = await call
+        return result, queued, other
+
+    result, queued, other = asyncio.run(scenario())
+    assert result == "queued"
+    assert other.client.calls == 0
+    assert queued.stats.latencies[-1] < 0.05
+
+
+def test_cancelled_request_records_no_latency():
+    async def scenario():
+        router, (slow, _) = make_router(StubClient("a", delay=5.0), StubClient("b", delay=5.0))
+        call = asyncio.create_task(router.chat("sys", "text"))
+        await asyncio.sleep(router.hedge_after * 2)  # both providers in flight
+        call.cancel()
+        try:
+            await call
+        except asyncio.CancelledError:
+            pass
+        return router
+
+    router = asyncio.run(scenario())
+    for provider in router.providers:
+        assert provider.stats.in_flight == 0
+        assert len(provider.stats.latencies) == 0
@@ -0,0 +1,65 @@
+import os
+
+from output_cache import OutputCache, normalize_script
+
+
+def write(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    return str(path)
+
+
+def test_key_ignores_whitespace_but_not_params():
+    assert normalize_script("  Hello \n\n world\t") == "Hello world"
+    key = OutputCache.make_key("Hello  world", "ref1", speed=0.8)
+    assert key == OutputCache.make_key("Hello\nworld ", "ref1", speed=0.8)
+    assert key != OutputCache.make_key("Hello world", "ref2", speed=0.8)
+    assert key != OutputCache.make_key("Hello world", "ref1", speed=1.0)
+
+
+def test_put_then_get_copies_every_variant(tmp_path):
+    cache = OutputCache(str(tmp_path / "cache"))
+    base = str(tmp_path / "job")
+    files = [write(f"{base}.wav", 10), write(f"{base}_enhanced.wav", 20)]
+    assert cache.put("k", base, files)
+    for path in files:
+        os.remove(path)
+
+    restored = cache.get("k", str(tmp_path / "again"))
+    assert restored == [str(tmp_path / "again.wav"), str(tmp_path / "again_enhanced.wav")]
+    assert [os.path.getsize(p) for p in restored] == [10, 20]
+
+
+def test_miss_and_unusable_put(tmp_path):
+    cache = OutputCache(str(tmp_path / "cache"))
+    assert cache.get("missing", str(tmp_path / "out")) is None
+    assert not cache.put("k", str(tmp_path / "job"), [str(tmp_path / "job.wav")])  # file never written
+    assert cache.total_bytes == 0
+
+
+def test_entries_survive_restart_and_tmp_dirs_are_cleaned(tmp_path):
+    root = tmp_path / "cache"
+    cache = OutputCache(str(root))
+    base = str(tmp_path / "job")
+    cache.put("k", base, [write(f"{base}.wav", 10)])
+    os.makedirs(root / "partial.tmp")
+
+    reopened = OutputCache(str(root))
+    assert not (root / "partial.tmp").exists()
+    assert reopened.get("k", str(tmp_path / "out")) == [str(tmp_path / "out.wav")]
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = OutputCache(str(tmp_path / "cache"), max_bytes=2500)
+    base = str(tmp_path / "job")
+    write(f"{base}.wav", 1000)
+    cache.put("old", base, [f"{base}.wav"])
+    cache.put("used", base, [f"{base}.wav"])
+    os.utime(tmp_path / "cache" / "old", (1, 1))
+    os.utime(tmp_path / "cache" / "used", (2, 2))
+    cache.get("used", str(tmp_path / "out"))  # refreshes "used"
+
+    cache.put("new", base, [f"{base}.wav"])
+    assert cache.get("old", str(tmp_path / "out")) is None
+    assert cache.get("used", str(tmp_path / "out")) is not None
+    assert cache.total_bytes <= 2500
@@ -0,0 +1,54 @@
+import pytest
+
+pytest.importorskip("torch")
+
+import f5_engine  # noqa: E402
+from f5_engine import ReferenceCache  # noqa: E402
+
+
+class FakeModel:
+    def __init__(self, text):
+        self.text = text
+        self.transcribed = 0
+
+    def transcribe(self, ref_file):
+        self.transcribed += 1
+        return self.text
+
+
+@pytest.fixture
+def ref_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(f5_engine, "F5_INTERNALS_AVAILABLE", False)
+    path = tmp_path / "ref.wav"
+    path.write_bytes(b"audio")
+    return str(path)
+
+
+def test_reference_transcribed_once(ref_file):
+    model = FakeModel("Hello there.")
+    cache = ReferenceCache()
+    assert cache.get(model, ref_file).ref_text == "Hello there."
+    cache.get(model, ref_file)
+    assert model.transcribed == 1
+
+
+@pytest.mark.parametrize("text", ["", "   "])
+def test_silent_reference_raises_clear_error(ref_file, text):
+    with pytest.raises(ValueError, match="No speech recognized"):
+        ReferenceCache().get(FakeModel(text), ref_file)
+
+
+def test_silent_reference_with_f5_internals(ref_file, monkeypatch):
+    monkeypatch.setattr(f5_engine, "F5_INTERNALS_AVAILABLE", True)
+    monkeypatch.setattr(f5_engine, "preprocess_ref_audio_text", lambda ref, text: (ref, ""), raising=False)
+    with pytest.raises(ValueError, match="No speech recognized"):
+        ReferenceCache().get(FakeModel(""), ref_file)
+
+
+def test_known_hash_skips_reading_the_file(ref_file, tmp_path):
+    model = FakeModel("Hello there.")
+    cache = ReferenceCache()
+    missing = str(tmp_path / "gone.wav")
+    assert cache.get(model, missing, ref_hash="abc").ref_hash == "abc"
+    cache.get(model, missing, ref_hash="abc")
+    assert model.transcribed == 1
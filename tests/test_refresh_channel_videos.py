@@ -0,0 +1,114 @@
+from youtube_processor import YouTubeChannelProcessor
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeYouTube:
+    """Minimal googleapiclient stand-in: an uploads playlist plus per-video data"""
+
+    def __init__(self, uploads, videos, page_size=50):
+        self.uploads = uploads  # [(video_id, published_at)], newest first
+        self.videos_by_id = videos  # video_id -> (view_count, duration_seconds)
+        self.page_size = page_size
+        self.calls = {'playlistItems.list': 0, 'videos.list': 0}
+
+    def playlistItems(self):
+        return self
+
+    def videos(self):
+        return self
+
+    def list(self, part, id=None, playlistId=None, maxResults=None, pageToken=None):
+        if playlistId is not None:
+            self.calls['playlistItems.list'] += 1
+            start = int(pageToken or 0)
+            page = self.uploads[start:start + self.page_size]
+            response = {'items': [
+                {'snippet': {'resourceId': {'videoId': vid}, 'publishedAt': published}}
+                for vid, published in page
+            ]}
+            if start + self.page_size < len(self.uploads):
+                response['nextPageToken'] = str(start + self.page_size)
+            return FakeRequest(response)
+
+        self.calls['videos.list'] += 1
+        items = []
+        for vid in id.split(','):
+            if vid not in self.videos_by_id:
+                continue
+            views, duration = self.videos_by_id[vid]
+            published = dict(self.uploads).get(vid, '2020-01-01T00:00:00Z')
+            items.append({
+                'id': vid,
+                'snippet': {'title': vid, 'publishedAt': published},
+                'statistics': {'viewCount': str(views)},
+                'contentDetails': {'duration': f"PT{duration}S"},
+            })
+        return FakeRequest({'items': items})
+
+
+def make_processor(client):
+    processor = YouTubeChannelProcessor()
+    processor.youtube = client
+    return processor
+
+
+def published(n):
+    """Publish timestamps: higher n = newer"""
+    return f"2024-01-01T{n // 3600:02d}:{n // 60 % 60:02d}:{n % 60:02d}Z"
+
+
+def known_video(vid, views, n):
+    return {'video_id': vid, 'view_count': views, 'published_at': published(n),
+            'duration': 900, 'url': f"https://www.youtube.com/watch?v={vid}"}
+
+
+def test_refresh_adds_new_uploads_and_drops_removed():
+    uploads = [('new1', published(30)), ('new2', published(20)), ('short', published(15)),
+               ('old1', published(10)), ('old2', published(5))]
+    videos = {'new1': (500, 900), 'new2': (50, 900), 'short': (9999, 60), 'old1': (300, 900)}
+    client = FakeYouTube(uploads, videos)
+    known = [known_video('old1', 100, 10), known_video('old2', 200, 5)]
+
+    result = make_processor(client).refresh_channel_videos('UCchannel', known)
+
+    assert [v['video_id'] for v in result] == ['new1', 'old1', 'new2']
+    assert result[1]['view_count'] == 300  # fresh statistics for cached videos
+    assert client.calls['playlistItems.list'] == 1
+
+
+def test_refresh_pages_new_uploads_when_cache_is_full():
+    max_results = 100
+    known = [known_video(f"old{i}", 1000 + i, i) for i in range(max_results)]
+    new = [(f"new{i}", published(10000 - i)) for i in range(60)]
+    uploads = new + [(v['video_id'], v['published_at']) for v in reversed(known)]
+    videos = {vid: (5000 + i, 900) for i, (vid, _) in enumerate(new)}
+    videos.update({v['video_id']: (v['view_count'], 900) for v in known})
+    client = FakeYouTube(uploads, videos, page_size=50)
+
+    result = make_processor(client).refresh_channel_videos('UCchannel', known, max_results=max_results)
+
+    assert len(result) == max_results
+    ids = {v['video_id'] for v in result}
+    assert all(f"new{i}" in ids for i in range(60))  # full cache no longer blocks new uploads
+    views = [v['view_count'] for v in result]
+    assert views == sorted(views, reverse=True)
+    assert min(views) == 1000 + max_results - 40  # lowest-viewed cached videos fell off
+
+
+def test_refresh_limits_paging_to_max_results_new_uploads():
+    uploads = [(f"new{i}", published(10000 - i)) for i in range(200)]
+    videos = {vid: (i, 900) for i, (vid, _) in enumerate(uploads)}
+    client = FakeYouTube(uploads, videos, page_size=50)
+
+    result = make_processor(client).refresh_channel_videos(
+        'UCchannel', [known_video('old', 1, 1)], max_results=60)
+
+    assert client.calls['playlistItems.list'] == 2
+    assert len(result) == 60
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+from rewrite_cache import RewriteCache
+
+
+def test_key_covers_prompt_model_temperature_and_text():
+    key = RewriteCache.make_key("prompt", "model", 0.7, "text")
+    assert key == RewriteCache.make_key("prompt", "model", 0.70000001, "text")
+    for other in (("prompt2", "model", 0.7, "text"), ("prompt", "model2", 0.7, "text"),
+                  ("prompt", "model", 0.9, "text"), ("prompt", "model", 0.7, "text2")):
+        assert key != RewriteCache.make_key(*other)
+
+
+def test_put_get_and_stats(tmp_path, clock):
+    cache = RewriteCache(str(tmp_path / "rewrites.db"))
+    assert cache.get("k") is None
+    cache.put("k", "rewritten")
+    cache.put("empty", "")
+    assert cache.get("k") == "rewritten"
+    assert cache.get("empty") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = RewriteCache(str(tmp_path / "rewrites.db"), ttl_days=1)
+    cache.put("k", "rewritten")
+    clock.now += 86400 - 1
+    assert cache.get("k") == "rewritten"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.purge_expired() == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = RewriteCache(str(tmp_path / "rewrites.db"), max_bytes=20)
+    cache.put("a", "x" * 8)
+    clock.now += 1
+    cache.put("b", "x" * 8)
+    clock.now += 1
+    cache.get("a")  # a is now more recent than b
+    clock.now += 1
+    cache.put("c", "x" * 8)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_mirror_fills_local_misses(tmp_path, clock, mirror):
+    mirror.rows["remote"] = "from supabase"
+    cache = RewriteCache(str(tmp_path / "rewrites.db"), mirror=mirror)
+    assert cache.get("remote") == "from supabase"
+    mirror.rows.clear()
+    assert cache.get("remote") == "from supabase"  # now stored locally
+    cache.put("k", "v")
+    assert mirror.rows == {"k": "v"}
+
+
+def test_async_mirror_calls_do_not_block_the_loop(tmp_path, clock):
+    release = threading.Event()
+
+    class SlowMirror:
+        def __init__(self):
+            self.stored = {}
+
+        def get_rewrite(self, key, max_age_days=None):
+            release.wait(5)
+            return "from supabase"
+
+        def store_rewrite(self, key, result):
+            release.wait(5)
+            self.stored[key] = result
+
+    mirror = SlowMirror()
+    cache = RewriteCache(str(tmp_path / "rewrites.db"), mirror=mirror)
+
+    async def scenario():
+        await cache.put_async("k", "local")  # returns before the mirror store
+        assert cache.get("k") == "local" and mirror.stored == {}
+
+        lookup = asyncio.create_task(cache.get_async("remote"))
+        await asyncio.sleep(0.01)  # the loop keeps running while the mirror is stuck
+        assert not lookup.done()
+        release.set()
+        assert await lookup == "from supabase"
+        await asyncio.gather(*cache._mirror_tasks)
+
+    asyncio.run(scenario())
+    assert mirror.stored == {"k": "local"}
+    assert cache.get("remote") == "from supabase"
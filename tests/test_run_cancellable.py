@@ -0,0 +1,74 @@
+import asyncio
+import inspect
+
+import pytest
+
+from llm_client import run_cancellable
+
+
+class Call:
+    """An LLM call stand-in that records whether it started, finished or unwound"""
+
+    def __init__(self, delay=0.0, result="answer", error=None):
+        self.delay = delay
+        self.result = result
+        self.error = error
+        self.started = False
+        self.cleaned_up = False
+
+    async def __call__(self):
+        self.started = True
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return self.result
+        finally:
+            self.cleaned_up = True
+
+
+def test_normal_completion_returns_result():
+    async def scenario():
+        return await run_cancellable(Call()(), asyncio.Event())
+
+    assert asyncio.run(scenario()) == "answer"
+
+
+def test_stop_before_start_closes_coroutine():
+    call = Call()
+
+    async def scenario():
+        stop = asyncio.Event()
+        stop.set()
+        coroutine = call()
+        result = await run_cancellable(coroutine, stop)
+        return result, coroutine
+
+    result, coroutine = asyncio.run(scenario())
+    assert result is None
+    assert not call.started
+    assert inspect.getcoroutinestate(coroutine) == inspect.CORO_CLOSED
+
+
+def test_stop_mid_call_cancels_and_awaits_task():
+    call = Call(delay=5)
+
+    async def scenario():
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.02, stop.set)
+        started = asyncio.get_running_loop().time()
+        result = await run_cancellable(call(), stop)
+        return result, asyncio.get_running_loop().time() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert result is None
+    assert elapsed < 1
+    assert call.started and call.cleaned_up  # the request unwound before run_cancellable returned
+
+
+def test_exception_propagates():
+    async def scenario():
+        return await run_cancellable(Call(error=RuntimeError("HTTP 500"))(), asyncio.Event())
+
+    with pytest.raises(RuntimeError, match="HTTP 500"):
+        asyncio.run(scenario())
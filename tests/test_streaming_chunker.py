@@ -0,0 +1,62 @@
+import random
+import re
+
+from llm_client import StreamingChunker
+
+
+def split_text(text, max_length):
+    """Same packing as the bot's split_text_into_chunks (sentences up to max_length)"""
+    chunks = []
+    current = ""
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        if len(current) + len(sentence) > max_length and current:
+            chunks.append(current.strip())
+            current = sentence
+        else:
+            current += " " + sentence if current else sentence
+    if current:
+        chunks.append(current.strip())
+    return chunks
+
+
+TEXT = " ".join(
+    f"Sentence number {i} has {'some ' * (i % 7)}words in it{'!' if i % 5 == 0 else '.'}"
+    for i in range(60)
+) + " And a trailing fragment without a full stop"
+
+
+def stream(text, sizes):
+    position = 0
+    while position < len(text):
+        size = next(sizes)
+        yield text[position:position + size]
+        position += size
+
+
+def run(text, max_length, sizes):
+    chunker = StreamingChunker(max_length, split_text)
+    emitted = []
+    for piece in stream(text, sizes):
+        emitted.extend(chunker.feed(piece))
+    return emitted, chunker.flush()
+
+
+def test_streamed_chunks_match_splitting_the_full_text():
+    rng = random.Random(7)
+    for max_length in (80, 200, 500):
+        sizes = iter(lambda: rng.randint(1, 12), None)
+        emitted, rest = run(TEXT, max_length, sizes)
+        assert emitted + rest == split_text(TEXT, max_length)
+
+
+def test_chunks_are_released_before_the_stream_ends():
+    emitted, rest = run(TEXT, 100, iter(lambda: 5, None))
+    assert len(emitted) >= len(split_text(TEXT, 100)) - 2
+    assert rest
+
+
+def test_no_chunk_until_a_sentence_completes():
+    chunker = StreamingChunker(10, split_text)
+    assert chunker.feed("A sentence without an ending that is long") == []
+    assert chunker.flush() == split_text("A sentence without an ending that is long", 10)
+    assert chunker.flush() == []
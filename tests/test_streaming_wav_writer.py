@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+sf = pytest.importorskip("soundfile")
+
+from f5_engine import SAMPLE_RATE, StreamingWavWriter, cross_fade_concat  # noqa: E402
+
+
+def chunks(*lengths, seed=0):
+    rng = np.random.default_rng(seed)
+    return [rng.uniform(-0.5, 0.5, n).astype(np.float32) for n in lengths]
+
+
+def write(path, waves, cross_fade_duration=0.15):
+    with StreamingWavWriter(str(path), cross_fade_duration=cross_fade_duration, subtype="FLOAT") as writer:
+        for wave in waves:
+            writer.append(wave)
+    data, sample_rate = sf.read(str(path), dtype="float32")
+    return writer, data, sample_rate
+
+
+def test_matches_in_memory_cross_fade(tmp_path):
+    waves = chunks(SAMPLE_RATE, SAMPLE_RATE // 2, SAMPLE_RATE * 2)
+    writer, data, sample_rate = write(tmp_path / "out.wav", waves)
+    expected = cross_fade_concat(waves, 0.15)
+    assert sample_rate == SAMPLE_RATE
+    assert writer.chunks_written == 3
+    assert len(data) == len(expected)
+    np.testing.assert_allclose(data, expected, atol=1e-5)
+
+
+def test_without_cross_fade_is_plain_concatenation(tmp_path):
+    waves = chunks(1000, 2000)
+    _, data, _ = write(tmp_path / "out.wav", waves, cross_fade_duration=0)
+    np.testing.assert_allclose(data, np.concatenate(waves), atol=1e-6)
+
+
+def test_partial_file_is_playable_before_close(tmp_path):
+    path = tmp_path / "partial.wav"
+    writer = StreamingWavWriter(str(path), subtype="FLOAT")
+    writer.append(chunks(SAMPLE_RATE)[0])
+    data, _ = sf.read(str(path), dtype="float32")
+    assert len(data) == writer.samples_written == SAMPLE_RATE - writer.fade_samples
+    assert writer.duration == pytest.approx(1.0)
+    writer.close()
+    writer.close()  # idempotent
@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+import pytest
+
+import transcribe_helper
+from transcribe_helper import SupadataJobManager
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return self._data
+
+
+class FakeSupadata:
+    """Answers polls per job from a script of responses (the last one repeats)"""
+
+    def __init__(self, scripts):
+        self.scripts = scripts
+        self.polls = {job_id: [] for job_id in scripts}
+
+    async def get(self, url, headers=None, timeout=None):
+        job_id = url.rsplit("/", 1)[-1]
+        self.polls[job_id].append(time.monotonic())
+        script = self.scripts[job_id]
+        return script.pop(0) if len(script) > 1 else script[0]
+
+
+ACTIVE = FakeResponse(data={"status": "active"})
+
+
+def done(text):
+    return FakeResponse(data={"status": "completed", "content": text})
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    for name in ("SUPADATA_POLL_INITIAL", "SUPADATA_POLL_MAX", "SUPADATA_POLL_TIMEOUT"):
+        monkeypatch.delenv(name, raising=False)
+    manager = SupadataJobManager()
+    manager.initial_interval = 0.01
+    manager.max_interval = 0.04
+    manager.timeout = 5
+    manager._jitter = lambda interval: interval
+    return manager
+
+
+def use(monkeypatch, fake):
+    monkeypatch.setattr(transcribe_helper.http_pool, "get", fake.get)
+    return fake
+
+
+def test_env_knobs(monkeypatch):
+    monkeypatch.setenv("SUPADATA_POLL_INITIAL", "3")
+    monkeypatch.setenv("SUPADATA_POLL_MAX", "not a number")
+    monkeypatch.delenv("SUPADATA_POLL_TIMEOUT", raising=False)
+    manager = SupadataJobManager()
+    assert (manager.initial_interval, manager.max_interval, manager.timeout) == (3, 30, 600)
+
+
+def test_jitter_stays_within_twenty_percent():
+    manager = SupadataJobManager()
+    samples = [manager._jitter(10) for _ in range(200)]
+    assert all(8 <= s <= 12 for s in samples)
+
+
+def test_backoff_grows_until_max(manager, monkeypatch):
+    fake = use(monkeypatch, FakeSupadata({"job": [ACTIVE] * 6 + [done("transcript")]}))
+    result = asyncio.run(manager.wait("job", "key"))
+    assert result == ("transcript", False)
+
+    polls = fake.polls["job"]
+    gaps = [b - a for a, b in zip(polls, polls[1:])]
+    expected = [0.015, 0.0225, 0.03375, 0.04, 0.04, 0.04]
+    assert len(gaps) == len(expected)
+    for gap, want in zip(gaps, expected):
+        assert want * 0.9 <= gap <= want + 0.05
+    assert len(manager) == 0
+
+
+def test_quota_exhaustion_and_failure(manager, monkeypatch):
+    use(monkeypatch, FakeSupadata({
+        "exhausted": [FakeResponse(429)],
+        "failed": [FakeResponse(data={"status": "failed", "error": "bad video"})],
+        "broken": [FakeResponse(500)],
+    }))
+
+    async def scenario():
+        return await asyncio.gather(
+            manager.wait("exhausted", "key"), manager.wait("failed", "key"), manager.wait("broken", "key")
+        )
+
+    assert asyncio.run(scenario()) == [(None, True), (None, False), (None, False)]
+
+
+def test_timeout_gives_up(manager, monkeypatch):
+    manager.timeout = 0.05
+    fake = use(monkeypatch, FakeSupadata({"job": [ACTIVE]}))
+    assert asyncio.run(manager.wait("job", "key")) == (None, False)
+    assert 1 < len(fake.polls["job"]) < 10
+
+
+def test_duplicate_waiters_share_one_job(manager, monkeypatch):
+    fake = use(monkeypatch, FakeSupadata({"job": [ACTIVE, ACTIVE, done("shared")]}))
+
+    async def scenario():
+        first = asyncio.create_task(manager.wait("job", "key"))
+        cancelled = asyncio.create_task(manager.wait("job", "key"))
+        second = asyncio.create_task(manager.wait("job", "key"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await first, await second
+
+    assert asyncio.run(scenario()) == (("shared", False), ("shared", False))
+    assert len(fake.polls["job"]) == 3
+
+
+def test_job_dropped_when_last_waiter_cancelled(manager, monkeypatch):
+    fake = use(monkeypatch, FakeSupadata({"job": [ACTIVE]}))
+
+    async def scenario():
+        waiters = [asyncio.create_task(manager.wait("job", "key")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        polls = len(fake.polls["job"])
+        await asyncio.sleep(0.1)
+        return polls
+
+    polls = asyncio.run(scenario())
+    assert len(fake.polls["job"]) == polls  # no polling after the last waiter left
+    assert len(manager) == 0
+
+
+
+def test_progress_log_shows_next_interval(manager, monkeypatch, capsys):
+    use(monkeypatch, FakeSupadata({"job": [ACTIVE]}))
+    manager.initial_interval = 2
+    manager.max_interval = 30
+
+    async def scenario():
+        manager.submit("job", "key")
+        manager._loop_task.cancel()
+        await manager._poll("job")
+
+    asyncio.run(scenario())
+    assert "next check in ~3s" in capsys.readouterr().out  # 2s grown by the 1.5x backoff
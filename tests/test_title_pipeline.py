@@ -0,0 +1,95 @@
+import asyncio
+
+from rewrite_cache import RewriteCache
+from title_pipeline import TitlePipeline, excerpt_script, parse_numbered_titles
+
+PROMPTS = {'initial': "P1", 'refine': "P2", 'polish': "P3", 'more': "P10"}
+
+
+class StubRouter:
+    """Answers each prompt after a short delay, tracking overlap and cache_lookup flags"""
+
+    def __init__(self, delay=0.02, fail=()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def chat(self, system_prompt, user_content, temperature=0.7, label="request", cache_lookup=True):
+        self.calls.append((system_prompt, user_content, cache_lookup))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if system_prompt in self.fail:
+            return None
+        if system_prompt == "P10":
+            return "1. First\n2) **Second**\n3. \"Third\""
+        return f'"{system_prompt} title"'
+
+
+def test_excerpt_keeps_opening_middle_and_ending():
+    sentences = [f"Sentence {i} is here." for i in range(300)]
+    script = " ".join(sentences)
+    excerpt = excerpt_script(script, 600)
+    parts = excerpt.split("\n[...]\n")
+    assert len(parts) == 3
+    assert parts[0].startswith("Sentence 0 ")
+    assert parts[2].endswith("Sentence 299 is here.")
+    assert "Sentence 150 " in parts[1]
+    assert len(excerpt) <= 800
+
+
+def test_short_script_is_sent_whole_and_normalized():
+    assert excerpt_script("  Short \n script.  ", 3000) == "Short script."
+
+
+def test_parse_numbered_titles():
+    assert parse_numbered_titles("Intro line\n1. First\n2) **Second**\n 3.  'Third'") == ["First", "Second", "Third"]
+    assert parse_numbered_titles("Only one\n\nAnother") == ["Only one", "Another"]
+
+
+def test_refine_chain_and_more_run_concurrently():
+    router = StubRouter()
+    result = asyncio.run(TitlePipeline(router, excerpt_chars=3000).run("A script.", PROMPTS))
+    assert result == {'initial': "P1 title", 'refined': "P2 title", 'final': "P3 title",
+                      'more': ["First", "Second", "Third"], 'cached': False}
+    assert router.max_running == 2
+    # each step of the chain refines the previous answer
+    assert [(p, c) for p, c, _ in router.calls if p in ("P2", "P3")] == [("P2", "P1 title"), ("P3", "P2 title")]
+
+
+def test_chain_falls_back_to_last_good_title():
+    router = StubRouter(fail={"P3"})
+    result = asyncio.run(TitlePipeline(router).run("A script.", PROMPTS))
+    assert result['final'] == "P2 title"
+    assert asyncio.run(TitlePipeline(StubRouter(fail={"P1", "P10"})).run("A script.", PROMPTS)) is None
+
+
+def test_finished_job_is_cached_and_force_skips_caches(tmp_path):
+    cache = RewriteCache(str(tmp_path / "cache.db"))
+    first = StubRouter()
+    pipeline = TitlePipeline(first, cache=cache)
+    asyncio.run(pipeline.run("A script.", PROMPTS))
+
+    again = StubRouter()
+    pipeline.router = again
+    cached = asyncio.run(pipeline.run("A   script. ", PROMPTS))  # same script after normalizing
+    assert cached['cached'] is True and cached['final'] == "P3 title"
+    assert again.calls == []
+
+    forced = asyncio.run(pipeline.run("A script.", PROMPTS, force=True))
+    assert forced['cached'] is False
+    assert len(again.calls) == 4
+    assert all(cache_lookup is False for _, _, cache_lookup in again.calls)
+
+
+def test_incomplete_job_is_not_cached(tmp_path):
+    cache = RewriteCache(str(tmp_path / "cache.db"))
+    pipeline = TitlePipeline(StubRouter(fail={"P10"}), cache=cache)
+    assert asyncio.run(pipeline.run("A script.", PROMPTS))['more'] == []
+    pipeline.router = StubRouter()
+    assert asyncio.run(pipeline.run("A script.", PROMPTS))['cached'] is False
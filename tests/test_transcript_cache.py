@@ -0,0 +1,60 @@
+import os
+import time
+
+from transcript_cache import TranscriptCache
+
+
+def age(cache, video_id, days, lang="auto"):
+    path = cache._path(video_id, lang)
+    past = time.time() - days * 86400
+    os.utime(path, (past, past))
+
+
+def test_put_get_by_video_and_language(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    cache.put("abc123", "english text", lang="en")
+    cache.put("abc123", "texte", lang="fr")
+    cache.put("empty", "")
+    assert cache.get("abc123", "en") == "english text"
+    assert cache.get("abc123", "fr") == "texte"
+    assert cache.get("abc123") is None
+    assert cache.get("empty") is None
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = TranscriptCache(str(tmp_path), ttl_days=10)
+    cache.put("fresh", "a")
+    cache.put("stale", "b")
+    age(cache, "fresh", 9)
+    age(cache, "stale", 11)
+    assert cache.get("fresh") == "a"
+    assert cache.get("stale") is None
+    assert cache.purge_expired() == 1
+    assert os.listdir(tmp_path) == [os.path.basename(cache._path("fresh", "auto"))]
+
+
+def test_unsafe_ids_stay_inside_root(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache"))
+    cache.put("../../etc/passwd", "text")
+    assert os.path.dirname(cache._path("../../etc/passwd", "auto")) == str(tmp_path / "cache")
+    assert cache.get("../../etc/passwd") == "text"
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    with open(cache._path("vid", "auto"), "wb") as f:
+        f.write(b"not gzip")
+    assert cache.get("vid") is None
+    assert not os.path.exists(cache._path("vid", "auto"))
+
+
+def test_mirror_fills_local_misses_with_same_ttl(tmp_path, mirror):
+    mirror.rows[("vid", "auto")] = "from supabase"
+    cache = TranscriptCache(str(tmp_path), ttl_days=30, mirror=mirror)
+    assert cache.get("vid") == "from supabase"
+    assert mirror.lookups == [(("vid", "auto"), 30)]
+    mirror.rows.clear()
+    assert cache.get("vid") == "from supabase"  # now stored locally
+    cache.put("other", "text")
+    assert mirror.rows == {("other", "auto"): "text"}
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tts_worker import TTSWorker
+
+
+def test_after_item_runs_on_worker_thread_after_each_item():
+    calls = []
+
+    async def main():
+        worker = TTSWorker()
+        job = worker.submit(lambda: iter([(0, "a"), (1, "b"), (2, "c")]), total=3,
+                            after_item=lambda item: calls.append((item[0], threading.current_thread().name)))
+        items = [item async for item in job.results()]
+        worker.shutdown()
+        return items
+
+    items = asyncio.run(main())
+    assert [i for i, _ in items] == [0, 1, 2]
+    assert [i for i, _ in calls] == [0, 1, 2]
+    assert all(name.startswith("f5-tts") for _, name in calls)
+
+
+def test_drain_reads_done_after_last_chunk_and_does_not_cancel():
+    # Regression: breaking out on the last chunk left job.done False, so the
+    # cleanup cancel() marked a fully synthesized job as stopped
+    async def main():
+        worker = TTSWorker()
+        job = worker.submit(lambda: iter([(0, "a"), (1, "b"), (2, "c")]), total=3)
+        received = []
+
+        async def on_chunk(item):
+            received.append(item[0])
+            return True
+
+        completed = await job.drain(on_chunk)
+        worker.shutdown()
+        return completed, job, received
+
+    completed, job, received = asyncio.run(main())
+    assert completed
+    assert job.done and not job.cancelled
+    assert received == [0, 1, 2]
+
+
+def test_drain_stopped_early_cancels_job():
+    async def main():
+        worker = TTSWorker()
+        produced = []
+
+        def chunks():
+            for i in range(100):
+                time.sleep(0.005)  # a "GPU batch"
+                produced.append(i)
+                yield i, "x"
+
+        job = worker.submit(chunks, total=100)
+
+        async def on_chunk(item):
+            return item[0] < 1  # stop after the second chunk
+
+        completed = await job.drain(on_chunk)
+        await asyncio.sleep(0.05)
+        worker.shutdown()
+        return completed, job, produced
+
+    completed, job, produced = asyncio.run(main())
+    assert not completed
+    assert job.cancelled
+    assert len(produced) < 100
+
+
+def test_drain_propagates_worker_errors():
+    def failing():
+        yield 0, "a"
+        raise RuntimeError("CUDA out of memory")
+
+    async def main():
+        worker = TTSWorker()
+        job = worker.submit(failing, total=2)
+
+        async def on_chunk(item):
+            return True
+
+        try:
+            await job.drain(on_chunk)
+        finally:
+            worker.shutdown()
+
+    with pytest.raises(RuntimeError, match="out of memory"):
+        asyncio.run(main())
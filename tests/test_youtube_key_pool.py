@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+import youtube_key_pool
+from youtube_key_pool import YouTubeKeyPool, call_cost, is_quota_error
+
+
+@pytest.fixture
+def day(monkeypatch):
+    """Controllable quota day"""
+    current = {'day': '2024-05-01'}
+    monkeypatch.setattr(youtube_key_pool, 'pacific_day', lambda: current['day'])
+    return current
+
+
+def test_call_costs():
+    assert call_cost('search.list') == 100
+    assert call_cost('videos.list') == 1
+
+
+def test_is_quota_error():
+    class FakeHttpError(Exception):
+        content = b'{"error": {"errors": [{"reason": "quotaExceeded"}]}}'
+
+    assert is_quota_error(FakeHttpError())
+    assert not is_quota_error(ValueError("boom"))
+
+
+def test_charge_and_select(day):
+    pool = YouTubeKeyPool(['a', 'b'], daily_quota=150, state_path=None)
+    pool.charge('a', 'search.list')
+    assert pool.remaining('a') == 50
+    assert pool.select('a', cost=1) == 'a'  # current key kept while it has room
+    assert pool.select('a', cost=100) == 'b'  # ...then the key with the most quota left
+    pool.charge('b', 'search.list')
+    pool.charge('b', 'videos.list')
+    assert pool.select('b', cost=100) == 'a'  # both short: most remaining is a last resort
+
+
+def test_mark_exhausted_skips_key(day):
+    pool = YouTubeKeyPool(['a', 'b'], daily_quota=100, state_path=None)
+    pool.mark_exhausted('a')
+    assert pool.remaining('a') == 0
+    assert pool.select('a') == 'b'
+    pool.mark_exhausted('b')
+    assert pool.select() is None
+
+
+def test_day_rollover_resets_usage(day):
+    pool = YouTubeKeyPool(['a'], daily_quota=100, state_path=None)
+    pool.charge('a', 'search.list')
+    pool.mark_exhausted('a')
+    assert pool.select() is None
+
+    day['day'] = '2024-05-02'
+    assert pool.remaining('a') == 100
+    assert pool.select() == 'a'
+
+
+def test_set_keys_replaces_keys_and_keeps_usage(day):
+    pool = YouTubeKeyPool(['a', 'b'], daily_quota=100, state_path=None)
+    pool.charge('a', 'videos.list')
+    pool.set_keys(['a', 'c', 'c', ''])
+    assert pool.keys == ['a', 'c']
+    assert pool.remaining('a') == 99
+
+
+def test_charges_are_batched_until_flush(day, tmp_path):
+    path = tmp_path / 'quota.json'
+    pool = YouTubeKeyPool(['a'], daily_quota=100, state_path=str(path), save_interval=3600)
+    for _ in range(5):
+        pool.charge('a', 'videos.list')
+    assert not path.exists()
+
+    pool.flush()
+    assert json.loads(path.read_text())['used'] == {'a': 5}
+
+    restarted = YouTubeKeyPool(['a'], daily_quota=100, state_path=str(path))
+    assert restarted.remaining('a') == 95
+
+
+def test_charge_saves_on_timer(day, tmp_path):
+    path = tmp_path / 'quota.json'
+    pool = YouTubeKeyPool(['a'], daily_quota=100, state_path=str(path), save_interval=0)
+    pool.charge('a', 'videos.list')
+    assert json.loads(path.read_text())['used'] == {'a': 1}
+
+
+def test_exhaustion_is_saved_immediately(day, tmp_path):
+    path = tmp_path / 'quota.json'
+    pool = YouTubeKeyPool(['a'], daily_quota=100, state_path=str(path), save_interval=3600)
+    pool.mark_exhausted('a')
+    assert json.loads(path.read_text())['exhausted'] == ['a']
+
+
+def test_state_from_previous_day_is_ignored(day, tmp_path):
+    path = tmp_path / 'quota.json'
+    path.write_text(json.dumps({'day': '2024-04-30', 'used': {'a': 100}, 'exhausted': ['a']}))
+    pool = YouTubeKeyPool(['a'], daily_quota=100, state_path=str(path))
+    assert pool.select() == 'a'
+    assert pool.remaining('a') == 100
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Title Generation Pipeline
+=========================
+One title job per script instead of four blocking calls in sequence:
+- The refine chain (prompt 1 -> 2 -> 3) and the "10 more" prompt run concurrently
+- Only an excerpt of the script (opening, middle, ending) is sent
+- Finished jobs are cached per script hash + prompts (RewriteCache)
+- Calls go through the LLM router (fastest provider, hedged)
+"""
+
+import asyncio
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+from output_cache import normalize_script
+
+TITLE_JOB_MODEL = "title-job"  # cache namespace for whole title jobs
+
+
+def excerpt_script(script: str, max_chars: int = 3000) -> str:
+    """
+    Opening, middle and ending of a script, cut at sentence boundaries.
+    Titles hinge on the premise and payoff, not on every paragraph.
+    """
+    script = normalize_script(script)
+    if len(script) <= max_chars:
+        return script
+
+    sentences = re.split(r'(?<=[.!?])\s+', script)
+    budget = max_chars // 3
+
+    def take(parts: List[str]) -> List[str]:
+        taken, size = [], 0
+        for sentence in parts:
+            if taken and size + len(sentence) > budget:
+                break
+            taken.append(sentence)
+            size += len(sentence) + 1
+        return taken
+
+    head = take(sentences)
+    tail = list(reversed(take(list(reversed(sentences[len(head):])))))
+    middle_start = max(len(head), len(sentences) // 2)
+    middle = take(sentences[middle_start:len(sentences) - len(tail)])
+    excerpt = [" ".join(head), " ".join(middle), " ".join(tail)]
+    return "\n[...]\n".join(part for part in excerpt if part)[:max_chars + 200]
+
+
+def parse_numbered_titles(text: str) -> List[str]:
+    """'1. Title' / '1) Title' lines -> titles (quotes and markdown stripped)"""
+    titles = []
+    for line in text.splitlines():
+        match = re.match(r'\s*\d+[.)]\s*(.+)', line)
+        if match:
+            titles.append(match.group(1).strip().strip('*"\'').strip())
+    return titles or [line.strip() for line in text.splitlines() if line.strip()]
+
+
+class TitlePipeline:
+    """Concurrent, cached title jobs over the LLM router"""
+
+    def __init__(self, router, cache=None, excerpt_chars: Optional[int] = None):
+        """
+        Args:
+            router: LLMRouter (or anything with chat(system_prompt, user_content, ...))
+            cache: Optional RewriteCache for finished jobs
+            excerpt_chars: Script characters sent to the LLM (TITLE_SCRIPT_CHARS, default 3000)
+        """
+        self.router = router
+        self.cache = cache
+        if excerpt_chars is None:
+            try:
+                excerpt_chars = int(os.getenv("TITLE_SCRIPT_CHARS", 3000))
+            except Exception:
+                excerpt_chars = 3000
+        self.excerpt_chars = excerpt_chars
+
+    async def _call(self, prompt: str, content: str, label: str, force: bool = False) -> Optional[str]:
+        result = await self.router.chat(prompt, content, 0.7, label=label, cache_lookup=not force)
+        return result.strip().strip('"').strip() if result else None
+
+    async def _refine_chain(self, prompts: Dict[str, str], excerpt: str, force: bool) -> Dict[str, Optional[str]]:
+        initial = await self._call(prompts['initial'], excerpt, "title 1/3", force)
+        refined = await self._call(prompts['refine'], initial, "title 2/3", force) if initial else None
+        final = await self._call(prompts['polish'], refined, "title 3/3", force) if refined else None
+        return {'initial': initial, 'refined': refined, 'final': final or refined or initial}
+
+    async def run(self, script: str, prompts: Dict[str, str], force: bool = False) -> Optional[dict]:
+        """
+        Generate titles for a script.
+
+        Args:
+            prompts: {'initial', 'refine', 'polish', 'more'} prompt texts
+            force: Generate fresh titles even if this script was done before
+
+        Returns:
+            {'initial', 'refined', 'final', 'more': [titles], 'cached'} or None if nothing came back
+        """
+        cache_key = None
+        if self.cache:
+            cache_key = self.cache.make_key(json.dumps(prompts, sort_keys=True), TITLE_JOB_MODEL,
+                                            0.7, normalize_script(script))
+            cached = None if force else await self.cache.get_async(cache_key)
+            if cached:
+                result = json.loads(cached)
+                result['cached'] = True
+                return result
+
+        excerpt = excerpt_script(script, self.excerpt_chars)
+        chain, more = await asyncio.gather(
+            self._refine_chain(prompts, excerpt, force),
+            self._call(prompts['more'], excerpt, "10 more titles", force)
+        )
+        if not chain['final'] and not more:
+            return None
+
+        result = dict(chain, more=parse_numbered_titles(more) if more else [])
+        if cache_key and chain['final'] and more:
+            await self.cache.put_async(cache_key, json.dumps(result))
+        result['cached'] = False
+        return result
@@ -4,15 +4,20 @@ Transcribe Helper - Supadata API Integration
 =============================================
 Extracted from working transcribe.py (D:\am\Script\transcribe.py)
 Handles YouTube transcript fetching via Supadata API with:
-- Async job polling for large files
+- Async job polling for large files (one shared poller for all jobs,
+  jittered exponential intervals)
 - Proper error handling
 - Key rotation support
 """
 
+import asyncio
 import os
+import random
 import time
 import httpx
-from typing import Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
+
+import http_pool
 
 class SupaDataError(Exception):
     """Custom exception for Supadata API errors"""
@@ -34,9 +39,22 @@ async def get_youtube_transcript(video_url: str, api_key: str) -> Tuple[Optional
         - transcript_text: The transcript or None if failed
         - is_key_exhausted: True if API key quota exhausted (429 error)
     """
+    transcript, key_exhausted, job_id = await request_transcript(video_url, api_key)
+    if job_id:
+        return await job_manager.wait(job_id, api_key)
+    return transcript, key_exhausted
+
+async def request_transcript(video_url: str, api_key: str) -> Tuple[Optional[str], bool, Optional[str]]:
+    """
+    Submit a transcript request without waiting for async jobs.
+
+    Returns:
+        Tuple[Optional[str], bool, Optional[str]]: (transcript_text, is_key_exhausted, job_id)
+        - job_id: Set when Supadata answered 202; await job_manager.wait(job_id, api_key)
+    """
     if not api_key:
         print("❌ Missing Supadata API key")
-        return None, False
+        return None, False, None
 
     try:
         # Correct endpoint according to Supadata docs
@@ -51,115 +69,226 @@ async def get_youtube_transcript(video_url: str, api_key: str) -> Tuple[Optional
 
         print(f"[Supadata] Requesting transcript: {video_url[:50]}...")
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.get(url, params=params, headers=_headers(api_key))
-
-            print(f"[Supadata] Response status: {response.status_code}")
-
-            # Handle different status codes
-            if response.status_code == 401:
-                print("❌ 401 Unauthorized - Invalid API key")
-                return None, False
-
-            elif response.status_code == 429:
-                print("⚠️ 429 Rate Limited - API key quota exhausted")
-                return None, True  # Key exhausted!
-
-            elif response.status_code == 202:
-                # Async job - need to poll for results
-                job_data = response.json()
-                job_id = job_data.get("jobId")
-                if not job_id:
-                    print("❌ Got 202 but no job ID")
-                    return None, False
-
-                print(f"[Supadata] Large file detected, polling job: {job_id}")
-                return await _poll_job_result(client, job_id, api_key)
-
-            elif response.status_code >= 400:
-                error_text = response.text[:200]
-                print(f"❌ Supadata error {response.status_code}: {error_text}")
-                return None, False
-
-            elif response.status_code == 200:
-                # Direct response - process transcript
-                data = response.json()
-                transcript = _extract_transcript_text(data)
-                if transcript:
-                    print(f"✅ Transcript received: {len(transcript)} characters")
-                    return transcript, False
-                else:
-                    print("❌ No transcript content found in response")
-                    return None, False
+        # Shared keep-alive client instead of a new connection per call
+        response = await http_pool.get(url, params=params, headers=_headers(api_key), timeout=120.0)
+
+        print(f"[Supadata] Response status: {response.status_code}")
+
+        # Handle different status codes
+        if response.status_code == 401:
+            print("❌ 401 Unauthorized - Invalid API key")
+            return None, False, None
+
+        elif response.status_code == 429:
+            print("⚠️ 429 Rate Limited - API key quota exhausted")
+            return None, True, None  # Key exhausted!
+
+        elif response.status_code == 202:
+            # Async job - need to poll for results
+            job_data = response.json()
+            job_id = job_data.get("jobId")
+            if not job_id:
+                print("❌ Got 202 but no job ID")
+                return None, False, None
+
+            print(f"[Supadata] Large file detected, job queued: {job_id}")
+            return None, False, job_id
+
+        elif response.status_code >= 400:
+            error_text = response.text[:200]
+            print(f"❌ Supadata error {response.status_code}: {error_text}")
+            return None, False, None
+
+        elif response.status_code == 200:
+            # Direct response - process transcript
+            data = response.json()
+            transcript = _extract_transcript_text(data)
+            if transcript:
+                print(f"✅ Transcript received: {len(transcript)} characters")
+                return transcript, False, None
             else:
-                print(f"❌ Unexpected status code: {response.status_code}")
-                return None, False
+                print("❌ No transcript content found in response")
+                return None, False, None
+        else:
+            print(f"❌ Unexpected status code: {response.status_code}")
+            return None, False, None
 
     except httpx.TimeoutException:
         print("❌ Supadata request timeout")
-        return None, False
+        return None, False, None
     except Exception as e:
         print(f"❌ Supadata error: {e}")
-        return None, False
+        return None, False, None
 
-async def _poll_job_result(client: httpx.AsyncClient, job_id: str, api_key: str) -> Tuple[Optional[str], bool]:
+async def _poll_job_result(job_id: str, api_key: str) -> Tuple[Optional[str], bool]:
     """
-    Poll for job results when Supadata returns a job ID (202 status).
+    Wait for a Supadata job (202 status) via the shared job manager.
 
     Returns:
         Tuple[Optional[str], bool]: (transcript_text, is_key_exhausted)
     """
-    poll_url = f"https://api.supadata.ai/v1/transcript/{job_id}"
+    return await job_manager.wait(job_id, api_key)
 
-    max_attempts = 60  # 5 minutes max (60 * 5 seconds)
-    attempt = 0
+# =============================================================================
+# JOB MANAGER (many outstanding jobs, one polling loop)
+# =============================================================================
 
-    while attempt < max_attempts:
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except Exception:
+        return default
+
+class SupadataJobManager:
+    """
+    Tracks outstanding Supadata job IDs and polls them all from one async loop.
+
+    Each job is polled on its own jittered exponential schedule
+    (SUPADATA_POLL_INITIAL -> x1.5 -> SUPADATA_POLL_MAX seconds) until it
+    completes, fails or passes SUPADATA_POLL_TIMEOUT; waiters get a future.
+    """
+
+    def __init__(self):
+        self.initial_interval = _env_float("SUPADATA_POLL_INITIAL", 2)
+        self.max_interval = _env_float("SUPADATA_POLL_MAX", 30)
+        self.factor = 1.5
+        self.timeout = _env_float("SUPADATA_POLL_TIMEOUT", 600)
+        self._jobs: Dict[str, dict] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def submit(self, job_id: str, api_key: str,
+               extract: Callable[[dict], Optional[str]] = None) -> asyncio.Future:
+        """
+        Start tracking a job.
+
+        Returns:
+            Future resolving to (transcript_text, is_key_exhausted)
+        """
+        if job_id in self._jobs:
+            return self._jobs[job_id]['future']
+
+        now = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._jobs[job_id] = {
+            'api_key': api_key,
+            'future': future,
+            'extract': extract or _extract_transcript_text,
+            'interval': self.initial_interval,
+            'next_poll': now + self._jitter(self.initial_interval),
+            'deadline': now + self.timeout,
+            'polls': 0,
+            'waiters': 0,  # wait() callers still interested in the result
+        }
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+        return future
+
+    async def wait(self, job_id: str, api_key: str,
+                   extract: Callable[[dict], Optional[str]] = None) -> Tuple[Optional[str], bool]:
+        """submit() and await the result; the job is dropped once its last waiter is cancelled"""
+        future = self.submit(job_id, api_key, extract)
+        job = self._jobs.get(job_id)
+        if job is None:  # already resolved
+            return await future
+        job['waiters'] += 1
         try:
-            response = await client.get(poll_url, headers=_headers(api_key))
+            # shield: one cancelled waiter must not cancel the job for other waiters
+            return await asyncio.shield(future)
+        finally:
+            job['waiters'] -= 1
+            if job['waiters'] == 0 and not future.done():
+                print(f"[Supadata] Job {job_id} abandoned by every waiter, polling stopped")
+                self._jobs.pop(job_id, None)
+                future.cancel()
+                self._wakeup.set()
+
+    def _jitter(self, interval: float) -> float:
+        return interval * random.uniform(0.8, 1.2)
+
+    async def _run(self):
+        """Poll every job that is due; sleep until the next one (or a new submission)"""
+        while self._jobs:
+            for job_id in [j for j, job in self._jobs.items() if job['future'].done()]:
+                del self._jobs[job_id]  # nobody waiting any more
+            if not self._jobs:
+                break
+
+            now = time.monotonic()
+            due = [job_id for job_id, job in self._jobs.items() if job['next_poll'] <= now]
+            if due:
+                await asyncio.gather(*(self._poll(job_id) for job_id in due))
+                continue
+
+            delay = min(job['next_poll'] for job in self._jobs.values()) - now
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _resolve(self, job_id: str, result: Tuple[Optional[str], bool]):
+        job = self._jobs.pop(job_id, None)
+        if job and not job['future'].done():
+            job['future'].set_result(result)
+
+    async def _poll(self, job_id: str):
+        job = self._jobs[job_id]
+        job['polls'] += 1
+        poll_url = f"https://api.supadata.ai/v1/transcript/{job_id}"
+
+        try:
+            response = await http_pool.get(poll_url, headers=_headers(job['api_key']), timeout=30.0)
 
             if response.status_code == 429:
                 print("⚠️ 429 during polling - API key quota exhausted")
-                return None, True  # Key exhausted!
+                return self._resolve(job_id, (None, True))  # Key exhausted!
 
-            if response.status_code == 200:
-                data = response.json()
-                status = data.get("status")
-
-                if status == "completed":
-                    print(f"[Supadata] Job completed successfully")
-                    transcript = _extract_transcript_text(data)
-                    if transcript:
-                        print(f"✅ Transcript received: {len(transcript)} characters")
-                        return transcript, False
-                    else:
-                        print("❌ No transcript in completed job")
-                        return None, False
+            if response.status_code != 200:
+                print(f"❌ Job status check failed: {response.status_code}")
+                return self._resolve(job_id, (None, False))
 
-                elif status == "failed":
-                    error = data.get("error", "Unknown error")
-                    print(f"❌ Job failed: {error}")
-                    return None, False
+            data = response.json()
+            status = data.get("status")
 
-                elif status in ["queued", "active"]:
-                    print(f"[Supadata] Job status: {status}, waiting... ({attempt + 1}/{max_attempts})")
-                    await asyncio_sleep(5)  # Wait 5 seconds before next poll
-                    attempt += 1
-                    continue
+            if status == "completed":
+                print(f"[Supadata] Job {job_id} completed after {job['polls']} polls")
+                transcript = job['extract'](data)
+                if transcript:
+                    print(f"✅ Transcript received: {len(transcript)} characters")
                 else:
-                    print(f"❌ Unknown job status: {status}")
-                    return None, False
-            else:
-                print(f"❌ Job status check failed: {response.status_code}")
-                return None, False
+                    print("❌ No transcript in completed job")
+                return self._resolve(job_id, (transcript or None, False))
 
-        except Exception as e:
-            print(f"[Supadata] Poll attempt {attempt + 1} failed: {e}")
-            attempt += 1
-            await asyncio_sleep(5)
+            if status == "failed":
+                print(f"❌ Job failed: {data.get('error', 'Unknown error')}")
+                return self._resolve(job_id, (None, False))
 
-    print("❌ Job polling timeout - file may be too large or processing failed")
-    return None, False
+            if status not in ["queued", "active"]:
+                print(f"❌ Unknown job status: {status}")
+                return self._resolve(job_id, (None, False))
+
+        except Exception as e:
+            status = None
+            print(f"[Supadata] Poll {job['polls']} of job {job_id} failed: {e}")
+
+        now = time.monotonic()
+        if now >= job['deadline']:
+            print("❌ Job polling timeout - file may be too large or processing failed")
+            return self._resolve(job_id, (None, False))
+        job['interval'] = min(self.max_interval, job['interval'] * self.factor)
+        job['next_poll'] = now + self._jitter(job['interval'])
+        if status:
+            print(f"[Supadata] Job {job_id} {status}, next check in ~{job['next_poll'] - now:.0f}s "
+                  f"({len(self._jobs)} job(s) outstanding)")
+
+job_manager = SupadataJobManager()
 
 def _extract_transcript_text(data: dict) -> Optional[str]:
     """
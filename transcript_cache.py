@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+YouTube Transcript Cache
+========================
+Transcripts stored by video ID + language so re-runs (cooldown expiry,
+retries after TTS failures, the same link sent twice) skip Supadata:
+- Local gzip-compressed files, one per (video, language)
+- Freshness policy: entries older than ttl_days are treated as misses
+- Optional Supabase mirror (youtube_transcripts table) shared across instances
+"""
+
+import gzip
+import os
+import re
+import time
+from typing import Optional
+
+
+class TranscriptCache:
+    """Compressed on-disk (video_id, lang) -> transcript store"""
+
+    def __init__(self, root: str = "transcript_cache", ttl_days: float = 90, mirror=None):
+        """
+        Args:
+            root: Directory holding <video_id>.<lang>.txt.gz files
+            ttl_days: Transcripts older than this are fetched again
+            mirror: Optional object with get_transcript(video_id, lang, max_age_days) /
+                    store_transcript(video_id, lang, text) (e.g. SupabaseClient)
+        """
+        self.root = root
+        self.ttl_seconds = ttl_days * 86400
+        self.mirror = mirror
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, video_id: str, lang: str) -> str:
+        safe_id = re.sub(r'[^\w-]', '_', video_id)
+        safe_lang = re.sub(r'[^\w-]', '_', lang)
+        return os.path.join(self.root, f"{safe_id}.{safe_lang}.txt.gz")
+
+    def get(self, video_id: str, lang: str = "auto") -> Optional[str]:
+        """Fresh cached transcript or None (checks the mirror on a local miss)"""
+        path = self._path(video_id, lang)
+        try:
+            if time.time() - os.path.getmtime(path) <= self.ttl_seconds:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    text = f.read()
+                if text:
+                    self.hits += 1
+                    return text
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ Transcript cache entry unreadable, dropping: {e}")
+            self._remove(path)
+
+        if self.mirror:
+            try:
+                text = self.mirror.get_transcript(video_id, lang, max_age_days=self.ttl_seconds / 86400)
+            except Exception as e:
+                print(f"⚠️ Transcript cache mirror lookup failed: {e}")
+                text = None
+            if text:
+                self._store_local(path, text)
+                self.hits += 1
+                return text
+
+        self.misses += 1
+        return None
+
+    def put(self, video_id: str, text: str, lang: str = "auto"):
+        if not text:
+            return
+        self._store_local(self._path(video_id, lang), text)
+        if self.mirror:
+            try:
+                self.mirror.store_transcript(video_id, lang, text)
+            except Exception as e:
+                print(f"⚠️ Transcript cache mirror store failed: {e}")
+
+    def _store_local(self, path: str, text: str):
+        tmp_path = f"{path}.tmp"
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ Transcript cache store failed: {e}")
+            self._remove(tmp_path)
+
+    def purge_expired(self) -> int:
+        """Delete entries past the freshness window. Returns count."""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if name.endswith(".tmp") or os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+TTS Worker - F5-TTS inference off the asyncio event loop
+=========================================================
+All blocking GPU work (reference preprocessing, chunk synthesis) runs on a
+single dedicated thread so the Telegram Application keeps polling, serving
+callbacks and accepting uploads while a script is being synthesized.
+
+Async job interface:
+- submit(): start a job that produces results incrementally; an optional
+  after_item hook runs on the worker thread after each result (e.g. the
+  memory policy's CUDA flush, which must not race the GPU from the loop)
+- job.results(): async iterator over results as they are produced
+- job.drain(on_item): consume every result; cancels only if left early
+- job.progress / job.completed / job.total
+- job.cancel(): returns control immediately; the worker stops at the
+  next batch boundary
+"""
+
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+
+class TTSJob:
+    """Handle for one submitted TTS job"""
+
+    def __init__(self, job_id: int, total: int, loop: asyncio.AbstractEventLoop):
+        self.job_id = job_id
+        self.total = total
+        self.completed = 0
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._cancel_event = threading.Event()
+        self._finished = asyncio.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def progress(self) -> float:
+        return self.completed / self.total if self.total else 0.0
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def cancel(self):
+        """Request cancellation; any awaiting results() loop ends right away"""
+        if self._cancel_event.is_set() or self.done:
+            return
+        self._cancel_event.set()
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, ("cancelled", None))
+
+    def _push(self, kind: str, payload: Any = None):
+        """Called from the worker thread"""
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (kind, payload))
+
+    async def results(self):
+        """Yield results in production order until the job ends"""
+        while True:
+            kind, payload = await self._queue.get()
+            if kind == "item":
+                self.completed += 1
+                yield payload
+            elif kind == "error":
+                self._finished.set()
+                raise payload
+            else:  # "done" or "cancelled"
+                self._finished.set()
+                return
+
+    async def drain(self, on_item: Callable[[Any], Awaitable[Optional[bool]]]) -> bool:
+        """
+        Feed every result to on_item until the worker reports the end of the job.
+        on_item returning False stops early and cancels the job.
+
+        Returns:
+            True only if the worker finished the whole job (its "done" was read)
+        """
+        try:
+            async for item in self.results():
+                if await on_item(item) is False:
+                    return False
+            return self.done and not self.cancelled
+        finally:
+            # Only a job we abandoned early needs cancelling; a finished one is left alone
+            if not self.done:
+                self.cancel()
+
+
+class TTSWorker:
+    """Single background thread that owns the GPU"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="f5-tts")
+        self._ids = itertools.count(1)
+        self.current_job: Optional[TTSJob] = None
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run a single blocking call (e.g. reference preprocessing) on the worker thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+
+    def submit(self, make_iter: Callable[[], Iterator], total: int = 0,
+               after_item: Optional[Callable[[Any], Any]] = None) -> TTSJob:
+        """
+        Start a job on the worker thread.
+
+        Args:
+            make_iter: Called on the worker thread; returns an iterator whose
+                       items are streamed back through job.results()
+            total: Expected number of items (for progress reporting)
+            after_item: Called on the worker thread after each item is handed over
+        """
+        job = TTSJob(next(self._ids), total, asyncio.get_running_loop())
+        self.current_job = job
+        self._executor.submit(self._run_job, job, make_iter, after_item)
+        return job
+
+    def cancel_current(self) -> bool:
+        """Cancel the running job, if any. Returns True if something was cancelled."""
+        job = self.current_job
+        if job and not job.done and not job.cancelled:
+            job.cancel()
+            return True
+        return False
+
+    @staticmethod
+    def _run_job(job: TTSJob, make_iter: Callable[[], Iterator],
+                 after_item: Optional[Callable[[Any], Any]] = None):
+        if job.cancelled:
+            return
+        iterator = None
+        try:
+            iterator = make_iter()
+            for item in iterator:
+                if job.cancelled:
+                    return
+                job._push("item", item)
+                if after_item:
+                    after_item(item)
+            job._push("done")
+        except BaseException as e:
+            job._push("error", e)
+        finally:
+            if iterator is not None and hasattr(iterator, "close"):
+                iterator.close()
+
+    def shutdown(self):
+        self.cancel_current()
+        self._executor.shutdown(wait=False)
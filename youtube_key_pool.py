@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+YouTube API Key Pool
+====================
+Spreads YouTube Data API calls over several keys so large multi-channel
+batches don't die mid-fetch when one key runs out:
+- Estimated quota cost per call type (search.list = 100 units, *.list = 1)
+- Units consumed per key per Pacific day (when Google resets quotas),
+  persisted so restarts don't forget the day's spend (written at most every
+  YOUTUBE_QUOTA_SAVE_SECONDS, and on flush() at the end of a batch)
+- The current key is kept until its estimate runs out or the API answers
+  quotaExceeded, then the key with the most quota left takes over
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+# Quota units per call (https://developers.google.com/youtube/v3/determine_quota_cost)
+QUOTA_COSTS = {
+    'search.list': 100,
+}
+DEFAULT_CALL_COST = 1  # channels/playlistItems/videos .list
+QUOTA_ERROR_REASONS = ('quotaExceeded', 'dailyLimitExceeded')
+
+try:
+    from zoneinfo import ZoneInfo
+    PACIFIC = ZoneInfo("America/Los_Angeles")
+except Exception:
+    PACIFIC = None  # no tz database: fixed UTC-8 is at most an hour off
+
+
+def call_cost(endpoint: str) -> int:
+    return QUOTA_COSTS.get(endpoint, DEFAULT_CALL_COST)
+
+
+def pacific_day() -> str:
+    """Current quota day (YouTube quotas reset at midnight Pacific time)"""
+    if PACIFIC is not None:
+        return datetime.now(PACIFIC).date().isoformat()
+    return (datetime.now(timezone.utc) - timedelta(hours=8)).date().isoformat()
+
+
+def is_quota_error(error: Exception) -> bool:
+    """True for an HttpError whose reason is an exhausted daily quota"""
+    content = getattr(error, 'content', b'') or b''
+    if isinstance(content, bytes):
+        content = content.decode('utf-8', errors='replace')
+    return any(reason in content for reason in QUOTA_ERROR_REASONS)
+
+
+class YouTubeKeyPool:
+    """Per-key daily quota accounting and key selection (thread-safe)"""
+
+    def __init__(self, keys: Optional[Iterable[str]] = None, daily_quota: Optional[int] = None,
+                 state_path: Optional[str] = "youtube_quota.json", save_interval: Optional[float] = None):
+        """
+        Args:
+            keys: Initial API keys (more can be added with set_keys/add_key)
+            daily_quota: Units per key per day (YOUTUBE_DAILY_QUOTA, default 10000)
+            state_path: JSON file for today's usage (None = memory only)
+            save_interval: Seconds between state writes while charging calls
+                           (YOUTUBE_QUOTA_SAVE_SECONDS, default 30)
+        """
+        if daily_quota is None:
+            try:
+                daily_quota = int(os.getenv("YOUTUBE_DAILY_QUOTA", 10000))
+            except Exception:
+                daily_quota = 10000
+        if save_interval is None:
+            try:
+                save_interval = float(os.getenv("YOUTUBE_QUOTA_SAVE_SECONDS", 30))
+            except Exception:
+                save_interval = 30.0
+        self.daily_quota = daily_quota
+        self.state_path = state_path
+        self.save_interval = save_interval
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.keys: List[str] = []
+        self._lock = threading.Lock()
+        self._day = pacific_day()
+        self._used: Dict[str, int] = {}
+        self._exhausted = set()
+        self._load()
+        for key in keys or []:
+            self.add_key(key)
+
+    # =============================================================================
+    # KEYS
+    # =============================================================================
+
+    def add_key(self, key: str):
+        with self._lock:
+            if key and key not in self.keys:
+                self.keys.append(key)
+
+    def set_keys(self, keys: Iterable[str]):
+        """Replace the pool's keys (usage for known keys is kept)"""
+        with self._lock:
+            self.keys = list(dict.fromkeys(k for k in keys if k))
+
+    def select(self, preferred: Optional[str] = None, cost: int = DEFAULT_CALL_COST) -> Optional[str]:
+        """
+        Key for the next call: the preferred (current) key while it has room for
+        `cost`, else the key with the most quota left. Keys whose estimate ran out
+        but were never refused by the API are a last resort (the estimate may be
+        pessimistic). None when every key answered quotaExceeded today.
+        """
+        with self._lock:
+            self._roll_day()
+            usable = [k for k in self.keys if k not in self._exhausted]
+            if not usable:
+                return None
+            if preferred in usable and self._remaining(preferred) >= cost:
+                return preferred
+            return max(usable, key=self._remaining)
+
+    # =============================================================================
+    # ACCOUNTING
+    # =============================================================================
+
+    def charge(self, key: str, endpoint: str):
+        """Record one call made with key (persisted on the save timer or flush())"""
+        with self._lock:
+            self._roll_day()
+            self._used[key] = self._used.get(key, 0) + call_cost(endpoint)
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= self.save_interval:
+                self._save()
+
+    def mark_exhausted(self, key: str):
+        """The API refused key for quota: skip it until the next Pacific day"""
+        with self._lock:
+            self._roll_day()
+            self._exhausted.add(key)
+            self._used[key] = max(self._used.get(key, 0), self.daily_quota)
+            self._save()
+        print(f"⚠️ YouTube API key {key[:12]}... out of quota until midnight Pacific")
+
+    def flush(self):
+        """Write usage charged since the last save (call at the end of a batch)"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def remaining(self, key: str) -> int:
+        with self._lock:
+            self._roll_day()
+            return self._remaining(key)
+
+    def _remaining(self, key: str) -> int:
+        return max(0, self.daily_quota - self._used.get(key, 0))
+
+    def _roll_day(self):
+        today = pacific_day()
+        if today != self._day:
+            self._day = today
+            self._used = {}
+            self._exhausted = set()
+
+    def summary(self) -> str:
+        """Human-readable per-key usage for today"""
+        with self._lock:
+            self._roll_day()
+            lines = []
+            for key in self.keys:
+                state = "❌ quota exceeded" if key in self._exhausted else f"{self._remaining(key):,} left"
+                lines.append(f"  • {key[:20]}... - {self._used.get(key, 0):,}/{self.daily_quota:,} units, {state}")
+            return "\n".join(lines)
+
+    # =============================================================================
+    # PERSISTENCE
+    # =============================================================================
+
+    def _load(self):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('day') == self._day:
+                self._used = {k: int(v) for k, v in state.get('used', {}).items()}
+                self._exhausted = set(state.get('exhausted', []))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ YouTube quota state unreadable, starting fresh: {e}")
+
+    def _save(self):
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if not self.state_path:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'day': self._day, 'used': self._used, 'exhausted': sorted(self._exhausted)}, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            print(f"⚠️ YouTube quota state store failed: {e}")
@@ -13,20 +13,38 @@ Handles YouTube channel processing including:
 import os
 import re
 import json
-from typing import List, Dict, Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import isodate  # For parsing ISO 8601 duration format
 
+from channel_cache import channel_cache_key
+from youtube_key_pool import call_cost, is_quota_error
+
 class YouTubeProcessorError(Exception):
     """Custom exception for YouTube processor errors"""
     pass
 
 class YouTubeChannelProcessor:
-    def __init__(self, api_key: Optional[str] = None):
-        """Initialize YouTube processor with API key"""
+    def __init__(self, api_key: Optional[str] = None, channel_cache=None, key_pool=None):
+        """
+        Initialize YouTube processor with API key, optional ChannelResolutionCache
+        and optional YouTubeKeyPool (quota accounting + key rotation)
+        """
         self.api_key = api_key
         self.youtube = None
+        self.channel_cache = channel_cache
+        self.key_pool = key_pool
+        if key_pool and api_key:
+            key_pool.add_key(api_key)
+        self._local = threading.local()
+        self._key_lock = threading.Lock()
+        try:
+            self.detail_workers = max(1, int(os.getenv("YOUTUBE_DETAIL_WORKERS", 2)))
+        except Exception:
+            self.detail_workers = 2
         if api_key:
             try:
                 self.youtube = build('youtube', 'v3', developerKey=api_key)
@@ -37,6 +55,8 @@ class YouTubeChannelProcessor:
     def set_api_key(self, api_key: str):
         """Update YouTube API key"""
         self.api_key = api_key
+        if self.key_pool:
+            self.key_pool.add_key(api_key)
         try:
             self.youtube = build('youtube', 'v3', developerKey=api_key)
             print("✅ YouTube API key updated")
@@ -79,78 +99,75 @@ class YouTubeChannelProcessor:
         ]
         return any(re.search(pattern, url, re.IGNORECASE) for pattern in video_patterns)
 
+    @staticmethod
+    def extract_video_id(url: str) -> Optional[str]:
+        """
+        Extract the 11-character video ID from a YouTube video URL.
+        Handles watch?v=, youtu.be/, shorts/ and embed/ links.
+        """
+        match = re.search(r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/)([\w-]{11})', url)
+        return match.group(1) if match else None
+
     def extract_channel_id(self, channel_url: str) -> Optional[str]:
         """
         Extract channel ID from various YouTube channel URL formats.
         Returns channel ID (starting with UC) or None if extraction fails.
         """
+        channel = self.resolve_channel(channel_url)
+        return channel['channel_id'] if channel else None
+
+    def resolve_channel(self, channel_url: str) -> Optional[Dict]:
+        """
+        Resolve a channel URL to {channel_id, channel_name, uploads_playlist_id}.
+
+        Cheapest route first:
+        - Resolution cache (no API call)
+        - /channel/UC... -> channels().list(id=...)          (1 quota unit)
+        - @handle        -> channels().list(forHandle=...)   (1 unit)
+        - /user/name     -> channels().list(forUsername=...) (1 unit)
+        - /c/name, or the above finding nothing -> search().list (100 units) + verification
+
+        Only direct lookups and exact customUrl matches are cached; a closest-match
+        guess from search is returned but looked up again next time.
+        """
+        key = channel_cache_key(channel_url)
+        if key and self.channel_cache:
+            cached = self.channel_cache.get(key)
+            if cached:
+                print(f"⚡ Channel resolved from cache: {cached.get('channel_name') or cached['channel_id']}")
+                return cached
+
         if not self.youtube:
             print("❌ YouTube API not initialized")
             return None
 
         try:
-            # Format 1: Direct channel ID (youtube.com/channel/UCxxxxxxx)
-            match = re.search(r'youtube\.com/channel/(UC[\w-]+)', channel_url)
-            if match:
-                return match.group(1)
-
-            # Format 2: Custom URL (@username, /c/, /user/)
-            # Extract the identifier
-            username = None
-            if '@' in channel_url:
-                match = re.search(r'@([\w-]+)', channel_url)
-                if match:
-                    username = match.group(1)
-            elif '/c/' in channel_url:
-                match = re.search(r'/c/([\w-]+)', channel_url)
-                if match:
-                    username = match.group(1)
-            elif '/user/' in channel_url:
-                match = re.search(r'/user/([\w-]+)', channel_url)
-                if match:
-                    username = match.group(1)
-
-            if username:
-                # Search for channel by username/handle
-                # Get multiple results to find exact match
-                request = self.youtube.search().list(
-                    part='snippet',
-                    q=username,
-                    type='channel',
-                    maxResults=5  # Get top 5 to find exact match
-                )
-                response = request.execute()
-
-                if response.get('items'):
-                    # Find exact match by checking channel title/customUrl
-                    for item in response['items']:
-                        channel_id = item['snippet']['channelId']
-
-                        # Get full channel details to verify exact match
-                        channel_request = self.youtube.channels().list(
-                            part='snippet',
-                            id=channel_id
-                        )
-                        channel_response = channel_request.execute()
-
-                        if channel_response.get('items'):
-                            channel_data = channel_response['items'][0]['snippet']
-                            channel_custom_url = channel_data.get('customUrl', '').lower().lstrip('@')
-
-                            # Check for EXACT customUrl match (case-insensitive)
-                            # @GodsMiracleToday should match customUrl = "@godsmiracletoday"
-                            # But NOT match "@godmiraclestoday1111"
-                            if username.lower() == channel_custom_url:
-                                print(f"✅ Found exact match: {channel_data.get('title')} (@{channel_custom_url})")
-                                return channel_id
-
-                    # If no exact match found, warn user and use first result
-                    print(f"⚠️ WARNING: No exact match found for '@{username}'")
-                    print(f"⚠️ Using closest match: {response['items'][0]['snippet']['title']}")
-                    return response['items'][0]['snippet']['channelId']
-
-            print(f"❌ Could not extract channel ID from: {channel_url}")
-            return None
+            kind, _, name = (key or '').partition(':')
+            item = None
+            exact = True
+            if kind == 'id':
+                item = self._list_channel(id=name)
+            elif kind == 'handle':
+                item = self._list_channel(forHandle=name)
+            elif kind == 'user':
+                item = self._list_channel(forUsername=name)
+
+            if not item and kind in ('handle', 'c', 'user'):
+                item, exact = self._search_channel(name)
+
+            if not item:
+                print(f"❌ Could not extract channel ID from: {channel_url}")
+                return None
+
+            channel = {
+                'channel_id': item['id'],
+                'channel_name': item.get('snippet', {}).get('title'),
+                'uploads_playlist_id': item.get('contentDetails', {}).get('relatedPlaylists', {}).get('uploads')
+            }
+            if self.channel_cache and exact:
+                self.channel_cache.put(key, channel['channel_id'], channel['channel_name'],
+                                       channel['uploads_playlist_id'])
+            return channel
 
         except HttpError as e:
             print(f"❌ YouTube API error extracting channel ID: {e}")
@@ -159,13 +176,70 @@ class YouTubeChannelProcessor:
             print(f"❌ Error extracting channel ID: {e}")
             return None
 
+    def _list_channel(self, **lookup) -> Optional[Dict]:
+        """channels().list with snippet + uploads playlist for one id/forHandle/forUsername"""
+        response = self._execute('channels.list', lambda yt: yt.channels().list(
+            part='snippet,contentDetails',
+            **lookup
+        ))
+        return response['items'][0] if response.get('items') else None
+
+    def _search_channel(self, username: str) -> Tuple[Optional[Dict], bool]:
+        """
+        Fallback: search by name and verify the exact customUrl match.
+        Returns (channel, is_exact_match); without an exact match the first result is a guess.
+        """
+        # Search for channel by username/handle
+        # Get multiple results to find exact match
+        response = self._execute('search.list', lambda yt: yt.search().list(
+            part='snippet',
+            q=username,
+            type='channel',
+            maxResults=5  # Get top 5 to find exact match
+        ))
+
+        if not response.get('items'):
+            return None, False
+
+        # Get full channel details for all candidates in one call to verify exact match
+        candidate_ids = [item['snippet']['channelId'] for item in response['items']]
+        channels_response = self._execute('channels.list', lambda yt: yt.channels().list(
+            part='snippet,contentDetails',
+            id=','.join(candidate_ids)
+        ))
+        channels = {item['id']: item for item in channels_response.get('items', [])}
+
+        for channel_id in candidate_ids:
+            channel = channels.get(channel_id)
+            if not channel:
+                continue
+            channel_data = channel['snippet']
+            channel_custom_url = channel_data.get('customUrl', '').lower().lstrip('@')
+
+            # Check for EXACT customUrl match (case-insensitive)
+            # @GodsMiracleToday should match customUrl = "@godsmiracletoday"
+            # But NOT match "@godmiraclestoday1111"
+            if username.lower() == channel_custom_url:
+                print(f"✅ Found exact match: {channel_data.get('title')} (@{channel_custom_url})")
+                return channel, True
+
+        # If no exact match found, warn user and use first result
+        print(f"⚠️ WARNING: No exact match found for '@{username}'")
+        print(f"⚠️ Using closest match: {response['items'][0]['snippet']['title']}")
+        return channels.get(candidate_ids[0]) or {
+            'id': candidate_ids[0],
+            'snippet': {'title': response['items'][0]['snippet']['title']}
+        }, False
+
     # =============================================================================
     # FETCH VIDEOS FROM CHANNEL
     # =============================================================================
 
-    def fetch_channel_videos(self, channel_id: str, max_results: int = 1000) -> List[Dict]:
+    def fetch_channel_videos(self, channel_id: str, max_results: int = 1000,
+                             uploads_playlist_id: Optional[str] = None) -> List[Dict]:
         """
         Fetch up to 1000 videos from a channel.
+        Pass uploads_playlist_id (from resolve_channel) to skip the channels().list call.
         Returns list of video metadata dicts with:
         - video_id
         - title
@@ -183,55 +257,52 @@ class YouTubeChannelProcessor:
         try:
             print(f"🔍 Fetching videos from channel: {channel_id}")
 
-            # Step 1: Get channel's uploads playlist ID
-            channel_request = self.youtube.channels().list(
-                part='contentDetails,snippet',
-                id=channel_id
-            )
-            channel_response = channel_request.execute()
+            # Step 1: Get channel's uploads playlist ID (unless already resolved)
+            if not uploads_playlist_id:
+                channel_response = self._execute('channels.list', lambda yt: yt.channels().list(
+                    part='contentDetails,snippet',
+                    id=channel_id
+                ))
 
-            if not channel_response.get('items'):
-                print(f"❌ Channel not found: {channel_id}")
-                return []
+                if not channel_response.get('items'):
+                    print(f"❌ Channel not found: {channel_id}")
+                    return []
 
-            channel_name = channel_response['items'][0]['snippet']['title']
-            uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+                channel_name = channel_response['items'][0]['snippet']['title']
+                uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
 
-            print(f"✅ Channel: {channel_name}")
+                print(f"✅ Channel: {channel_name}")
             print(f"📺 Fetching from uploads playlist: {uploads_playlist_id}")
 
-            # Step 2: Fetch videos from uploads playlist (paginated)
-            fetched_count = 0
-            while fetched_count < max_results:
-                playlist_request = self.youtube.playlistItems().list(
-                    part='snippet',
-                    playlistId=uploads_playlist_id,
-                    maxResults=min(50, max_results - fetched_count),  # Max 50 per request
-                    pageToken=next_page_token
-                )
-                playlist_response = playlist_request.execute()
+            # Step 2: Page the uploads playlist; each page's detail lookup (Step 3) runs on
+            # a worker while the next page is requested (the page token is the only dependency)
+            detail_futures = []
+            listed_count = 0
+            with ThreadPoolExecutor(max_workers=self.detail_workers,
+                                    thread_name_prefix="yt-details") as executor:
+                while listed_count < max_results:
+                    playlist_response = self._execute('playlistItems.list', lambda yt: yt.playlistItems().list(
+                        part='snippet',
+                        playlistId=uploads_playlist_id,
+                        maxResults=min(50, max_results - listed_count),  # Max 50 per request
+                        pageToken=next_page_token
+                    ))
 
-                video_ids = [item['snippet']['resourceId']['videoId'] for item in playlist_response.get('items', [])]
+                    video_ids = [item['snippet']['resourceId']['videoId'] for item in playlist_response.get('items', [])]
 
-                if video_ids:
-                    # Step 3: Get detailed video statistics and duration
-                    videos_request = self.youtube.videos().list(
-                        part='snippet,contentDetails,statistics',
-                        id=','.join(video_ids)
-                    )
-                    videos_response = videos_request.execute()
+                    if video_ids:
+                        listed_count += len(video_ids)
+                        detail_futures.append(executor.submit(self._fetch_video_details, video_ids))
 
-                    for video in videos_response.get('items', []):
-                        video_data = self._parse_video_data(video)
-                        if video_data:
-                            all_videos.append(video_data)
-                            fetched_count += 1
+                    next_page_token = playlist_response.get('nextPageToken')
+                    if not next_page_token:
+                        break
 
-                next_page_token = playlist_response.get('nextPageToken')
-                if not next_page_token:
-                    break
+                    print(f"📊 Listed {listed_count} videos so far...")
 
-                print(f"📊 Fetched {fetched_count} videos so far...")
+                # Results in playlist order; a failed page raises here like the sequential loop did
+                for future in detail_futures:
+                    all_videos.extend(future.result())
 
             print(f"✅ Total videos fetched: {len(all_videos)}")
             return all_videos
@@ -243,6 +314,176 @@ class YouTubeChannelProcessor:
             print(f"❌ Error fetching videos: {e}")
             return []
 
+    def _thread_client(self, api_key: str):
+        """
+        YouTube client for the calling thread (the underlying httplib2 connection
+        is not thread-safe, so worker threads each build their own)
+        """
+        if threading.current_thread() is threading.main_thread() and api_key == self.api_key:
+            return self.youtube
+        client = getattr(self._local, 'client', None)
+        if client is None or getattr(self._local, 'api_key', None) != api_key:
+            client = build('youtube', 'v3', developerKey=api_key)
+            self._local.client = client
+            self._local.api_key = api_key
+        return client
+
+    def _execute(self, endpoint: str, build_request: Callable):
+        """
+        Run one API call, build_request(client) -> request, on the pool's current key.
+        Each call is charged to its key; on quotaExceeded the key is retired for the
+        (Pacific) day and the call is retried on the next key.
+        """
+        while True:
+            api_key = self.api_key
+            if self.key_pool:
+                api_key = self.key_pool.select(self.api_key, call_cost(endpoint))
+                if not api_key:
+                    raise YouTubeProcessorError("All YouTube API keys are out of quota for today")
+                if api_key != self.api_key:
+                    self._switch_key(api_key)
+
+            try:
+                response = build_request(self._thread_client(api_key)).execute()
+            except HttpError as e:
+                if self.key_pool and is_quota_error(e):
+                    self.key_pool.mark_exhausted(api_key)
+                    continue
+                raise
+
+            if self.key_pool:
+                self.key_pool.charge(api_key, endpoint)
+            return response
+
+    def _switch_key(self, api_key: str):
+        with self._key_lock:
+            if api_key != self.api_key:
+                print(f"🔄 Rotating YouTube API key -> {api_key[:12]}... "
+                      f"({self.key_pool.remaining(api_key):,} units left today)")
+                self.set_api_key(api_key)
+
+    def _fetch_video_details(self, video_ids: List[str]) -> List[Dict]:
+        """Step 3: detailed statistics and duration for up to 50 video IDs"""
+        videos_response = self._execute('videos.list', lambda yt: yt.videos().list(
+            part='snippet,contentDetails,statistics',
+            id=','.join(video_ids)
+        ))
+
+        videos = []
+        for video in videos_response.get('items', []):
+            video_data = self._parse_video_data(video)
+            if video_data:
+                videos.append(video_data)
+        return videos
+
+    def refresh_channel_videos(self, channel_id: str, known_videos: List[Dict],
+                               min_duration_min: int = 10, max_results: int = 1000) -> Optional[List[Dict]]:
+        """
+        Incrementally refresh a cached video list instead of refetching everything.
+
+        - Pages the uploads playlist (newest first) only until it reaches a video
+          already in the cache or older than the newest cached one
+        - Fetches full details only for the new uploads
+        - Refreshes view counts of the cached videos in batched 50-ID calls;
+          videos that no longer come back (deleted/private) are dropped
+
+        Args:
+            channel_id: Channel ID (UC...)
+            known_videos: Cached video dicts (already duration-filtered)
+            min_duration_min: Duration filter applied to new uploads
+            max_results: Most new uploads to page through, and size of the returned list
+
+        Returns:
+            Merged list, filtered and sorted by views (top max_results), or None on failure
+            (caller should fall back to a full fetch)
+        """
+        if not self.youtube:
+            raise YouTubeProcessorError("YouTube API not initialized")
+
+        known = {v['video_id']: dict(v) for v in known_videos if v.get('video_id')}
+        # Compare timestamps to the second ('...Z' from the API, '...+00:00' from Postgres)
+        newest_known = max((str(v.get('published_at') or '')[:19] for v in known.values()), default='')
+        api_calls = 0
+
+        try:
+            print(f"🔄 Refreshing {len(known)} cached videos for channel: {channel_id}")
+
+            # Uploads playlist is the channel ID with UC -> UU (saves a channels.list call)
+            if channel_id.startswith('UC'):
+                uploads_playlist_id = 'UU' + channel_id[2:]
+            else:
+                channel_response = self._execute('channels.list', lambda yt: yt.channels().list(
+                    part='contentDetails',
+                    id=channel_id
+                ))
+                api_calls += 1
+                if not channel_response.get('items'):
+                    print(f"❌ Channel not found: {channel_id}")
+                    return None
+                uploads_playlist_id = channel_response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+
+            # Step 1: New uploads only (stop at the first already-known video)
+            new_ids = []
+            next_page_token = None
+            reached_known = False
+            while not reached_known and len(new_ids) < max_results:
+                playlist_response = self._execute('playlistItems.list', lambda yt: yt.playlistItems().list(
+                    part='snippet',
+                    playlistId=uploads_playlist_id,
+                    maxResults=50,
+                    pageToken=next_page_token
+                ))
+                api_calls += 1
+
+                for item in playlist_response.get('items', []):
+                    snippet = item['snippet']
+                    video_id = snippet['resourceId']['videoId']
+                    # Cache only holds long videos, so a short upload won't match by ID;
+                    # the publish date still marks where the cache left off
+                    if video_id in known or (newest_known and snippet.get('publishedAt', '')[:19] <= newest_known):
+                        reached_known = True
+                        break
+                    new_ids.append(video_id)
+
+                next_page_token = playlist_response.get('nextPageToken')
+                if not next_page_token:
+                    break
+
+            # Step 2: Details for new uploads, fresh statistics for cached ones
+            new_videos = []
+            for i in range(0, len(new_ids), 50):
+                new_videos.extend(self._fetch_video_details(new_ids[i:i + 50]))
+                api_calls += 1
+
+            known_ids = list(known)
+            still_available = set()
+            for i in range(0, len(known_ids), 50):
+                stats_response = self._execute('videos.list', lambda yt: yt.videos().list(
+                    part='statistics',
+                    id=','.join(known_ids[i:i + 50])
+                ))
+                api_calls += 1
+                for video in stats_response.get('items', []):
+                    still_available.add(video['id'])
+                    view_count = video.get('statistics', {}).get('viewCount')
+                    if view_count is not None:
+                        known[video['id']]['view_count'] = int(view_count)
+
+            removed = len(known) - len(still_available)
+            new_videos = self.filter_and_sort_videos(new_videos, min_duration_minutes=min_duration_min)
+            merged = [v for video_id, v in known.items() if video_id in still_available] + new_videos
+
+            print(f"✅ Incremental refresh: {len(new_videos)} new, {removed} removed, "
+                  f"{len(merged)} total ({api_calls} API calls)")
+            return sorted(merged, key=lambda x: x['view_count'], reverse=True)[:max_results]
+
+        except HttpError as e:
+            print(f"❌ YouTube API error during refresh: {e}")
+            return None
+        except Exception as e:
+            print(f"❌ Error refreshing videos: {e}")
+            return None
+
     def _parse_video_data(self, video: Dict) -> Optional[Dict]:
         """Parse video data from YouTube API response"""
         try:
@@ -438,33 +679,24 @@ class YouTubeChannelProcessor:
         Returns:
             Tuple[channel_id, channel_name, videos]: Channel ID, name, and list of video dicts
         """
-        # Step 1: Extract channel ID
-        channel_id = self.extract_channel_id(channel_url)
-        if not channel_id:
+        # Step 1: Resolve channel ID, name and uploads playlist (cached after the first time)
+        channel = self.resolve_channel(channel_url)
+        if not channel:
             print("❌ Failed to extract channel ID")
             return None, None, []
 
-        # Step 2: Fetch channel name
-        channel_name = None
-        try:
-            channel_request = self.youtube.channels().list(
-                part='snippet',
-                id=channel_id
-            )
-            channel_response = channel_request.execute()
-            if channel_response.get('items'):
-                channel_name = channel_response['items'][0]['snippet']['title']
-                print(f"✅ Channel resolved: {channel_name}")
-        except Exception as e:
-            print(f"⚠️ Could not fetch channel name: {e}")
+        channel_id = channel['channel_id']
+        channel_name = channel.get('channel_name')
+        print(f"✅ Channel resolved: {channel_name or channel_id}")
 
-        # Step 3: Fetch all videos (up to 1000)
-        all_videos = self.fetch_channel_videos(channel_id, max_results=1000)
+        # Step 2: Fetch all videos (up to 1000)
+        all_videos = self.fetch_channel_videos(channel_id, max_results=1000,
+                                               uploads_playlist_id=channel.get('uploads_playlist_id'))
         if not all_videos:
             print("❌ No videos fetched")
             return channel_id, channel_name, []
 
-        # Step 4: Filter by duration and sort by views
+        # Step 3: Filter by duration and sort by views
         filtered_videos = self.filter_and_sort_videos(all_videos, min_duration_minutes=min_duration_min)
 
         print(f"✅ Pipeline complete: {len(filtered_videos)} videos ready")